@@ -0,0 +1,221 @@
+r"""Measure each phase of the fixture lifecycle, and emit results as JSON.
+
+Phases are measured the way the fixtures go through them:
+
+* ``init_directory`` - initdb run by the process fixture
+* ``start`` - starting the server, until it accepts connections
+* ``load`` - populating the template database
+* ``init`` - cloning test database out of the template, done for each test
+* ``drop`` - dropping the test database, done for each test
+* ``stop`` - stopping the server
+
+for each combination of template database sizes and worker counts.
+Each worker runs its own server, like pytest-xdist workers do by default.
+
+    python benchmarks/lifecycle.py --executable /usr/lib/postgresql/16/bin/pg_ctl \
+        --size 0 --size 100 --size 1000 --workers 1 --workers 4 --output results.json
+
+Compare results of two commits with:
+
+    python benchmarks/lifecycle.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from port_for import get_port
+
+from pytest_postgresql.executor import PostgreSQLExecutor, detect_version
+from pytest_postgresql.janitor import DatabaseJanitor
+
+PHASES = ("init_directory", "start", "load", "init", "drop", "stop")
+# Size of a single row in the benchmark table, including tuple overhead.
+ROW_SIZE = 1024
+Timings = Dict[str, List[float]]
+
+
+def load_template(janitor: DatabaseJanitor, size_mb: int) -> None:
+    """Fill the template database with about size_mb megabytes of table data."""
+    assert janitor.template_dbname
+    rows = size_mb * 1024 * 1024 // ROW_SIZE
+    with janitor.cursor(janitor.template_dbname) as cur:
+        cur.execute("CREATE TABLE bench (id serial PRIMARY KEY, value text NOT NULL)")
+        if rows:
+            cur.execute(
+                "INSERT INTO bench (value) SELECT repeat(md5(i::text), %s) "
+                "FROM generate_series(1, %s) i",
+                (ROW_SIZE // 32 - 2, rows),
+            )
+
+
+def run_worker(executable: str, size_mb: int, rounds: int, worker: int) -> Timings:
+    """Go through the whole lifecycle once, cloning and dropping test database rounds times."""
+    timings: Timings = {phase: [] for phase in PHASES}
+    port = get_port(None)
+    assert port is not None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executor = PostgreSQLExecutor(
+            executable=executable,
+            host="127.0.0.1",
+            port=port,
+            datadir=str(Path(tmpdir) / "data"),
+            unixsocketdir=tmpdir,
+            logfile=str(Path(tmpdir) / "postgresql.log"),
+            startparams="-w",
+            dbname=f"bench_{worker}",
+        )
+        # detect version up front, so it's not measured as part of initdb
+        assert executor.version
+        start = time.perf_counter()
+        executor.init_directory()
+        timings["init_directory"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        executor.start()
+        executor.wait_for_postgres()
+        timings["start"].append(time.perf_counter() - start)
+
+        template_janitor = DatabaseJanitor(
+            user=executor.user,
+            host=executor.host,
+            port=executor.port,
+            template_dbname=executor.template_dbname,
+            version=executor.version,
+        )
+        template_janitor.init()
+        start = time.perf_counter()
+        load_template(template_janitor, size_mb)
+        timings["load"].append(time.perf_counter() - start)
+
+        for _ in range(rounds):
+            janitor = DatabaseJanitor(
+                user=executor.user,
+                host=executor.host,
+                port=executor.port,
+                dbname=executor.dbname,
+                template_dbname=executor.template_dbname,
+                version=executor.version,
+            )
+            start = time.perf_counter()
+            janitor.init()
+            timings["init"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            janitor.drop()
+            timings["drop"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        executor.stop()
+        timings["stop"].append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return summary statistics of the samples, in seconds."""
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": statistics.mean(samples),
+        "samples": len(samples),
+    }
+
+
+def measure(executable: str, size_mb: int, workers: int, rounds: int) -> Dict[str, Any]:
+    """Run the lifecycle in workers processes at once, and summarize each phase."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                run_worker,
+                [executable] * workers,
+                [size_mb] * workers,
+                [rounds] * workers,
+                range(workers),
+            )
+        )
+    return {
+        "size_mb": size_mb,
+        "workers": workers,
+        "phases": {
+            phase: summarize([sample for result in results for sample in result[phase]])
+            for phase in PHASES
+        },
+    }
+
+
+def environment(executable: str) -> Dict[str, Any]:
+    """Describe what the results were measured on."""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "postgresql": str(detect_version(executable)),
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print median changes of each phase between two result files."""
+    before, after = (json.loads(Path(path).read_text()) for path in (before_path, after_path))
+    before_runs = {(run["size_mb"], run["workers"]): run for run in before["results"]}
+    print(f"{'size [MB]':>10}{'workers':>9}  {'phase':<16}{'before [ms]':>12}{'after [ms]':>12}")
+    for run in after["results"]:
+        previous = before_runs.get((run["size_mb"], run["workers"]))
+        if previous is None:
+            continue
+        for phase in PHASES:
+            old = previous["phases"][phase]["median"] * 1000
+            new = run["phases"][phase]["median"] * 1000
+            change = f"{(new - old) / old:+.0%}" if old else ""
+            print(
+                f"{run['size_mb']:>10}{run['workers']:>9}  {phase:<16}"
+                f"{old:>12.1f}{new:>12.1f}  {change}"
+            )
+
+
+def main() -> None:
+    """Run the benchmark, or compare results, based on the arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executable", default="/usr/lib/postgresql/16/bin/pg_ctl")
+    parser.add_argument("--rounds", type=int, default=20, help="test databases per worker")
+    parser.add_argument("--size", type=int, action="append", help="template size in MB")
+    parser.add_argument("--workers", type=int, action="append", help="concurrent workers")
+    parser.add_argument("--output", help="file to write results to, instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = {
+        "environment": environment(args.executable),
+        "results": [
+            measure(args.executable, size_mb, workers, args.rounds)
+            for size_mb in args.size or [0, 100, 1000]
+            for workers in args.workers or [1, os.cpu_count() or 1]
+        ],
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare creating and dropping test databases between server profiles.
+
+Starts a server with each profile, loads a template database
+and measures how long it takes to create a test database from it,
+and to drop it, the way the client fixture does for each test.
+
+    python benchmarks/profiles.py --executable /usr/lib/postgresql/16/bin/pg_ctl
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from port_for import get_port
+
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.profiles import PROFILES
+
+
+def load_template(janitor: DatabaseJanitor, tables: int, rows: int) -> None:
+    """Create tables with rows in the template database."""
+    assert janitor.template_dbname
+    with janitor.cursor(janitor.template_dbname) as cur:
+        for table in range(tables):
+            cur.execute(
+                f"CREATE TABLE table_{table} (id serial PRIMARY KEY, value text NOT NULL);"
+                f"INSERT INTO table_{table} (value) "
+                f"SELECT md5(i::text) FROM generate_series(1, {rows}) i;"
+            )
+
+
+def measure(
+    executable: str, profile: str, rounds: int, tables: int, rows: int
+) -> Tuple[List[float], List[float]]:
+    """Measure database creation and drop times, in seconds, for the profile."""
+    port = get_port(None)
+    assert port is not None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executor = PostgreSQLExecutor(
+            executable=executable,
+            host="127.0.0.1",
+            port=port,
+            datadir=str(Path(tmpdir) / "data"),
+            unixsocketdir=tmpdir,
+            logfile=str(Path(tmpdir) / "postgresql.log"),
+            startparams="-w",
+            dbname="bench",
+            profile=profile,
+        )
+        create_times: List[float] = []
+        drop_times: List[float] = []
+        with executor:
+            executor.wait_for_postgres()
+            with DatabaseJanitor(
+                user=executor.user,
+                host=executor.host,
+                port=executor.port,
+                template_dbname=executor.template_dbname,
+                version=executor.version,
+            ) as template_janitor:
+                load_template(template_janitor, tables, rows)
+                for _ in range(rounds):
+                    janitor = DatabaseJanitor(
+                        user=executor.user,
+                        host=executor.host,
+                        port=executor.port,
+                        dbname=executor.dbname,
+                        template_dbname=executor.template_dbname,
+                        version=executor.version,
+                    )
+                    start = time.perf_counter()
+                    janitor.init()
+                    create_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    janitor.drop()
+                    drop_times.append(time.perf_counter() - start)
+        return create_times, drop_times
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executable", default="/usr/lib/postgresql/16/bin/pg_ctl")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--profile", action="append", choices=list(PROFILES))
+    args = parser.parse_args()
+
+    results: Dict[str, Tuple[float, float]] = {}
+    for profile in args.profile or list(PROFILES):
+        create_times, drop_times = measure(
+            args.executable, profile, args.rounds, args.tables, args.rows
+        )
+        results[profile] = (statistics.median(create_times), statistics.median(drop_times))
+
+    baseline_create, baseline_drop = results.get("default", next(iter(results.values())))
+    print(f"{'profile':<12}{'create [ms]':>14}{'drop [ms]':>12}{'saved per test [ms]':>22}")
+    for profile, (create, drop) in results.items():
+        saved = (baseline_create + baseline_drop - create - drop) * 1000
+        print(f"{profile:<12}{create * 1000:>14.1f}{drop * 1000:>12.1f}{saved:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""On-disk cache of directories reused between test sessions."""
+
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+
+def cache_key(*parts: str) -> str:
+    """Build a content-addressed key out of given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def copy_tree(source: Union[str, Path], target: Union[str, Path]) -> None:
+    """Copy directory, cloning files where the filesystem allows it.
+
+    PostgreSQL modifies its data files in place, so they can't be shared
+    through hardlinks. Copy-on-write clones (reflinks) are used instead
+    on Linux, where ``cp`` falls back to a regular copy by itself
+    if the filesystem does not support them.
+    """
+    if platform.system() == "Linux":
+        try:
+            subprocess.check_output(
+                ["cp", "-a", "--reflink=auto", str(source), str(target)],
+                stderr=subprocess.STDOUT,
+            )
+            return
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            # no GNU cp, clean up partial copy and copy it by ourselves.
+            shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(source, target, symlinks=True)
+
+
+def directory_size(path: Union[str, Path]) -> int:
+    """Return size of all files within the directory in bytes."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            try:
+                size += os.lstat(os.path.join(root, filename)).st_size
+            except FileNotFoundError:
+                continue
+    return size
+
+
+class DirectoryCache:
+    """Store of directories addressed by key, limited in size.
+
+    Entries are written to a temporary directory first and renamed into place,
+    so concurrent test sessions (i.e. xdist workers) filling the same entry
+    never see it half-written. When the cache outgrows its size cap,
+    least recently used entries get evicted.
+    """
+
+    def __init__(self, path: Union[str, Path], max_size: int) -> None:
+        """Initialize directory cache.
+
+        :param path: directory to keep cached entries in
+        :param max_size: maximum size of all entries in megabytes
+        """
+        self.path = Path(path)
+        self.max_size = max_size * 1024 * 1024
+
+    def entry(self, key: str) -> Path:
+        """Return path to the cached entry."""
+        return self.path / key
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return path to the cached entry if it exists and mark it as recently used."""
+        entry = self.entry(key)
+        if not entry.is_dir():
+            return None
+        os.utime(entry)
+        return entry
+
+    def get(self, key: str, target: Union[str, Path]) -> bool:
+        """Copy cached entry into target directory if it exists.
+
+        :returns: whether the entry was found in cache.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return False
+        copy_tree(entry, target)
+        return True
+
+    def put(self, key: str, source: Union[str, Path]) -> None:
+        """Store copy of the source directory under key."""
+        if self.entry(key).is_dir():
+            return
+        with self.writing(key) as tmp_entry:
+            copy_tree(source, tmp_entry)
+
+    @contextmanager
+    def writing(self, key: str) -> Iterator[Path]:
+        """Yield a not yet existing path, that becomes the entry once written."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_entry = self.path / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        try:
+            yield tmp_entry
+        except BaseException:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            raise
+        try:
+            os.rename(tmp_entry, self.entry(key))
+        except OSError:
+            # Other process has stored the same entry in the meantime.
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        self.evict(keep=key)
+
+    def evict(self, keep: str = "") -> None:
+        """Remove least recently used entries above the size cap.
+
+        :param keep: key of an entry that should never be evicted
+        """
+        if not self.path.is_dir():
+            return
+        entries: List[Tuple[float, int, Path]] = []
+        total = 0
+        for entry in self.path.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            size = directory_size(entry)
+            total += size
+            entries.append((entry.stat().st_mtime, size, entry))
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
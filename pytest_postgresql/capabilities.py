@@ -0,0 +1,46 @@
+"""Features supported by the postgresql server, derived from its version."""
+
+from typing import Any
+
+from packaging.version import Version, parse
+
+
+class Capabilities:
+    """Record of server features pytest-postgresql makes use of.
+
+    Derived from the server version alone, so consulting it
+    takes no round trips to the server.
+    """
+
+    def __init__(self, version: Any) -> None:
+        """Initialize capabilities of the given server version."""
+        self.version: Version = version if isinstance(version, Version) else parse(str(version))
+
+    @property
+    def drop_force(self) -> bool:
+        """Whether DROP DATABASE supports WITH (FORCE) option."""
+        return self.version >= parse("13")
+
+    @property
+    def generated_columns(self) -> bool:
+        """Whether tables can have stored generated columns, marked in pg_attribute.attgenerated."""
+        return self.version >= parse("12")
+
+    @property
+    def create_strategy(self) -> bool:
+        """Whether CREATE DATABASE supports STRATEGY option."""
+        return self.version >= parse("15")
+
+    @property
+    def stat_statements_exec_time(self) -> bool:
+        """Whether pg_stat_statements reports execution time as total_exec_time."""
+        return self.version >= parse("13")
+
+    @property
+    def pg_stat_io(self) -> bool:
+        """Whether the pg_stat_io view is available."""
+        return self.version >= parse("16")
+
+    def __repr__(self) -> str:
+        """Return capabilities' representation."""
+        return f"{self.__class__.__name__}({str(self.version)!r})"
@@ -5,6 +5,9 @@ from typing import Any, List, Optional, TypedDict, Union
 
 from pytest import FixtureRequest
 
+from pytest_postgresql.loader import is_data_dir, is_dump
+from pytest_postgresql.sqlfile import is_sql_file
+
 
 class PostgresqlConfigDict(TypedDict):
     """Typed Config dictionary."""
@@ -22,6 +25,24 @@ class PostgresqlConfigDict(TypedDict):
     load: List[Union[Path, str]]
     postgres_options: str
     drop_test_database: bool
+    cache_dir: str
+    cache_max_size: int
+    template_cache: bool
+    reset: str
+    pool_size: int
+    create_strategy: str
+    async_drop: bool
+    reuse_clean: bool
+    profile: str
+    datadir_root: str
+    datadir_min_free: int
+    transport: str
+    xdist_shared: bool
+    query_stats: bool
+    max_repeats: int
+    plans: str
+    plans_update: bool
+    plans_large_table_rows: int
 
 
 def get_config(request: FixtureRequest) -> PostgresqlConfigDict:
@@ -47,14 +68,32 @@ def get_config(request: FixtureRequest) -> PostgresqlConfigDict:
         load=load_paths,
         postgres_options=get_postgresql_option("postgres_options"),
         drop_test_database=request.config.getoption("postgresql_drop_test_database"),
+        cache_dir=get_postgresql_option("cache_dir"),
+        cache_max_size=int(get_postgresql_option("cache_max_size")),
+        template_cache=get_postgresql_option("template_cache"),
+        reset=get_postgresql_option("reset"),
+        pool_size=int(get_postgresql_option("pool_size")),
+        create_strategy=get_postgresql_option("create_strategy"),
+        async_drop=get_postgresql_option("async_drop"),
+        reuse_clean=get_postgresql_option("reuse_clean"),
+        profile=get_postgresql_option("profile"),
+        datadir_root=get_postgresql_option("datadir_root"),
+        datadir_min_free=int(get_postgresql_option("datadir_min_free")),
+        transport=get_postgresql_option("transport"),
+        xdist_shared=get_postgresql_option("xdist_shared"),
+        query_stats=get_postgresql_option("query_stats"),
+        max_repeats=int(get_postgresql_option("max_repeats")),
+        plans=get_postgresql_option("plans"),
+        plans_update=get_postgresql_option("plans_update"),
+        plans_large_table_rows=int(get_postgresql_option("plans_large_table_rows")),
     )
 
 
 def detect_paths(load_paths: List[str]) -> List[Union[Path, str]]:
-    """Convert path to sql files to Path instances."""
+    """Convert path to sql files, dump archives and table data directories to Path instances."""
     converted_load_paths: List[Union[Path, str]] = []
     for path in load_paths:
-        if path.endswith(".sql"):
+        if is_sql_file(path) or is_dump(Path(path)) or is_data_dir(Path(path)):
             converted_load_paths.append(Path(path))
         else:
             converted_load_paths.append(path)
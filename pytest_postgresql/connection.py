@@ -0,0 +1,37 @@
+"""Connection classes used by the client fixtures."""
+
+from psycopg import Connection
+from psycopg.pq import TransactionStatus
+from psycopg.rows import Row
+
+
+class SavepointConnection(Connection[Row]):
+    """Connection that never leaves its outer transaction.
+
+    All work happens after a savepoint set up right after connecting.
+    Committing releases that savepoint and sets up a new one,
+    rolling back rolls back to it, so the outer transaction
+    can still roll everything back at the end of the test.
+    """
+
+    SAVEPOINT = "pytest_postgresql"
+
+    def begin(self) -> None:
+        """Start the outer transaction and the first savepoint."""
+        self.execute(f"SAVEPOINT {self.SAVEPOINT}")
+
+    def commit(self) -> None:
+        """Release the savepoint, keeping the outer transaction open."""
+        if self.info.transaction_status == TransactionStatus.INERROR:
+            # same as regular commit of failed transaction, which rolls it back
+            self.rollback()
+            return
+        self.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}; SAVEPOINT {self.SAVEPOINT}")
+
+    def rollback(self) -> None:
+        """Roll back to the savepoint, keeping the outer transaction open."""
+        self.execute(f"ROLLBACK TO SAVEPOINT {self.SAVEPOINT}")
+
+    def rollback_all(self) -> None:
+        """Roll back the outer transaction, with everything done on this connection."""
+        super().rollback()
@@ -0,0 +1,78 @@
+"""Data directories placed in memory backed filesystems, i.e. /dev/shm."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Optional, Union
+
+PREFIX = "pytest-postgresql-"
+
+
+def pid_alive(pid: int) -> bool:
+    """Check whether process with the pid is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _owner_pid(path: Path) -> Optional[int]:
+    """Return pid of the process that created the data directory, from its name."""
+    try:
+        return int(path.name[len(PREFIX) :].split("-")[0])
+    except ValueError:
+        return None
+
+
+def remove_stale(root: Union[str, Path], executable: str) -> None:
+    """Remove data directories left behind by test sessions that did not finish.
+
+    Servers still running in these directories get stopped first.
+
+    :param root: directory data directories get created in
+    :param executable: pg_ctl location
+    """
+    for path in Path(root).glob(f"{PREFIX}*"):
+        owner = _owner_pid(path)
+        if owner is None or pid_alive(owner) or not path.is_dir():
+            continue
+        if (path / "postmaster.pid").exists():
+            subprocess.run(
+                [executable, "stop", "-D", str(path), "-m", "immediate"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def make_datadir(root: Union[str, Path], port: Union[str, int], min_free: int) -> Optional[Path]:
+    """Create data directory under root, if there's enough free space there.
+
+    Directory's name holds pid of the current process and the port, followed by a unique
+    suffix, so that directories left behind after a crash can be told apart,
+    and servers sharing the port number (i.e. listening only on unix sockets) don't clash.
+
+    :param root: directory to create data directory in, i.e. /dev/shm
+    :param port: port of the server
+    :param min_free: megabytes that have to be free in the root directory
+    :returns: created directory, or None when it can't be used.
+    """
+    try:
+        free = shutil.disk_usage(root).free
+    except OSError as exc:
+        warnings.warn(f"Cannot use {root} for postgresql data directory: {exc}. Using disk.")
+        return None
+    if free < min_free * 1024 * 1024:
+        warnings.warn(
+            f"Only {free // (1024 * 1024)} MB free in {root}, "
+            f"{min_free} MB required for postgresql data directory. Using disk."
+        )
+        return None
+    return Path(tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}-{port}-", dir=root))
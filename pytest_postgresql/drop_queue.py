@@ -0,0 +1,72 @@
+"""Dropping test databases in the background."""
+
+from queue import Empty, Queue
+from threading import Event, Thread
+from typing import List, Optional
+
+from pytest_postgresql import stats
+from pytest_postgresql.janitor import DatabaseJanitor
+
+
+class DropQueue:
+    """Databases dropped by a background thread, off the tests' critical path.
+
+    Databases queued while the previous ones were being dropped,
+    get dropped together in one batch, over a single connection.
+    """
+
+    def __init__(self) -> None:
+        """Initialize drop queue."""
+        self._queue: "Queue[DatabaseJanitor]" = Queue()
+        self._stop = Event()
+        self._error: Optional[Exception] = None
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """Start dropping queued databases in the background."""
+        self._thread = Thread(target=self._drain, name="pytest-postgresql-drop-queue")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, janitor: DatabaseJanitor) -> None:
+        """Queue janitor's database to be dropped."""
+        self._raise_error()
+        self._queue.put(janitor)
+
+    def _drain(self) -> None:
+        """Drop queued databases in batches, until stopped."""
+        while True:
+            try:
+                batch: List[DatabaseJanitor] = [self._queue.get(timeout=0.1)]
+            except Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                with batch[0].cursor() as cur:
+                    for janitor in batch:
+                        janitor.drop_using(cur)
+                stats.incr("databases dropped in background", len(batch))
+            except Exception as exc:
+                self._error = exc
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """Raise error that occurred in the background."""
+        if self._error is not None:
+            raise RuntimeError("Dropping database in the background failed.") from self._error
+
+    def close(self) -> None:
+        """Wait until all queued databases are dropped, and stop the background thread."""
+        self._queue.join()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._raise_error()
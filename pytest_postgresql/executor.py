@@ -17,20 +17,28 @@
 # along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
 """PostgreSQL executor crafter around pg_ctl."""
 
+import hashlib
 import os.path
 import platform
 import re
 import shutil
+import socket
 import subprocess
 import tempfile
+import threading
 import time
-from typing import Any, Optional, TypeVar
+from typing import Any, Dict, Optional, Tuple, TypeVar
 
 from mirakuru import TCPExecutor
 from mirakuru.exceptions import ProcessFinishedWithError
 from packaging.version import parse
 
+from pytest_postgresql import stats
+from pytest_postgresql.cache import DirectoryCache, cache_key
+from pytest_postgresql.capabilities import Capabilities
 from pytest_postgresql.exceptions import ExecutableMissingException, PostgreSQLUnsupported
+from pytest_postgresql.profiles import profile_options
+from pytest_postgresql.query_stats import server_options as query_stats_options
 
 _LOCALE = "C.UTF-8"
 
@@ -40,6 +48,52 @@ if platform.system() == "Darwin":
 
 T = TypeVar("T", bound="PostgreSQLExecutor")
 
+TRANSPORTS = ("auto", "tcp", "unixsocket")
+
+VERSION_RE = re.compile(r".* (?P<version>\d+(?:\.\d+)?)")
+
+_versions_lock = threading.Lock()
+_versions: Dict[Tuple[str, float], Any] = {}
+
+
+def detect_version(executable: str, cache: Optional[DirectoryCache] = None) -> Any:
+    """Detect postgresql version of the pg_ctl executable.
+
+    Version gets memoized per executable's path and modification time,
+    and when cache is given, persisted in it for the next test sessions.
+
+    :param executable: pg_ctl location
+    :param cache: optional cache to persist detected version in
+    """
+    try:
+        path = shutil.which(executable) or executable
+        key = (os.path.realpath(path), os.stat(path).st_mtime)
+    except FileNotFoundError as ex:
+        raise ExecutableMissingException(
+            f"Could not found {executable}. Is PostgreSQL server installed? "
+            f"Alternatively pg_config installed might be from different "
+            f"version that postgresql-server."
+        ) from ex
+    with _versions_lock:
+        if key in _versions:
+            return _versions[key]
+    entry_key = cache_key("version", *map(str, key))
+    entry = cache.lookup(entry_key) if cache is not None else None
+    if entry is not None:
+        version_string = (entry / "version").read_text()
+    else:
+        version_string = subprocess.check_output([executable, "--version"]).decode("utf-8")
+        if cache is not None:
+            with cache.writing(entry_key) as new_entry:
+                new_entry.mkdir()
+                (new_entry / "version").write_text(version_string)
+    matches = VERSION_RE.search(version_string)
+    assert matches is not None
+    version = parse(matches.groupdict()["version"])
+    with _versions_lock:
+        _versions[key] = version
+    return version
+
 
 class PostgreSQLExecutor(TCPExecutor):
     """PostgreSQL executor running on pg_ctl.
@@ -56,8 +110,9 @@ class PostgreSQLExecutor(TCPExecutor):
         '-l "{logfile}" {startparams}'
     )
 
-    VERSION_RE = re.compile(r".* (?P<version>\d+(?:\.\d+)?)")
+    VERSION_RE = VERSION_RE
     MIN_SUPPORTED_VERSION = parse("10")
+    LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
 
     def __init__(
         self,
@@ -76,6 +131,12 @@ class PostgreSQLExecutor(TCPExecutor):
         password: str = "",
         options: str = "",
         postgres_options: str = "",
+        initdb_cache: Optional[DirectoryCache] = None,
+        profile: str = "default",
+        transport: str = "auto",
+        template_dbname: Optional[str] = None,
+        query_stats: bool = False,
+        track_changes: bool = False,
     ):
         """Initialize PostgreSQLExecutor executor.
 
@@ -96,18 +157,48 @@ class PostgreSQLExecutor(TCPExecutor):
         :param dbname: database name (might not yet exist)
         :param options:
         :param postgres_options: extra arguments to `postgres start`
+        :param initdb_cache: optional cache of pristine data directories,
+            used instead of running initdb each time
+        :param profile: name of the server settings' profile,
+            applied before postgres_options
+        :param transport: how clients connect to the server.
+            auto - through unix socket when host is local, over TCP otherwise,
+            tcp - always over TCP,
+            unixsocket - through unix socket only, server does not listen on TCP at all
+        :param template_dbname: template database name, defaults to dbname with _tmpl suffix
+        :param query_stats: whether to load pg_stat_statements,
+            applied before profile and postgres_options
+        :param track_changes: whether the template database has triggers logging changes,
+            telling which test databases were left clean
         """
         self._directory_initialised = False
         self.executable = executable
         self.user = user
         self.password = password
         self.dbname = dbname
+        self._template_dbname = template_dbname
         self.options = options
         self.datadir = datadir
         self.unixsocketdir = unixsocketdir
         self.logfile = logfile
         self.startparams = startparams
+        self.profile = profile
+        if profile != "default":
+            version = detect_version(executable, initdb_cache)
+            postgres_options = " ".join(
+                filter(None, (profile_options(profile, version), postgres_options))
+            )
+        self.query_stats = query_stats
+        self.track_changes = track_changes
+        if query_stats:
+            postgres_options = query_stats_options(postgres_options)
+        self.transport = transport
+        if transport == "unixsocket":
+            postgres_options = " ".join(filter(None, ("-c listen_addresses=''", postgres_options)))
         self.postgres_options = postgres_options
+        self.initdb_cache = initdb_cache
+        self.startup_time: Optional[float] = None
+        self._start_requested = time.monotonic()
         command = self.BASE_PROC_START_COMMAND.format(
             executable=self.executable,
             datadir=self.datadir,
@@ -134,7 +225,39 @@ class PostgreSQLExecutor(TCPExecutor):
     @property
     def template_dbname(self) -> str:
         """Return the template database name."""
-        return f"{self.dbname}_tmpl"
+        return self._template_dbname or f"{self.dbname}_tmpl"
+
+    @property
+    def connection_host(self) -> str:
+        """Return host clients should connect to: socket directory or TCP host."""
+        if self.transport == "unixsocket" or (
+            self.transport == "auto" and self.host in self.LOCAL_HOSTS
+        ):
+            return self.unixsocketdir
+        return self.host
+
+    def _socket_accepts(self) -> bool:
+        """Check whether server accepts connections on its unix socket."""
+        sock = socket.socket(socket.AF_UNIX)
+        try:
+            sock.connect(os.path.join(self.unixsocketdir, f".s.PGSQL.{self.port}"))
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def pre_start_check(self) -> bool:
+        """Check whether the server is already running."""
+        if self.transport == "unixsocket":
+            return self._socket_accepts()
+        return super().pre_start_check()
+
+    def after_start_check(self) -> bool:
+        """Check whether the server accepts connections."""
+        if self.transport == "unixsocket":
+            return self._socket_accepts()
+        return super().after_start_check()
 
     def start(self: T) -> T:
         """Add check for postgresql version before starting process."""
@@ -145,6 +268,7 @@ class PostgreSQLExecutor(TCPExecutor):
                 f"The currently installed version of PostgreSQL: {self.version}."
             )
         self.init_directory()
+        self._start_requested = time.monotonic()
         return super().start()
 
     def clean_directory(self) -> None:
@@ -164,6 +288,32 @@ class PostgreSQLExecutor(TCPExecutor):
             return
         # remove old one if exists first.
         self.clean_directory()
+        if self.initdb_cache is not None:
+            key = self._initdb_cache_key()
+            start = time.perf_counter()
+            if self.initdb_cache.get(key, self.datadir):
+                stats.record("initdb cache restore", time.perf_counter() - start)
+                self._directory_initialised = True
+                return
+        with stats.timer("initdb"):
+            self._initdb()
+        if self.initdb_cache is not None:
+            self.initdb_cache.put(key, self.datadir)
+        self._directory_initialised = True
+
+    def _initdb_cache_key(self) -> str:
+        """Build cache key from everything initdb's result depends on."""
+        return cache_key(
+            "initdb",
+            str(self.version),
+            self.user,
+            "password" if self.password else "trust",
+            _LOCALE,
+            hashlib.sha256(str(self.password).encode("utf-8")).hexdigest(),
+        )
+
+    def _initdb(self) -> None:
+        """Run initdb on the data directory."""
         init_directory = [self.executable, "initdb", "--pgdata", self.datadir]
         options = ["--username=%s" % self.user]
 
@@ -185,32 +335,53 @@ class PostgreSQLExecutor(TCPExecutor):
             # Passing envvars to command to avoid weird MacOs error.
             subprocess.check_output(init_directory, env=self.envvars)
 
-        self._directory_initialised = True
-
     def wait_for_postgres(self) -> None:
-        """Wait for postgresql being started."""
+        """Wait for postgresql being started.
+
+        Polls server's postmaster.pid file for the ready status,
+        with delays growing exponentially from 10 ms.
+        Time spent since the server's start was requested is stored in startup_time.
+        """
         if "-w" not in self.startparams:
             return
         # wait until server is running
-        while 1:
-            if self.running():
-                break
-            time.sleep(1)
+        delay = 0.01
+        deadline = time.monotonic() + (self._timeout or float("inf"))
+        while not self.postmaster_ready():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"PostgreSQL did not start within {self._timeout} seconds.")
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
+        self.startup_time = time.monotonic() - self._start_requested
+        stats.record("server start", self.startup_time)
+
+    def postmaster_ready(self) -> bool:
+        """Check whether postmaster.pid reports running server as ready for connections."""
+        try:
+            with open(os.path.join(self.datadir, "postmaster.pid")) as pid_file:
+                lines = pid_file.read().splitlines()
+        except FileNotFoundError:
+            return False
+        if len(lines) < 8 or lines[7].strip() not in ("ready", "standby"):
+            return False
+        try:
+            # stale file, left behind by a killed server
+            os.kill(int(lines[0]), 0)
+        except (ValueError, ProcessLookupError):
+            return False
+        except PermissionError:
+            pass
+        return True
 
     @property
     def version(self) -> Any:
         """Detect postgresql version."""
-        try:
-            version_string = subprocess.check_output([self.executable, "--version"]).decode("utf-8")
-        except FileNotFoundError as ex:
-            raise ExecutableMissingException(
-                f"Could not found {self.executable}. Is PostgreSQL server installed? "
-                f"Alternatively pg_config installed might be from different "
-                f"version that postgresql-server."
-            ) from ex
-        matches = self.VERSION_RE.search(version_string)
-        assert matches is not None
-        return parse(matches.groupdict()["version"])
+        return detect_version(self.executable, self.initdb_cache)
+
+    @property
+    def capabilities(self) -> Capabilities:
+        """Return features supported by the postgresql server."""
+        return Capabilities(self.version)
 
     def running(self) -> bool:
         """Check if server is running."""
@@ -221,20 +392,33 @@ class PostgreSQLExecutor(TCPExecutor):
 
     def stop(self: T, sig: Optional[int] = None, exp_sig: Optional[int] = None) -> T:
         """Issue a stop request to executable."""
-        subprocess.check_output(
-            f'{self.executable} stop -D "{self.datadir}" -m f',
-            shell=True,
-        )
-        try:
-            super().stop(sig, exp_sig)
-        except ProcessFinishedWithError:
-            # Finished, leftovers ought to be cleaned afterwards anyway
-            pass
+        with stats.timer("server stop"):
+            subprocess.check_output(
+                f'{self.executable} stop -D "{self.datadir}" -m f',
+                shell=True,
+            )
+            try:
+                super().stop(sig, exp_sig)
+            except ProcessFinishedWithError:
+                # Finished, leftovers ought to be cleaned afterwards anyway
+                pass
         return self
 
+    def detach(self) -> None:
+        """Leave the started server running, for other process to stop it.
+
+        Executor no longer owns the server, nor its data directory.
+        """
+        if self.process is not None:
+            # pg_ctl exits once it starts the server
+            self.process.wait()
+            self._clear_process()
+        self._directory_initialised = False
+
     def __del__(self) -> None:
         """Make sure the directories are properly removed at the end."""
         try:
             super().__del__()
         finally:
-            self.clean_directory()
+            if self._directory_initialised:
+                self.clean_directory()
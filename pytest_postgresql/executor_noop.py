@@ -21,6 +21,8 @@ from typing import Any, Optional, Union
 import psycopg
 from packaging.version import parse
 
+from pytest_postgresql.capabilities import Capabilities
+
 
 class NoopExecutor:
     """Nooperator executor.
@@ -38,6 +40,7 @@ class NoopExecutor:
         options: str,
         dbname: str,
         password: Optional[str] = None,
+        track_changes: bool = False,
     ):
         """Initialize nooperator executor mock.
 
@@ -47,6 +50,8 @@ class NoopExecutor:
         :param options: Additional connection options
         :param password: postgresql password
         :param dbname: postgresql database name
+        :param track_changes: whether the template database has triggers logging changes,
+            telling which test databases were left clean
         """
         self.host = host
         self.port = int(port)
@@ -55,12 +60,19 @@ class NoopExecutor:
         self.password = password
         self.dbname = dbname
         self._version: Any = None
+        self.query_stats = False
+        self.track_changes = track_changes
 
     @property
     def template_dbname(self) -> str:
         """Return the template database name."""
         return f"{self.dbname}_tmpl"
 
+    @property
+    def connection_host(self) -> str:
+        """Return host clients should connect to."""
+        return self.host
+
     @property
     def version(self) -> Any:
         """Get postgresql's version."""
@@ -91,3 +103,8 @@ class NoopExecutor:
                     version_parts.append(part)
                 self._version = parse(".".join(version_parts[:2]))
         return self._version
+
+    @property
+    def capabilities(self) -> Capabilities:
+        """Return features supported by the postgresql server."""
+        return Capabilities(self.version)
@@ -18,7 +18,16 @@
 """Fixture factories for postgresql fixtures."""
 
 from pytest_postgresql.factories.client import postgresql
+from pytest_postgresql.factories.client_async import postgresql_async
 from pytest_postgresql.factories.noprocess import postgresql_noproc
 from pytest_postgresql.factories.process import PortType, postgresql_proc
+from pytest_postgresql.factories.queries import query_counter
 
-__all__ = ("postgresql_proc", "postgresql_noproc", "postgresql", "PortType")
+__all__ = (
+    "postgresql_proc",
+    "postgresql_noproc",
+    "postgresql",
+    "postgresql_async",
+    "query_counter",
+    "PortType",
+)
@@ -16,23 +16,81 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
 """Fixture factory for postgresql client."""
-from typing import Callable, Iterator, Optional, Union
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple, TypeVar, Union
 
 import psycopg
 import pytest
 from psycopg import Connection
 from pytest import FixtureRequest
 
+from pytest_postgresql import plans, query_stats, stats, tracking
 from pytest_postgresql.config import get_config
+from pytest_postgresql.connection import SavepointConnection
+from pytest_postgresql.drop_queue import DropQueue
 from pytest_postgresql.executor import PostgreSQLExecutor
 from pytest_postgresql.executor_noop import NoopExecutor
 from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.pool import DatabasePool, unique_dbname
+from pytest_postgresql.truncate import TruncateReset
+
+RESET_MODES = ("drop", "transaction", "truncate")
+
+T = TypeVar("T")
+
+
+def _session_resource(
+    request: FixtureRequest,
+    resources: Dict[str, Any],
+    key: str,
+    create: Callable[[], T],
+    close: Callable[[T], None],
+) -> T:
+    """Return resource shared by client fixture's tests, creating it on first use.
+
+    Resource gets closed at the end of the session. Session finalizers run in reverse order,
+    so it happens before the process fixture, set up earlier, shuts down the server.
+    """
+    if key not in resources:
+        resources[key] = create()
+
+        def finalize() -> None:
+            # resource might have been closed already, to be created again
+            if key in resources:
+                close(resources.pop(key))
+
+        request.session.addfinalizer(finalize)
+    resource: T = resources[key]
+    return resource
+
+
+def _left_clean(connection: Connection, janitor: DatabaseJanitor) -> bool:
+    """Check whether the test left its database unchanged.
+
+    Test's uncommitted changes get rolled back first, as closing the connection would.
+    Connection closed by the test gets replaced with a new one.
+    """
+    assert janitor.dbname
+    try:
+        if connection.closed or connection.broken:
+            with janitor.cursor(janitor.dbname) as cur:
+                return tracking.is_clean(cur)
+        connection.rollback()
+        with connection.cursor() as cur:
+            return tracking.is_clean(cur)
+    except psycopg.Error:
+        return False
 
 
 def postgresql(
     process_fixture_name: str,
     dbname: Optional[str] = None,
     isolation_level: "Optional[psycopg.IsolationLevel]" = None,
+    reset: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    async_drop: Optional[bool] = None,
+    create_strategy: Optional[str] = None,
+    reuse_clean: Optional[bool] = None,
 ) -> Callable[[FixtureRequest], Iterator[Connection]]:
     """Return connection fixture factory for PostgreSQL.
 
@@ -40,8 +98,32 @@ def postgresql(
     :param dbname: database name
     :param isolation_level: optional postgresql isolation level
                             defaults to server's default
+    :param reset: how to bring the database back to the template's state after each test:
+
+        * drop - drop the database and create it again from template for each test
+        * transaction - create the database once, and run each test in a transaction
+          that's rolled back afterwards
+        * truncate - create the database once, and after each test truncate tables it changed,
+          restoring their rows from copies taken when the database was created
+    :param pool_size: number of databases created from template ahead of time,
+        in the background, for the drop reset mode
+    :param async_drop: whether to drop databases in the background, for the drop reset mode.
+        Databases get unique names for each test then.
+    :param create_strategy: strategy of cloning the template database on PostgreSQL 15 and newer:
+        wal_log, file_copy, or auto - file_copy for large templates, wal_log for small ones
+    :param reuse_clean: whether to hand the database over to the next test,
+        instead of recreating it, when the test did not change anything, for the drop reset mode
     :returns: function which makes a connection to postgresql
     """
+    # Objects shared by the tests, closed at the end of the session.
+    shared_databases: Dict[str, DatabaseJanitor] = {}
+    truncated_databases: Dict[str, TruncateReset] = {}
+    # test database name: janitor of a database left clean by the previous test,
+    # and how to get rid of it once it's not clean anymore
+    clean_databases: Dict[str, Tuple[DatabaseJanitor, Callable[[DatabaseJanitor], None]]] = {}
+    kept_databases: Set[str] = set()
+    pools: Dict[str, DatabasePool] = {}
+    drop_queues: Dict[str, DropQueue] = {}
 
     @pytest.fixture
     def postgresql_factory(request: FixtureRequest) -> Iterator[Connection]:
@@ -50,39 +132,226 @@ def postgresql(
         :param request: fixture request object
         :returns: postgresql client
         """
+        connections = postgresql_connection(request)
+        proc_fixture: Union[PostgreSQLExecutor, NoopExecutor] = request.getfixturevalue(
+            process_fixture_name
+        )
+        config = get_config(request)
+        if config["plans"] not in plans.PLAN_MODES:
+            raise pytest.UsageError(
+                f"Unknown postgresql plans mode {config['plans']}. "
+                f"Use one of: {', '.join(plans.PLAN_MODES)}."
+            )
+        if config["plans"] != "off" or config["plans_update"]:
+            connections = plans.tracked_fixture(
+                connections,
+                config["plans"],
+                config["plans_update"],
+                config["plans_large_table_rows"],
+                plans.baseline_path(Path(str(request.node.fspath)), request.node.name),
+            )
+        if proc_fixture.query_stats:
+            maintenance_janitor = DatabaseJanitor(
+                user=proc_fixture.user,
+                host=proc_fixture.connection_host,
+                port=proc_fixture.port,
+                dbname=proc_fixture.dbname,
+                version=proc_fixture.version,
+                password=proc_fixture.password,
+            )
+            connections = query_stats.tracked_fixture(
+                connections, maintenance_janitor, request.node.nodeid
+            )
+        yield from stats.timed_fixture(connections, request.node.nodeid)
+
+    def postgresql_connection(request: FixtureRequest) -> Iterator[Connection]:
+        """Set up the test's database and connect to it, cleaning up after the test."""
         proc_fixture: Union[PostgreSQLExecutor, NoopExecutor] = request.getfixturevalue(
             process_fixture_name
         )
         config = get_config(request)
+        pg_reset = reset or config["reset"]
+        if pg_reset not in RESET_MODES:
+            raise pytest.UsageError(
+                f"Unknown postgresql reset mode {pg_reset}. Use one of: {', '.join(RESET_MODES)}."
+            )
+        pg_reuse_clean = config["reuse_clean"] if reuse_clean is None else reuse_clean
+        if request.node.get_closest_marker("postgresql_fresh_database"):
+            pg_reset = "drop"
+            pg_reuse_clean = False
+        pg_pool_size = config["pool_size"] if pool_size is None else pool_size
+        pg_async_drop = config["async_drop"] if async_drop is None else async_drop
+        pg_create_strategy = create_strategy or config["create_strategy"]
 
-        pg_host = proc_fixture.host
+        pg_host = proc_fixture.connection_host
         pg_port = proc_fixture.port
         pg_user = proc_fixture.user
         pg_password = proc_fixture.password
         pg_options = proc_fixture.options
         pg_db = dbname or proc_fixture.dbname
-        janitor = DatabaseJanitor(
-            user=pg_user,
-            host=pg_host,
-            port=pg_port,
-            dbname=pg_db,
-            template_dbname=proc_fixture.template_dbname,
-            version=proc_fixture.version,
-            password=pg_password,
-            isolation_level=isolation_level,
-        )
-        if config["drop_test_database"]:
-            janitor.drop()
-        with janitor:
-            db_connection: Connection = psycopg.connect(
-                dbname=pg_db,
+
+        def janitor(janitor_dbname: str) -> DatabaseJanitor:
+            return DatabaseJanitor(
+                user=pg_user,
+                host=pg_host,
+                port=pg_port,
+                dbname=janitor_dbname,
+                template_dbname=proc_fixture.template_dbname,
+                version=proc_fixture.version,
+                password=pg_password,
+                isolation_level=isolation_level,
+                create_strategy=pg_create_strategy,
+            )
+
+        def connect(connection_class: Any = Connection, **kwargs: Any) -> Any:
+            return connection_class.connect(
                 user=pg_user,
                 password=pg_password,
                 host=pg_host,
                 port=pg_port,
                 options=pg_options,
+                **kwargs,
+            )
+
+        if pg_reset == "transaction":
+
+            def create_shared_database() -> DatabaseJanitor:
+                shared_janitor = janitor(pg_db)
+                if config["drop_test_database"]:
+                    shared_janitor.drop()
+                shared_janitor.init()
+                return shared_janitor
+
+            _session_resource(
+                request, shared_databases, pg_db, create_shared_database, DatabaseJanitor.drop
             )
+            transaction_connection: SavepointConnection = connect(SavepointConnection, dbname=pg_db)
+            transaction_connection.begin()
+            yield transaction_connection
+            if not transaction_connection.closed:
+                transaction_connection.rollback_all()
+            transaction_connection.close()
+            return
+
+        if pg_reset == "truncate":
+
+            def create_truncated_database() -> TruncateReset:
+                shared_janitor = janitor(pg_db)
+                if config["drop_test_database"]:
+                    shared_janitor.drop()
+                shared_janitor.init()
+                truncate_reset = TruncateReset(
+                    connect(dbname=pg_db, autocommit=True), shared_janitor.capabilities
+                )
+                truncate_reset.setup()
+                return truncate_reset
+
+            def close_truncated_database(truncate_reset: TruncateReset) -> None:
+                truncate_reset.close()
+                janitor(pg_db).drop()
+
+            truncate_reset = _session_resource(
+                request,
+                truncated_databases,
+                pg_db,
+                create_truncated_database,
+                close_truncated_database,
+            )
+            truncated_connection: Connection = connect(dbname=pg_db)
+            yield truncated_connection
+            truncated_connection.close()
+            if not truncate_reset.reset():
+                # schema changed by the test can't be restored, database gets created again
+                close_truncated_database(truncated_databases.pop(pg_db))
+            return
+
+        clean_key = pg_db
+
+        def use_database(
+            db_janitor: DatabaseJanitor, dispose: Callable[[DatabaseJanitor], None]
+        ) -> Iterator[Connection]:
+            """Connect to the test's database, keeping it for the next test if left clean."""
+            assert db_janitor.dbname
+            db_connection: Connection = connect(dbname=db_janitor.dbname)
             yield db_connection
+            clean = pg_reuse_clean and _left_clean(db_connection, db_janitor)
             db_connection.close()
+            if not clean:
+                dispose(db_janitor)
+                return
+            if clean_key not in kept_databases:
+                kept_databases.add(clean_key)
+
+                def finalize() -> None:
+                    if clean_key in clean_databases:
+                        kept_janitor, kept_dispose = clean_databases.pop(clean_key)
+                        kept_dispose(kept_janitor)
+
+                # registered after the pool and drop queue, so it runs before they're closed
+                request.session.addfinalizer(finalize)
+            clean_databases[clean_key] = (db_janitor, dispose)
+
+        if pg_reuse_clean:
+            if not proc_fixture.track_changes:
+                raise pytest.UsageError(
+                    f"Reusing clean databases requires {process_fixture_name} "
+                    "to track changes in its template database. Pass reuse_clean=True to it."
+                )
+            kept = clean_databases.pop(clean_key, None)
+            if kept is not None:
+                stats.incr("clean databases reused")
+                yield from use_database(*kept)
+                return
+            stats.incr("clean databases missed")
+
+        drop_queue: Optional[DropQueue] = None
+        if pg_async_drop:
+
+            def create_drop_queue() -> DropQueue:
+                queue = DropQueue()
+                queue.start()
+                return queue
+
+            drop_queue = _session_resource(
+                request, drop_queues, pg_db, create_drop_queue, DropQueue.close
+            )
+
+        if pg_pool_size > 0:
+
+            def create_pool() -> DatabasePool:
+                pool = DatabasePool(
+                    size=pg_pool_size,
+                    user=pg_user,
+                    host=pg_host,
+                    port=pg_port,
+                    version=proc_fixture.version,
+                    dbname=pg_db,
+                    template_dbname=proc_fixture.template_dbname,
+                    password=pg_password,
+                    isolation_level=isolation_level,
+                    drop_queue=drop_queue,
+                    create_strategy=pg_create_strategy,
+                )
+                pool.start()
+                return pool
+
+            pool = _session_resource(request, pools, pg_db, create_pool, DatabasePool.close)
+            yield from use_database(pool.acquire(), pool.release)
+            return
+
+        if drop_queue is not None:
+            queued_janitor = janitor(unique_dbname(pg_db))
+            queued_janitor.init()
+            yield from use_database(queued_janitor, drop_queue.put)
+            return
+
+        if pg_db in shared_databases or pg_db in truncated_databases or pg_db in clean_databases:
+            # shared database is in the way, use another name
+            pg_db = f"{pg_db}_fresh"
+        db_janitor = janitor(pg_db)
+        if config["drop_test_database"]:
+            db_janitor.drop()
+        db_janitor.init()
+        yield from use_database(db_janitor, DatabaseJanitor.drop)
 
     return postgresql_factory
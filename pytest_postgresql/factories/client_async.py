@@ -0,0 +1,105 @@
+# Copyright (C) 2013-2021 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-postgresql.
+
+# pytest-postgresql is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-postgresql is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
+"""Fixture factory for asynchronous postgresql client."""
+from typing import AsyncIterator, Callable, Optional, Union
+
+import psycopg
+from psycopg import AsyncConnection
+from pytest import FixtureRequest
+
+from pytest_postgresql import stats
+from pytest_postgresql.config import get_config
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.executor_noop import NoopExecutor
+from pytest_postgresql.janitor import AsyncDatabaseJanitor
+
+
+def postgresql_async(
+    process_fixture_name: str,
+    dbname: Optional[str] = None,
+    isolation_level: "Optional[psycopg.IsolationLevel]" = None,
+    create_strategy: Optional[str] = None,
+) -> Callable[[FixtureRequest], AsyncIterator[AsyncConnection]]:
+    """Return asynchronous connection fixture factory for PostgreSQL.
+
+    Requires pytest-asyncio.
+
+    :param process_fixture_name: name of the process fixture
+    :param dbname: database name
+    :param isolation_level: optional postgresql isolation level
+                            defaults to server's default
+    :param create_strategy: strategy of cloning the template database on PostgreSQL 15 and newer:
+        wal_log, file_copy, or auto - file_copy for large templates, wal_log for small ones
+    :returns: function which makes an asynchronous connection to postgresql
+    """
+    try:
+        import pytest_asyncio
+    except ImportError as ex:
+        raise ImportError(
+            "Asynchronous postgresql fixtures require pytest-asyncio to be installed."
+        ) from ex
+
+    @pytest_asyncio.fixture
+    async def postgresql_async_factory(
+        request: FixtureRequest,
+    ) -> AsyncIterator[AsyncConnection]:
+        """Asynchronous fixture factory for PostgreSQL.
+
+        :param request: fixture request object
+        :returns: asynchronous postgresql client
+        """
+        connections = postgresql_async_connection(request)
+        async for connection in stats.timed_async_fixture(connections, request.node.nodeid):
+            yield connection
+
+    async def postgresql_async_connection(
+        request: FixtureRequest,
+    ) -> AsyncIterator[AsyncConnection]:
+        """Set up the test's database and connect to it, cleaning up after the test."""
+        proc_fixture: Union[PostgreSQLExecutor, NoopExecutor] = request.getfixturevalue(
+            process_fixture_name
+        )
+        config = get_config(request)
+
+        pg_db = dbname or proc_fixture.dbname
+        janitor = AsyncDatabaseJanitor(
+            user=proc_fixture.user,
+            host=proc_fixture.connection_host,
+            port=proc_fixture.port,
+            dbname=pg_db,
+            template_dbname=proc_fixture.template_dbname,
+            version=proc_fixture.version,
+            password=proc_fixture.password,
+            isolation_level=isolation_level,
+            create_strategy=create_strategy or config["create_strategy"],
+        )
+        if config["drop_test_database"]:
+            await janitor.drop()
+        async with janitor:
+            db_connection = await AsyncConnection.connect(
+                dbname=pg_db,
+                user=proc_fixture.user,
+                password=proc_fixture.password,
+                host=proc_fixture.connection_host,
+                port=proc_fixture.port,
+                options=proc_fixture.options,
+            )
+            yield db_connection
+            await db_connection.close()
+
+    return postgresql_async_factory
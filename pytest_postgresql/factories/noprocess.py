@@ -17,7 +17,6 @@
 # along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
 """Fixture factory for existing postgresql server."""
 import os
-from pathlib import Path
 from typing import Callable, Iterator, List, Optional, Union
 
 import pytest
@@ -25,7 +24,9 @@ from pytest import FixtureRequest
 
 from pytest_postgresql.config import get_config
 from pytest_postgresql.executor_noop import NoopExecutor
-from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.janitor import DatabaseJanitor, close_maintenance_connections
+from pytest_postgresql.loader import LoadStep
+from pytest_postgresql.tracking import install_template
 
 
 def xdistify_dbname(dbname: str) -> str:
@@ -43,7 +44,8 @@ def postgresql_noproc(
     password: Optional[str] = None,
     dbname: Optional[str] = None,
     options: str = "",
-    load: Optional[List[Union[Callable, str, Path]]] = None,
+    load: Optional[List[LoadStep]] = None,
+    reuse_clean: Optional[bool] = None,
 ) -> Callable[[FixtureRequest], Iterator[NoopExecutor]]:
     """Postgresql noprocess factory.
 
@@ -54,6 +56,9 @@ def postgresql_noproc(
     :param dbname: postgresql database name
     :param options: Postgresql connection options
     :param load: List of functions used to initialize database's template.
+        Tuples of them are loaded concurrently, lists inside tuples one after another.
+    :param reuse_clean: whether to install triggers logging changes in the template database,
+        for client fixtures reusing databases left clean by the tests
     :returns: function which makes a postgresql process
     """
 
@@ -72,6 +77,7 @@ def postgresql_noproc(
         pg_dbname = xdistify_dbname(dbname or config["dbname"])
         pg_options = options or config["options"]
         pg_load = load or config["load"]
+        pg_reuse_clean = reuse_clean if reuse_clean is not None else config["reuse_clean"]
         drop_test_database = config["drop_test_database"]
 
         noop_exec = NoopExecutor(
@@ -81,6 +87,7 @@ def postgresql_noproc(
             password=pg_password,
             dbname=pg_dbname,
             options=pg_options,
+            track_changes=pg_reuse_clean,
         )
         janitor = DatabaseJanitor(
             user=noop_exec.user,
@@ -95,6 +102,9 @@ def postgresql_noproc(
         with janitor:
             for load_element in pg_load:
                 janitor.load(load_element)
+            if pg_reuse_clean:
+                install_template(janitor)
             yield noop_exec
+        close_maintenance_connections(noop_exec.host, noop_exec.port)
 
     return postgresql_noproc_fixture
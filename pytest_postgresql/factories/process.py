@@ -19,19 +19,29 @@
 
 import os.path
 import platform
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import port_for
 import pytest
 from port_for import PortForException, get_port
 from pytest import FixtureRequest, TempPathFactory
 
+from pytest_postgresql.cache import DirectoryCache
 from pytest_postgresql.config import PostgresqlConfigDict, get_config
+from pytest_postgresql.datadir import make_datadir, remove_stale
 from pytest_postgresql.exceptions import ExecutableMissingException
 from pytest_postgresql.executor import PostgreSQLExecutor
-from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.factories.noprocess import xdistify_dbname
+from pytest_postgresql.janitor import DatabaseJanitor, close_maintenance_connections
+from pytest_postgresql.loader import LoadStep
+from pytest_postgresql.query_stats import create_extension
+from pytest_postgresql.shared import SharedServer, State
+from pytest_postgresql.snapshot import TemplateSnapshots, load_fingerprint
+from pytest_postgresql.tracking import install_template
 
 PortType = port_for.PortType  # mypy requires explicit export
 
@@ -63,10 +73,65 @@ def _pg_port(
     return pg_port
 
 
-def _prepare_dir(tmpdir: Path, pg_port: PortType) -> Tuple[Path, Path]:
+def _socket_port(port: Optional[PortType], config: PostgresqlConfigDict) -> int:
+    """Return port naming the socket file of a server, that does not listen on TCP.
+
+    Socket file can't clash with other servers' in a socket directory of its own,
+    so the configured port is used as is, without looking for a free one,
+    or 5432 when it's not a single port (i.e. a range).
+    """
+    for candidate in (port, config["port"]):
+        if isinstance(candidate, int) and candidate != -1:
+            return candidate
+        if isinstance(candidate, str) and candidate.isdigit():
+            return int(candidate)
+    return 5432
+
+
+def _reserve_port(
+    request: FixtureRequest,
+    tmp_path_factory: TempPathFactory,
+    port: Optional[PortType],
+    config: PostgresqlConfigDict,
+) -> int:
+    """Select free port, marking it as used with a file shared by xdist workers."""
+    port_path = tmp_path_factory.getbasetemp()
+    if hasattr(request.config, "workerinput"):
+        port_path = tmp_path_factory.getbasetemp().parent
+
+    n = 0
+    used_ports: set[int] = set()
+    while True:
+        try:
+            pg_port = _pg_port(port, config, used_ports)
+            port_filename_path = port_path / f"postgresql-{pg_port}.port"
+            if pg_port in used_ports:
+                raise PortForException(
+                    f"Port {pg_port} already in use, probably by other instances of the test. "
+                    f"{port_filename_path} is already used."
+                )
+            used_ports.add(pg_port)
+            with (port_filename_path).open("x") as port_file:
+                port_file.write(f"pg_port {pg_port}\n")
+            break
+        except FileExistsError:
+            if n >= config["port_search_count"]:
+                raise PortForException(
+                    f"Attempted {n} times to select ports. "
+                    f"All attempted ports: {', '.join(map(str, used_ports))} are already "
+                    f"in use, probably by other instances of the test."
+                )
+            n += 1
+    return pg_port
+
+
+def _prepare_dir(
+    tmpdir: Path, pg_port: PortType, datadir: Optional[Path] = None
+) -> Tuple[Path, Path]:
     """Prepare directory for the executor."""
-    datadir = tmpdir / f"data-{pg_port}"
-    datadir.mkdir()
+    if datadir is None:
+        datadir = tmpdir / f"data-{pg_port}"
+        datadir.mkdir()
     logfile_path = tmpdir / f"postgresql.{pg_port}.log"
 
     if platform.system() == "FreeBSD":
@@ -75,6 +140,25 @@ def _prepare_dir(tmpdir: Path, pg_port: PortType) -> Tuple[Path, Path]:
     return datadir, logfile_path
 
 
+def _load_template(
+    janitor: DatabaseJanitor,
+    load: Sequence[LoadStep],
+    snapshots: Optional[TemplateSnapshots],
+    load_version: Optional[str],
+) -> None:
+    """Populate template database, restoring it from snapshot when possible."""
+    if snapshots is None:
+        for load_element in load:
+            janitor.load(load_element)
+        return
+    key = load_fingerprint(load, janitor.version, load_version)
+    if snapshots.restore(key, janitor):
+        return
+    for load_element in load:
+        janitor.load(load_element)
+    snapshots.store(key, janitor)
+
+
 def postgresql_proc(
     executable: Optional[str] = None,
     host: Optional[str] = None,
@@ -86,7 +170,17 @@ def postgresql_proc(
     startparams: Optional[str] = None,
     unixsocketdir: Optional[str] = None,
     postgres_options: Optional[str] = None,
-    load: Optional[List[Union[Callable, str, Path]]] = None,
+    load: Optional[List[LoadStep]] = None,
+    cache_dir: Optional[str] = None,
+    template_cache: Optional[bool] = None,
+    load_version: Optional[str] = None,
+    profile: Optional[str] = None,
+    datadir_root: Optional[str] = None,
+    datadir_min_free: Optional[int] = None,
+    transport: Optional[str] = None,
+    xdist_shared: Optional[bool] = None,
+    query_stats: Optional[bool] = None,
+    reuse_clean: Optional[bool] = None,
 ) -> Callable[[FixtureRequest, TempPathFactory], Iterator[PostgreSQLExecutor]]:
     """Postgresql process factory.
 
@@ -107,6 +201,25 @@ def postgresql_proc(
     :param unixsocketdir: directory to create postgresql's unixsockets
     :param postgres_options: Postgres executable options for use by pg_ctl
     :param load: List of functions used to initialize database's template.
+        Tuples of them are loaded concurrently, lists inside tuples one after another.
+    :param cache_dir: directory to cache initialised data directories in
+    :param template_cache: whether to store the loaded template database in cache directory,
+        and restore it in following sessions instead of running loaders again
+    :param load_version: explicit version of loaded callables, used to detect changes
+        instead of their source code
+    :param profile: name of the server settings' profile, i.e. ephemeral
+    :param datadir_root: directory to place data directory in instead of pytest's
+        temporary directory, i.e. memory backed /dev/shm
+    :param datadir_min_free: megabytes that have to be free in datadir_root,
+        data directory is placed in pytest's temporary directory otherwise
+    :param transport: how clients connect to the server: auto, tcp or unixsocket.
+        With unixsocket, server does not listen on TCP and gets a socket directory of its own.
+    :param xdist_shared: whether xdist workers should share one server, started by the first
+        worker and stopped by the last one, each worker using databases of its own
+    :param query_stats: whether to load pg_stat_statements, and attribute
+        statistics of queries run by the client fixture to the tests
+    :param reuse_clean: whether to install triggers logging changes in the template database,
+        for client fixtures reusing databases left clean by the tests
     :returns: function which makes a postgresql process
     """
 
@@ -124,64 +237,163 @@ def postgresql_proc(
         pg_dbname = dbname or config["dbname"]
         pg_load = load or config["load"]
         postgresql_ctl = _pg_exe(executable, config)
-        port_path = tmp_path_factory.getbasetemp()
-        if hasattr(request.config, "workerinput"):
-            port_path = tmp_path_factory.getbasetemp().parent
+        pg_transport = transport or config["transport"]
+        pg_datadir_root = datadir_root or config["datadir_root"]
+        pg_cache_dir = cache_dir or config["cache_dir"]
+        pg_query_stats = query_stats if query_stats is not None else config["query_stats"]
+        pg_reuse_clean = reuse_clean if reuse_clean is not None else config["reuse_clean"]
+        initdb_cache = None
+        if pg_cache_dir:
+            initdb_cache = DirectoryCache(Path(pg_cache_dir) / "initdb", config["cache_max_size"])
+        snapshots = None
+        if template_cache or (template_cache is None and config["template_cache"]):
+            if not pg_cache_dir:
+                raise pytest.UsageError(
+                    "Caching template database requires the cache directory to be configured "
+                    "with postgresql_cache_dir."
+                )
+            snapshots = TemplateSnapshots(
+                DirectoryCache(Path(pg_cache_dir) / "templates", config["cache_max_size"]),
+                bindir=os.path.dirname(postgresql_ctl),
+            )
 
-        n = 0
-        used_ports: set[int] = set()
-        while True:
+        def prepare_server(tmpdir: Path) -> State:
+            """Select port and directories for the server."""
+            pg_unixsocketdir = unixsocketdir or config["unixsocketdir"]
+            if pg_transport == "unixsocket":
+                pg_port = _socket_port(port, config)
+                pg_unixsocketdir = tempfile.mkdtemp(
+                    prefix="pytest-postgresql-", dir=pg_unixsocketdir
+                )
+            else:
+                pg_port = _reserve_port(request, tmp_path_factory, port, config)
+            ram_datadir = None
+            if pg_datadir_root:
+                remove_stale(pg_datadir_root, postgresql_ctl)
+                ram_datadir = make_datadir(
+                    pg_datadir_root,
+                    pg_port,
+                    (
+                        datadir_min_free
+                        if datadir_min_free is not None
+                        else config["datadir_min_free"]
+                    ),
+                )
+            datadir, logfile_path = _prepare_dir(tmpdir, str(pg_port), ram_datadir)
+            return {
+                "port": pg_port,
+                "datadir": str(datadir),
+                "logfile": str(logfile_path),
+                "unixsocketdir": pg_unixsocketdir,
+                "ram_datadir": ram_datadir is not None,
+            }
+
+        def make_executor(server: State, executor_dbname: str) -> PostgreSQLExecutor:
+            """Create executor for the server."""
+            return PostgreSQLExecutor(
+                executable=postgresql_ctl,
+                host=host or config["host"],
+                port=server["port"],
+                user=user or config["user"],
+                password=password or config["password"],
+                dbname=executor_dbname,
+                options=options or config["options"],
+                datadir=server["datadir"],
+                unixsocketdir=server["unixsocketdir"],
+                logfile=server["logfile"],
+                startparams=startparams or config["startparams"],
+                postgres_options=postgres_options or config["postgres_options"],
+                initdb_cache=initdb_cache,
+                profile=profile or config["profile"],
+                transport=pg_transport,
+                template_dbname=f"{pg_dbname}_tmpl",
+                query_stats=pg_query_stats,
+                track_changes=pg_reuse_clean,
+            )
+
+        def template_janitor(executor: PostgreSQLExecutor) -> DatabaseJanitor:
+            """Create janitor of the server's template database."""
+            return DatabaseJanitor(
+                user=executor.user,
+                host=executor.connection_host,
+                port=executor.port,
+                template_dbname=executor.template_dbname,
+                version=executor.version,
+                password=executor.password,
+                bindir=os.path.dirname(postgresql_ctl),
+            )
+
+        def remove_server(server: State, executor: PostgreSQLExecutor) -> None:
+            """Remove server's directories, that are not cleaned up along with pytest's tmp."""
+            if server["ram_datadir"]:
+                # don't wait for garbage collection to free the memory
+                executor.clean_directory()
+            if pg_transport == "unixsocket":
+                shutil.rmtree(server["unixsocketdir"], ignore_errors=True)
+
+        shared = xdist_shared if xdist_shared is not None else config["xdist_shared"]
+        if shared and hasattr(request.config, "workerinput"):
+            shared_server = SharedServer(
+                tmp_path_factory.getbasetemp().parent / f"postgresql-{request.fixturename}"
+            )
+
+            def start_shared() -> State:
+                """Start the server and load its template database."""
+                server = prepare_server(shared_server.path)
+                executor = make_executor(server, pg_dbname)
+                executor.start()
+                try:
+                    executor.wait_for_postgres()
+                    janitor = template_janitor(executor)
+                    janitor.init()
+                    _load_template(janitor, pg_load, snapshots, load_version)
+                    if pg_query_stats:
+                        create_extension(janitor)
+                    if pg_reuse_clean:
+                        install_template(janitor)
+                    close_maintenance_connections(executor.connection_host, executor.port)
+                except Exception:
+                    executor.stop()
+                    raise
+                executor.detach()
+                return server
+
+            def stop_shared(server: State) -> None:
+                """Stop the server, started by any of the workers."""
+                executor = make_executor(server, pg_dbname)
+                if executor.running():
+                    executor.stop()
+                executor.clean_directory()
+                remove_server(server, executor)
+
+            server = shared_server.attach(start_shared, stop_shared)
+            postgresql_executor = make_executor(server, xdistify_dbname(pg_dbname))
             try:
-                pg_port = _pg_port(port, config, used_ports)
-                port_filename_path = port_path / f"postgresql-{pg_port}.port"
-                if pg_port in used_ports:
-                    raise PortForException(
-                        f"Port {pg_port} already in use, probably by other instances of the test. "
-                        f"{port_filename_path} is already used."
-                    )
-                used_ports.add(pg_port)
-                with (port_filename_path).open("x") as port_file:
-                    port_file.write(f"pg_port {pg_port}\n")
-                break
-            except FileExistsError:
-                if n >= config["port_search_count"]:
-                    raise PortForException(
-                        f"Attempted {n} times to select ports. "
-                        f"All attempted ports: {', '.join(map(str, used_ports))} are already "
-                        f"in use, probably by other instances of the test."
-                    )
-                n += 1
-
-        tmpdir = tmp_path_factory.mktemp(f"pytest-postgresql-{request.fixturename}")
-        datadir, logfile_path = _prepare_dir(tmpdir, str(pg_port))
-
-        postgresql_executor = PostgreSQLExecutor(
-            executable=postgresql_ctl,
-            host=host or config["host"],
-            port=pg_port,
-            user=user or config["user"],
-            password=password or config["password"],
-            dbname=pg_dbname,
-            options=options or config["options"],
-            datadir=str(datadir),
-            unixsocketdir=unixsocketdir or config["unixsocketdir"],
-            logfile=str(logfile_path),
-            startparams=startparams or config["startparams"],
-            postgres_options=postgres_options or config["postgres_options"],
-        )
-        # start server
-        with postgresql_executor:
-            postgresql_executor.wait_for_postgres()
-            with DatabaseJanitor(
-                user=postgresql_executor.user,
-                host=postgresql_executor.host,
-                port=postgresql_executor.port,
-                template_dbname=postgresql_executor.template_dbname,
-                version=postgresql_executor.version,
-                password=postgresql_executor.password,
-            ) as janitor:
-                for load_element in pg_load:
-                    janitor.load(load_element)
                 yield postgresql_executor
+            finally:
+                close_maintenance_connections(
+                    postgresql_executor.connection_host, postgresql_executor.port
+                )
+                shared_server.detach(stop_shared)
+            return
+
+        server = prepare_server(tmp_path_factory.mktemp(f"pytest-postgresql-{request.fixturename}"))
+        postgresql_executor = make_executor(server, pg_dbname)
+        # start server
+        try:
+            with postgresql_executor:
+                postgresql_executor.wait_for_postgres()
+                with template_janitor(postgresql_executor) as janitor:
+                    _load_template(janitor, pg_load, snapshots, load_version)
+                    if pg_query_stats:
+                        create_extension(janitor)
+                    if pg_reuse_clean:
+                        install_template(janitor)
+                    yield postgresql_executor
+                close_maintenance_connections(
+                    postgresql_executor.connection_host, postgresql_executor.port
+                )
+        finally:
+            remove_server(server, postgresql_executor)
 
     return postgresql_proc_fixture
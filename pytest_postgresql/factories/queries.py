@@ -0,0 +1,60 @@
+# Copyright (C) 2013-2021 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-postgresql.
+
+# pytest-postgresql is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-postgresql is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
+"""Fixture factory for counting client fixture's queries."""
+from typing import Callable, Iterator, Optional
+
+import pytest
+from psycopg import Connection
+from pytest import FixtureRequest
+
+from pytest_postgresql.config import get_config
+from pytest_postgresql.query_counter import QueryCounter
+
+
+def query_counter(
+    client_fixture_name: str, max_repeats: Optional[int] = None
+) -> Callable[[FixtureRequest], Iterator[QueryCounter]]:
+    """Return query counter fixture factory.
+
+    :param client_fixture_name: name of the client fixture, whose connection's
+        statements get counted
+    :param max_repeats: fail the test, if any normalized statement gets executed
+        more than max_repeats times. 0 turns the check off.
+    :returns: function which makes a query counter
+    """
+
+    @pytest.fixture
+    def query_counter_fixture(request: FixtureRequest) -> Iterator[QueryCounter]:
+        """Count statements executed on client fixture's connection during the test.
+
+        :param request: fixture request object
+        :returns: query counter
+        """
+        connection: Connection = request.getfixturevalue(client_fixture_name)
+        config = get_config(request)
+        pg_max_repeats = config["max_repeats"] if max_repeats is None else max_repeats
+        counter = QueryCounter()
+        previous_cursor_factory = counter.attach(connection)
+        yield counter
+        connection.cursor_factory = previous_cursor_factory
+        if pg_max_repeats:
+            message = counter.repeated_message(pg_max_repeats)
+            if message is not None:
+                pytest.fail(message, pytrace=False)
+
+    return query_counter_fixture
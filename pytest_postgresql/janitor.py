@@ -1,25 +1,85 @@
 """Database Janitor."""
 
-from contextlib import contextmanager
-from pathlib import Path
+import asyncio
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
 from types import TracebackType
-from typing import Callable, Iterator, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import psycopg
 from packaging.version import parse
-from psycopg import Connection, Cursor
+from psycopg import AsyncConnection, AsyncCursor, Connection, Cursor
+from psycopg.pq import TransactionStatus
 
-from pytest_postgresql.loader import build_loader
-from pytest_postgresql.retry import retry
+from pytest_postgresql import stats
+from pytest_postgresql.capabilities import Capabilities
+from pytest_postgresql.loader import LoadStep, build_loader, loader_name
+from pytest_postgresql.retry import retry, retry_async
 
 Version = type(parse("1"))
 
 
 DatabaseJanitorType = TypeVar("DatabaseJanitorType", bound="DatabaseJanitor")
+AsyncDatabaseJanitorType = TypeVar("AsyncDatabaseJanitorType", bound="AsyncDatabaseJanitor")
 
+Query = Tuple[str, Tuple[Any, ...]]
 
-class DatabaseJanitor:
-    """Manage database state for specific tasks."""
+CREATE_STRATEGIES = ("auto", "wal_log", "file_copy")
+# Templates at least this large get cloned with FILE_COPY strategy, when it's chosen automatically.
+# WAL_LOG writes the whole template into the WAL, which pays off only for small templates.
+FILE_COPY_MIN_SIZE = 32 * 1024 * 1024
+
+# Idle maintenance connections kept for each server, at most this many.
+# Threads taking one at the same time (i.e. pool, drop queue and loaders) connect anew,
+# and the connections they give back over the limit get closed.
+MAINTENANCE_IDLE_MAX = 2
+
+_maintenance_lock = threading.Lock()
+_maintenance_connections: Dict[Tuple[Any, ...], List[Connection]] = {}
+# (host, port, template database): strategy chosen for cloning it automatically
+_template_strategies: Dict[Tuple[str, str, str], str] = {}
+
+
+def _is_alive(conn: Connection) -> bool:
+    """Check whether the idle connection is still usable, without a round trip to the server.
+
+    Idle connection's socket becomes readable when the server closes it.
+    """
+    if conn.closed or conn.broken:
+        return False
+    try:
+        readable, _, _ = select.select([conn.fileno()], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+def close_maintenance_connections(host: str, port: Union[str, int]) -> None:
+    """Close maintenance connections kept to the server."""
+    with _maintenance_lock:
+        keys = [key for key in _maintenance_connections if key[:2] == (str(host), str(port))]
+        connections = [conn for key in keys for conn in _maintenance_connections.pop(key)]
+    for conn in connections:
+        conn.close()
+
+
+class BaseDatabaseJanitor:
+    """Queries and settings shared by synchronous and asynchronous janitors."""
 
     def __init__(
         self,
@@ -33,6 +93,8 @@ class DatabaseJanitor:
         password: Optional[str] = None,
         isolation_level: "Optional[psycopg.IsolationLevel]" = None,
         connection_timeout: int = 60,
+        bindir: Optional[str] = None,
+        create_strategy: str = "auto",
     ) -> None:
         """Initialize janitor.
 
@@ -47,6 +109,10 @@ class DatabaseJanitor:
             defaults to server's default
         :param connection_timeout: how long to retry connection before
             raising a TimeoutError
+        :param bindir: directory with postgresql executables, used to restore dumps
+        :param create_strategy: strategy of cloning the template database: wal_log, file_copy,
+            or auto - chosen by the template's size. Used on PostgreSQL 15 and newer,
+            older versions always copy files.
         """
         self.user = user
         self.password = password
@@ -58,86 +124,204 @@ class DatabaseJanitor:
         self.template_dbname = template_dbname
         self._connection_timeout = connection_timeout
         self.isolation_level = isolation_level
+        self.bindir = bindir
+        if create_strategy not in CREATE_STRATEGIES:
+            raise ValueError(
+                f"Unknown create strategy {create_strategy}. "
+                f"Use one of: {', '.join(CREATE_STRATEGIES)}."
+            )
+        self.create_strategy = create_strategy
         if not isinstance(version, Version):
             self.version = parse(str(version))
         else:
             self.version = version
-
-    def init(self) -> None:
-        """Create database in postgresql."""
-        with self.cursor() as cur:
-            if self.is_template():
-                cur.execute(f'CREATE DATABASE "{self.template_dbname}" WITH is_template = true;')
-            elif self.template_dbname is None:
-                cur.execute(f'CREATE DATABASE "{self.dbname}";')
-            else:
-                # And make sure no-one is left connected to the template database.
-                # Otherwise, Creating database from template will fail
-                self._terminate_connection(cur, self.template_dbname)
-                cur.execute(f'CREATE DATABASE "{self.dbname}" TEMPLATE "{self.template_dbname}";')
+        self.capabilities = Capabilities(self.version)
 
     def is_template(self) -> bool:
         """Determine whether the DatabaseJanitor maintains template or database."""
         return self.dbname is None
 
-    def drop(self) -> None:
-        """Drop database in postgresql."""
-        # We cannot drop the database while there are connections to it, so we
-        # terminate all connections first while not allowing new connections.
+    def _strategy_key(self) -> Tuple[str, str, str]:
+        """Return key of the template's automatically chosen strategy."""
+        assert self.template_dbname
+        return str(self.host), str(self.port), self.template_dbname
+
+    def _cached_strategy(self) -> Optional[str]:
+        """Return strategy of cloning the template, if known without querying the server."""
+        if not self.capabilities.create_strategy:
+            return "file_copy"
+        if self.create_strategy != "auto":
+            return self.create_strategy
+        with _maintenance_lock:
+            return _template_strategies.get(self._strategy_key())
+
+    def _choose_strategy(self, template_size: int) -> str:
+        """Choose strategy of cloning the template by its size, and remember it."""
+        strategy = "file_copy" if template_size >= FILE_COPY_MIN_SIZE else "wal_log"
+        with _maintenance_lock:
+            _template_strategies[self._strategy_key()] = strategy
+        return strategy
+
+    def _forget_strategy(self) -> None:
+        """Forget strategy chosen for the template, once it's dropped."""
+        with _maintenance_lock:
+            _template_strategies.pop(self._strategy_key(), None)
+
+    @staticmethod
+    def _template_size_query(template_dbname: str) -> Query:
+        return "SELECT pg_database_size(%s);", (template_dbname,)
+
+    def _record_create(self, strategy: Optional[str], elapsed: float) -> None:
+        """Record the strategy test database was cloned with, and how long it took."""
+        if strategy is None:
+            return
+        stats.incr(f"databases created with {strategy}")
+        stats.incr(f"database create {strategy} [s]", elapsed)
+
+    def _init_queries(self, strategy: Optional[str] = None) -> List[Query]:
+        """Return queries creating the database.
+
+        :param strategy: strategy of cloning the template database,
+            left to the server's default if not given
+        """
+        if self.is_template():
+            return [(f'CREATE DATABASE "{self.template_dbname}" WITH is_template = true;', ())]
+        elif self.template_dbname is None:
+            return [(f'CREATE DATABASE "{self.dbname}";', ())]
+        options = ""
+        if strategy is not None and self.capabilities.create_strategy:
+            options = f" STRATEGY = {strategy.upper()}"
+        # And make sure no-one is left connected to the template database.
+        # Otherwise, Creating database from template will fail
+        return [
+            self._terminate_connection(self.template_dbname),
+            (f'CREATE DATABASE "{self.dbname}" TEMPLATE "{self.template_dbname}"{options};', ()),
+        ]
+
+    def _drop_queries(self) -> List[Query]:
+        """Return queries dropping the database."""
         db_to_drop = self.template_dbname if self.is_template() else self.dbname
         assert db_to_drop
-        with self.cursor() as cur:
-            self._dont_datallowconn(cur, db_to_drop)
-            self._terminate_connection(cur, db_to_drop)
-            if self.is_template():
-                cur.execute(f'ALTER DATABASE "{db_to_drop}" with is_template false;')
-            cur.execute(f'DROP DATABASE IF EXISTS "{db_to_drop}";')
+        if not self.is_template() and self.capabilities.drop_force:
+            # FORCE terminates connections on its own.
+            return [(f'DROP DATABASE IF EXISTS "{db_to_drop}" WITH (FORCE);', ())]
+        # We cannot drop the database while there are connections to it, so we
+        # terminate all connections first while not allowing new connections.
+        queries = [
+            self._dont_datallowconn(db_to_drop),
+            self._terminate_connection(db_to_drop),
+        ]
+        if self.is_template():
+            queries.append((f'ALTER DATABASE "{db_to_drop}" with is_template false;', ()))
+        queries.append((f'DROP DATABASE IF EXISTS "{db_to_drop}";', ()))
+        return queries
 
     @staticmethod
-    def _dont_datallowconn(cur: Cursor, dbname: str) -> None:
-        cur.execute(f'ALTER DATABASE "{dbname}" with allow_connections false;')
+    def _dont_datallowconn(dbname: str) -> Query:
+        return f'ALTER DATABASE "{dbname}" with allow_connections false;', ()
 
     @staticmethod
-    def _terminate_connection(cur: Cursor, dbname: str) -> None:
-        cur.execute(
+    def _terminate_connection(dbname: str) -> Query:
+        return (
             "SELECT pg_terminate_backend(pg_stat_activity.pid)"
             "FROM pg_stat_activity "
             "WHERE pg_stat_activity.datname = %s;",
             (dbname,),
         )
 
-    def load(self, load: Union[Callable, str, Path]) -> None:
+    def _connection_kwargs(self, dbname: str) -> Dict[str, Any]:
+        """Return arguments to connect to dbname with."""
+        return {
+            "dbname": dbname,
+            "user": self.user,
+            "password": self.password,
+            "host": self.host,
+            "port": self.port,
+        }
+
+    def _loader_kwargs(self) -> Dict[str, Any]:
+        """Return arguments passed to the loaders."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "user": self.user,
+            "dbname": self.template_dbname if self.is_template() else self.dbname,
+            "password": self.password,
+        }
+
+
+class DatabaseJanitor(BaseDatabaseJanitor):
+    """Manage database state for specific tasks."""
+
+    def init(self) -> None:
+        """Create database in postgresql."""
+        with stats.timer("database create"), self.cursor() as cur:
+            strategy = None
+            if not self.is_template() and self.template_dbname is not None:
+                strategy = self.clone_strategy(cur)
+            start = time.perf_counter()
+            for query, params in self._init_queries(strategy):
+                cur.execute(query, params)
+            self._record_create(strategy, time.perf_counter() - start)
+
+    def clone_strategy(self, cur: Cursor) -> str:
+        """Return strategy of cloning the template, measuring the template's size the first time."""
+        strategy = self._cached_strategy()
+        if strategy is None:
+            assert self.template_dbname
+            cur.execute(*self._template_size_query(self.template_dbname))
+            row = cur.fetchone()
+            strategy = self._choose_strategy(row[0] if row else 0)
+        return strategy
+
+    def drop(self) -> None:
+        """Drop database in postgresql."""
+        with self.cursor() as cur:
+            self.drop_using(cur)
+
+    def drop_using(self, cur: Cursor) -> None:
+        """Drop database in postgresql, using already opened maintenance cursor."""
+        with stats.timer("database drop"):
+            for query, params in self._drop_queries():
+                cur.execute(query, params)
+        if self.is_template():
+            self._forget_strategy()
+
+    def load(self, load: LoadStep) -> None:
         """Load data into a database.
 
         Expects:
 
             * a Path to sql file, that'll be loaded
+            * a Path to custom (.dump, .backup) or directory format dump,
+              restored with pg_restore
+            * a Path to directory with csv, tsv or ndjson files, copied into tables
             * an import path to import callable
             * a callable that expects: host, port, user, dbname and password arguments.
+            * a list of any of the above, loaded one after another
+            * a tuple of independent branches - any of the above,
+              loaded concurrently in a thread pool
 
         """
-        db_to_load = self.template_dbname if self.is_template() else self.dbname
-        _loader = build_loader(load)
-        _loader(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            dbname=db_to_load,
-            password=self.password,
-        )
+        if isinstance(load, tuple):
+            with ThreadPoolExecutor(max_workers=max(len(load), 1)) as pool:
+                for future in [pool.submit(self.load, branch) for branch in load]:
+                    future.result()
+            return
+        if isinstance(load, list):
+            for step in load:
+                self.load(step)
+            return
+        _loader = build_loader(load, self.bindir)
+        start = time.monotonic()
+        _loader(**self._loader_kwargs())
+        stats.record(f"load {loader_name(load)}", time.monotonic() - start)
 
-    @contextmanager
-    def cursor(self, dbname: str = "postgres") -> Iterator[Cursor]:
-        """Return postgresql cursor."""
+    def _connect(self, dbname: str) -> Connection:
+        """Connect to the dbname, as the maintenance connection."""
 
         def connect() -> Connection:
-            return psycopg.connect(
-                dbname=dbname,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
-            )
+            return psycopg.connect(**self._connection_kwargs(dbname))
 
         conn = retry(
             connect, timeout=self._connection_timeout, possible_exception=psycopg.OperationalError
@@ -145,13 +329,61 @@ class DatabaseJanitor:
         conn.isolation_level = self.isolation_level
         # We must not run a transaction since we create a database.
         conn.autocommit = True
+        return conn
+
+    @contextmanager
+    def cursor(self, dbname: str = "postgres") -> Iterator[Cursor]:
+        """Return postgresql cursor.
+
+        Cursors to the default postgres database share a few long-lived idle connections
+        per server, each used by one cursor at a time, and reconnected when it gets closed,
+        i.e. on server restart.
+        """
+        if dbname != "postgres":
+            conn = self._connect(dbname)
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+                conn.close()
+            return
+
+        conn = self._take_maintenance_connection()
         cur = conn.cursor()
         try:
             yield cur
         finally:
             cur.close()
+            self._give_back_maintenance_connection(conn)
+
+    def _maintenance_key(self) -> Tuple[Any, ...]:
+        """Return key of maintenance connections shared by janitors of the same server."""
+        return (str(self.host), str(self.port), self.user, self.password, self.isolation_level)
+
+    def _take_maintenance_connection(self) -> Connection:
+        """Take idle maintenance connection, or connect, when there's none alive."""
+        while True:
+            with _maintenance_lock:
+                idle = _maintenance_connections.get(self._maintenance_key())
+                conn = idle.pop() if idle else None
+            if conn is None:
+                return self._connect("postgres")
+            if _is_alive(conn):
+                stats.incr("maintenance connections reused")
+                return conn
             conn.close()
 
+    def _give_back_maintenance_connection(self, conn: Connection) -> None:
+        """Keep maintenance connection for the next cursor, unless there are enough idle ones."""
+        if _is_alive(conn) and conn.info.transaction_status == TransactionStatus.IDLE:
+            with _maintenance_lock:
+                idle = _maintenance_connections.setdefault(self._maintenance_key(), [])
+                if len(idle) < MAINTENANCE_IDLE_MAX:
+                    idle.append(conn)
+                    return
+        conn.close()
+
     def __enter__(self: DatabaseJanitorType) -> DatabaseJanitorType:
         """Initialize Database Janitor."""
         self.init()
@@ -165,3 +397,90 @@ class DatabaseJanitor:
     ) -> None:
         """Exit from Database janitor context cleaning after itself."""
         self.drop()
+
+
+class AsyncDatabaseJanitor(BaseDatabaseJanitor):
+    """Manage database state for specific tasks, with asyncio."""
+
+    async def init(self) -> None:
+        """Create database in postgresql."""
+        with stats.timer("database create"):
+            async with self.cursor() as cur:
+                strategy = None
+                if not self.is_template() and self.template_dbname is not None:
+                    strategy = await self.clone_strategy(cur)
+                start = time.perf_counter()
+                for query, params in self._init_queries(strategy):
+                    await cur.execute(query, params)
+                self._record_create(strategy, time.perf_counter() - start)
+
+    async def clone_strategy(self, cur: AsyncCursor) -> str:
+        """Return strategy of cloning the template, measuring the template's size the first time."""
+        strategy = self._cached_strategy()
+        if strategy is None:
+            assert self.template_dbname
+            await cur.execute(*self._template_size_query(self.template_dbname))
+            row = await cur.fetchone()
+            strategy = self._choose_strategy(row[0] if row else 0)
+        return strategy
+
+    async def drop(self) -> None:
+        """Drop database in postgresql."""
+        with stats.timer("database drop"):
+            async with self.cursor() as cur:
+                for query, params in self._drop_queries():
+                    await cur.execute(query, params)
+        if self.is_template():
+            self._forget_strategy()
+
+    async def load(self, load: LoadStep) -> None:
+        """Load data into a database.
+
+        Loaders are synchronous, so they're run in a separate thread.
+        See :meth:`DatabaseJanitor.load` for accepted loaders.
+        """
+        if isinstance(load, tuple):
+            await asyncio.gather(*(self.load(branch) for branch in load))
+            return
+        if isinstance(load, list):
+            for step in load:
+                await self.load(step)
+            return
+        _loader = build_loader(load, self.bindir)
+        start = time.monotonic()
+        await asyncio.to_thread(partial(_loader, **self._loader_kwargs()))
+        stats.record(f"load {loader_name(load)}", time.monotonic() - start)
+
+    @asynccontextmanager
+    async def cursor(self, dbname: str = "postgres") -> AsyncIterator[AsyncCursor]:
+        """Return postgresql async cursor."""
+
+        async def connect() -> AsyncConnection:
+            return await psycopg.AsyncConnection.connect(**self._connection_kwargs(dbname))
+
+        conn = await retry_async(
+            connect, timeout=self._connection_timeout, possible_exception=psycopg.OperationalError
+        )
+        await conn.set_isolation_level(self.isolation_level)
+        # We must not run a transaction since we create a database.
+        await conn.set_autocommit(True)
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            await cur.close()
+            await conn.close()
+
+    async def __aenter__(self: AsyncDatabaseJanitorType) -> AsyncDatabaseJanitorType:
+        """Initialize Database Janitor."""
+        await self.init()
+        return self
+
+    async def __aexit__(
+        self: AsyncDatabaseJanitorType,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Exit from Database janitor context cleaning after itself."""
+        await self.drop()
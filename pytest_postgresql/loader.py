@@ -1,16 +1,84 @@
 """Loader helper functions."""
 
+import csv
+import json
+import os
 import re
+import subprocess
+import time
 from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import psycopg
+from psycopg import sql as pgsql
+from psycopg.types.json import Jsonb
 
+from pytest_postgresql import stats
+from pytest_postgresql.sqlfile import open_sql, split_sql
 
-def build_loader(load: Union[Callable, str, Path]) -> Callable:
-    """Build a loader callable."""
+LoadElement = Union[Callable, str, Path]
+# Single loader, a list of steps loaded one after another,
+# or a tuple of independent steps (branches), loaded concurrently.
+LoadStep = Union[LoadElement, List[Any], Tuple[Any, ...]]
+
+DUMP_SUFFIXES = (".dump", ".backup")
+DATA_SUFFIXES = (".csv", ".tsv", ".ndjson")
+# Column types, and json values, which can be sent for them in binary COPY format.
+# Json and jsonb columns take any value, as their binary format is the json text.
+BINARY_COPY_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "bool": lambda value: isinstance(value, bool),
+    "int2": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "int4": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "int8": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "float4": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "float8": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "text": lambda value: isinstance(value, str),
+    "varchar": lambda value: isinstance(value, str),
+    "bpchar": lambda value: isinstance(value, str),
+    "json": lambda value: True,
+    "jsonb": lambda value: True,
+}
+
+
+def is_dump(path: Path) -> bool:
+    """Check whether the path points to pg_dump's custom or directory format archive."""
+    return path.suffix in DUMP_SUFFIXES or (path / "toc.dat").is_file()
+
+
+def is_data_dir(path: Path) -> bool:
+    """Check whether the path points to a directory with csv, tsv or ndjson table data files."""
+    return path.is_dir() and any(child.suffix in DATA_SUFFIXES for child in path.iterdir())
+
+
+def loader_name(load: LoadElement) -> str:
+    """Return loader's name, as reported in the statistics."""
     if isinstance(load, Path):
+        return load.name
+    if isinstance(load, str):
+        return load
+    func = load.func if isinstance(load, partial) else load
+    return str(getattr(func, "__qualname__", func))
+
+
+def build_loader(load: LoadElement, bindir: Optional[str] = None) -> Callable:
+    """Build a loader callable.
+
+    :param load: sql file, dump archive, table data directory, import path or callable
+    :param bindir: directory with postgresql executables, pg_restore is looked up
+        in system PATH if not given
+    """
+    if isinstance(load, Path):
+        if is_dump(load):
+            return partial(
+                pg_restore,
+                load,
+                executable=os.path.join(bindir, "pg_restore") if bindir else "pg_restore",
+                jobs=os.cpu_count(),
+                no_owner=True,
+            )
+        if is_data_dir(load):
+            return partial(copy_files, load)
         return partial(sql, load)
     elif isinstance(load, str):
         loader_parts = re.split("[.:]", load, maxsplit=2)
@@ -23,10 +91,234 @@ def build_loader(load: Union[Callable, str, Path]) -> Callable:
         return load
 
 
-def sql(sql_filename: Path, **kwargs: Any) -> None:
-    """Database loader for sql files."""
+def sql(sql_filename: Path, batch_size: int = 1024 * 1024, **kwargs: Any) -> None:
+    """Database loader for sql files, possibly compressed with gzip, xz or zstandard.
+
+    File is read statement by statement, and sent to the database
+    in batches of statements up to batch_size characters long.
+    Data of COPY FROM STDIN statements (i.e. in pg_dump's plain output)
+    is sent with psycopg's copy support.
+    """
+    start = time.monotonic()
+    db_connection = psycopg.connect(**kwargs)
+    batch: List[str] = []
+    batch_length = 0
+    with open_sql(Path(sql_filename)) as _fd, db_connection.cursor() as cur:
+        for statement, copy_data in split_sql(_fd):
+            if copy_data is None:
+                batch.append(statement)
+                batch_length += len(statement)
+                if batch_length < batch_size:
+                    continue
+            if batch:
+                cur.execute("\n".join(batch))
+                batch = []
+                batch_length = 0
+            if copy_data is not None:
+                with cur.copy(statement) as copy:
+                    for chunk in copy_data:
+                        copy.write(chunk)
+        if batch:
+            cur.execute("\n".join(batch))
+        # decompressed size, for the throughput to be comparable between files
+        loaded = _fd.buffer.tell()
+    db_connection.commit()
+    db_connection.close()
+    stats.incr("sql loaded [MB]", loaded / (1024 * 1024))
+    stats.incr("sql load time [s]", time.monotonic() - start)
+
+
+def pg_restore(
+    dump_path: Path,
+    *,
+    executable: str = "pg_restore",
+    jobs: Optional[int] = None,
+    host: str,
+    port: Union[str, int],
+    user: str,
+    dbname: str,
+    password: Optional[str] = None,
+    no_owner: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Database loader for custom and directory format dumps, using pg_restore.
+
+    :param jobs: number of tables restored in parallel
+    :param no_owner: skip restoring objects' ownership and privileges,
+        for dumps made with roles that might not exist on this server
+    """
+    command = [
+        executable,
+        "--host",
+        str(host),
+        "--port",
+        str(port),
+        "--username",
+        user,
+        "--dbname",
+        dbname,
+        "--no-password",
+        "--exit-on-error",
+    ]
+    if jobs:
+        command += ["--jobs", str(jobs)]
+    if no_owner:
+        command += ["--no-owner", "--no-privileges"]
+    command.append(str(dump_path))
+    env = dict(os.environ)
+    if password:
+        env["PGPASSWORD"] = password
+    subprocess.check_output(command, env=env, stderr=subprocess.STDOUT)
+
+
+def _column_types(cur: psycopg.Cursor, table: str) -> Dict[str, Tuple[int, str]]:
+    """Return table's columns' type oids and names."""
+    cur.execute(
+        "SELECT a.attname, a.atttypid, t.typname FROM pg_attribute a "
+        "JOIN pg_type t ON t.oid = a.atttypid "
+        "WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped",
+        (table,),
+    )
+    return {name: (oid, type_name) for name, oid, type_name in cur.fetchall()}
+
+
+def _drop_indexes(cur: psycopg.Cursor, table: str) -> List[str]:
+    """Drop table's indexes, except ones backing constraints, returning their definitions."""
+    cur.execute(
+        "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = %s::regclass "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        (table,),
+    )
+    indexes = cur.fetchall()
+    for index_name, _ in indexes:
+        cur.execute(pgsql.SQL("DROP INDEX {}").format(pgsql.SQL(index_name)))
+    return [definition for _, definition in indexes]
+
+
+def _copy_delimited(
+    cur: psycopg.Cursor, table: pgsql.Identifier, path: Path, chunk_size: int
+) -> None:
+    """Stream csv or tsv file, with header row naming the columns, for the server to parse."""
+    delimiter = "\t" if path.suffix == ".tsv" else ","
+    with path.open("rb") as _fd:
+        header = _fd.readline().decode("utf-8")
+        columns = next(csv.reader([header], delimiter=delimiter))
+        statement = pgsql.SQL("COPY {} ({}) FROM STDIN (FORMAT csv, DELIMITER {})").format(
+            table,
+            pgsql.SQL(", ").join(map(pgsql.Identifier, columns)),
+            pgsql.Literal(delimiter),
+        )
+        with cur.copy(statement) as copy:
+            for chunk in iter(partial(_fd.read, chunk_size), b""):
+                copy.write(chunk)
+
+
+class _NotBinary(Exception):
+    """Raised when a json value can't be sent in binary format for its column."""
+
+
+def _copy_ndjson(cur: psycopg.Cursor, table: pgsql.Identifier, path: Path) -> None:
+    """Copy json documents, one per line, with keys naming the columns.
+
+    Rows are sent in binary format, when all columns' types allow it. When a value
+    doesn't match its column's type (i.e. a string for a boolean column), the copy is
+    rolled back and done again in text format, for the server to parse the values.
+    """
+    with path.open("rb") as _fd:
+        first_line = next((line for line in _fd if line.strip()), None)
+    if first_line is None:
+        return
+    columns = list(json.loads(first_line))
+    types = _column_types(cur, table.as_string(cur))
+    for column in columns:
+        if column not in types:
+            raise ValueError(f"{path}: column {column!r} not found in table {table.as_string(cur)}")
+    if all(types[column][1] in BINARY_COPY_TYPES for column in columns):
+        try:
+            with cur.connection.transaction():
+                _copy_ndjson_rows(cur, table, path, columns, types)
+            return
+        except _NotBinary:
+            pass
+    _copy_ndjson_rows(cur, table, path, columns, None)
+
+
+def _copy_ndjson_rows(
+    cur: psycopg.Cursor,
+    table: pgsql.Identifier,
+    path: Path,
+    columns: List[str],
+    types: Optional[Dict[str, Tuple[int, str]]],
+) -> None:
+    """Copy json documents' values of the columns, in binary format if types are given."""
+    statement = pgsql.SQL("COPY {} ({}) FROM STDIN {}").format(
+        table,
+        pgsql.SQL(", ").join(map(pgsql.Identifier, columns)),
+        pgsql.SQL("(FORMAT BINARY)" if types else ""),
+    )
+    with path.open("rb") as _fd, cur.copy(statement) as copy:
+        if types:
+            copy.set_types([types[column][0] for column in columns])
+            checks = [BINARY_COPY_TYPES[types[column][1]] for column in columns]
+        for line in _fd:
+            if not line.strip():
+                continue
+            document = json.loads(line)
+            values = [document.get(column) for column in columns]
+            if types:
+                if not all(value is None or check(value) for check, value in zip(checks, values)):
+                    raise _NotBinary()
+                copy.write_row(values)
+            else:
+                copy.write_row([_text_value(value) for value in values])
+
+
+def _text_value(value: Any) -> Any:
+    """Return json value to be sent in text COPY format, as it's written in json."""
+    if isinstance(value, (dict, list)):
+        return Jsonb(value)
+    if isinstance(value, bool):
+        return json.dumps(value)
+    return value
+
+
+def copy_files(
+    data_dir: Path,
+    drop_indexes: bool = False,
+    analyze: bool = True,
+    chunk_size: int = 1024 * 1024,
+    **kwargs: Any,
+) -> None:
+    """Database loader for table data files, streamed with COPY FROM STDIN.
+
+    Loads each csv, tsv or ndjson file in data_dir, in alphabetical order,
+    into the table named after the file (i.e. public.users.csv into public.users).
+    Csv and tsv files have to start with a header row naming the columns.
+
+    :param data_dir: directory with data files
+    :param drop_indexes: drop indexes (apart from ones backing constraints)
+        before loading each table, and create them again afterwards
+    :param analyze: run ANALYZE on each loaded table
+    :param chunk_size: size of csv and tsv data chunks sent to the server
+    """
+    start = time.monotonic()
     db_connection = psycopg.connect(**kwargs)
-    with open(sql_filename, "r") as _fd:
-        with db_connection.cursor() as cur:
-            cur.execute(_fd.read())
+    with db_connection.cursor() as cur:
+        for path in sorted(data_dir.iterdir()):
+            if path.suffix not in DATA_SUFFIXES:
+                continue
+            table = pgsql.Identifier(*path.stem.split("."))
+            indexes = _drop_indexes(cur, table.as_string(cur)) if drop_indexes else []
+            if path.suffix == ".ndjson":
+                _copy_ndjson(cur, table, path)
+            else:
+                _copy_delimited(cur, table, path, chunk_size)
+            stats.incr("rows copied", max(cur.rowcount, 0))
+            for definition in indexes:
+                cur.execute(definition)
+            if analyze:
+                cur.execute(pgsql.SQL("ANALYZE {}").format(table))
     db_connection.commit()
+    db_connection.close()
+    stats.incr("copy load time [s]", time.monotonic() - start)
@@ -0,0 +1,239 @@
+"""Capturing query plans of client fixture's statements, and comparing them against baselines."""
+
+import json
+import re
+import warnings
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Type
+
+import psycopg
+import pytest
+from psycopg import Connection, Cursor
+from psycopg.abc import Params
+from psycopg.pq import TransactionStatus
+
+from pytest_postgresql.query_counter import normalize, statement_text
+from pytest_postgresql.sqlfile import split_sql
+
+PLAN_MODES = ("off", "warn", "fail")
+BASELINE_DIR = "plans"
+
+# Statements that can be explained.
+_PLANNABLE_RE = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w.-]+")
+# Node types, that get slow on large tables.
+_RISKY_NODES = ("Seq Scan", "Nested Loop")
+
+Shape = List[str]
+
+
+class PlanWarning(pytest.PytestWarning):
+    """Query plan differs from the baseline."""
+
+
+def _is_single_statement(statement: str) -> bool:
+    """Check whether the text consists of a single statement."""
+    return len(list(islice(split_sql(statement.splitlines(keepends=True)), 2))) == 1
+
+
+def plan_shape(plan: Dict[str, Any], depth: int = 0) -> Shape:
+    """Reduce plan to its stable shape: node types, indexes and relations, in join order.
+
+    Each node is a line, indented by its depth in the plan.
+    Costs and row estimates are left out, as they change along with the data.
+    """
+    line = plan["Node Type"]
+    if plan.get("Join Type", "Inner") != "Inner":
+        line += f" ({plan['Join Type']})"
+    if "Index Name" in plan:
+        line += f" using {plan['Index Name']}"
+    if "Relation Name" in plan:
+        line += f" on {plan['Relation Name']}"
+    shape = ["  " * depth + line]
+    for child in plan.get("Plans", []):
+        shape.extend(plan_shape(child, depth + 1))
+    return shape
+
+
+def _relation(line: str) -> Optional[str]:
+    """Return relation scanned by the shape's node."""
+    _, on, relation = line.rpartition(" on ")
+    return relation if on else None
+
+
+def risky_nodes(shape: Shape, large_tables: Set[str]) -> Set[str]:
+    """Return sequential scans and nested loops over large tables, found in the plan's shape."""
+    risky: Set[str] = set()
+    for index, line in enumerate(shape):
+        node = line.lstrip()
+        node_type = next((risky for risky in _RISKY_NODES if node.startswith(risky)), None)
+        if node_type is None:
+            continue
+        depth = len(line) - len(node)
+        subtree = [line]
+        for child in shape[index + 1 :]:
+            if len(child) - len(child.lstrip()) <= depth:
+                break
+            subtree.append(child)
+        for relation in filter(None, map(_relation, subtree)):
+            if relation in large_tables:
+                risky.add(f"{node_type} over {relation}")
+    return risky
+
+
+class PlanRecorder:
+    """Plans of statements executed on a connection."""
+
+    def __init__(self) -> None:
+        """Initialize plan recorder."""
+        # normalized statement: plan's shape
+        self.shapes: Dict[str, Shape] = {}
+        # normalized statements, that could not be explained
+        self.failed: Set[str] = set()
+
+    def explain(
+        self,
+        cursor_class: Type[Cursor],
+        connection: Connection,
+        query: Any,
+        params: Optional[Params] = None,
+    ) -> None:
+        """Capture plan of the statement, the first time it's executed.
+
+        Only single statements get explained, as explaining the rest of a script
+        would execute it once again. Runs in a savepoint of its own, so a failing EXPLAIN
+        does not abort the test's transaction, and gets reported as a warning instead.
+        """
+        statement = statement_text(query, connection)
+        if not _PLANNABLE_RE.match(statement) or not _is_single_statement(statement):
+            return
+        key = normalize(statement)
+        if key in self.shapes or key in self.failed:
+            return
+        try:
+            with connection.transaction(), cursor_class(connection) as cur:
+                cur.execute(f"EXPLAIN (FORMAT JSON) {statement}", params)
+                row = cur.fetchone()
+        except psycopg.Error as ex:
+            self.failed.add(key)
+            warnings.warn(PlanWarning(f"Could not explain {key}: {ex}"))
+            return
+        if row is not None:
+            plan = row[0] if isinstance(row[0], list) else json.loads(row[0])
+            self.shapes[key] = plan_shape(plan[0]["Plan"])
+
+    def cursor_class(self, base: Type[Cursor]) -> Type[Cursor]:
+        """Return cursor class capturing plans of statements executed with it."""
+        recorder = self
+
+        class PlanningCursor(base):  # type: ignore[valid-type,misc]
+            """Cursor capturing plans of executed statements."""
+
+            def execute(self, query: Any, params: Optional[Params] = None, **kwargs: Any) -> Any:
+                """Execute the statement, and capture its plan."""
+                result = super().execute(query, params, **kwargs)
+                recorder.explain(base, self.connection, query, params)
+                return result
+
+        return PlanningCursor
+
+
+def large_tables(cur: Cursor, shapes: Dict[str, Shape], large_table_rows: int) -> Set[str]:
+    """Return tables appearing in the shapes, estimated to have at least large_table_rows rows."""
+    relations = {
+        relation for shape in shapes.values() for relation in filter(None, map(_relation, shape))
+    }
+    if not relations:
+        return set()
+    cur.execute(
+        "SELECT relname FROM pg_class WHERE relname = ANY(%s) GROUP BY relname "
+        "HAVING max(reltuples) >= %s",
+        (sorted(relations), large_table_rows),
+    )
+    return {relname for relname, in cur.fetchall()}
+
+
+def baseline_path(test_path: Path, test_name: str) -> Path:
+    """Return path of the test's baseline file, in plans directory next to the test module."""
+    name = _UNSAFE_FILENAME_RE.sub("_", test_name)
+    return test_path.parent / BASELINE_DIR / test_path.stem / f"{name}.json"
+
+
+def check(shapes: Dict[str, Shape], baseline: Dict[str, Shape], large: Set[str]) -> Optional[str]:
+    """Describe plans flipping to sequential scans or nested loops over large tables.
+
+    Risky nodes already present in the baseline's plans are accepted.
+    """
+    problems = []
+    for statement, shape in shapes.items():
+        flipped = risky_nodes(shape, large) - risky_nodes(baseline.get(statement, []), large)
+        if flipped:
+            problems.append(
+                f"  {statement}\n    {', '.join(sorted(flipped))}\n"
+                + "\n".join(f"      {line}" for line in shape)
+            )
+    if not problems:
+        return None
+    return "Query plans use sequential scans or nested loops over large tables:\n" + "\n".join(
+        problems
+    )
+
+
+def tracked_fixture(
+    fixture: Iterator[Connection],
+    mode: str,
+    update: bool,
+    large_table_rows: int,
+    path: Path,
+) -> Iterator[Connection]:
+    """Wrap client fixture, capturing plans of its statements, and checking them after the test.
+
+    :param fixture: client fixture's generator
+    :param mode: what to do with plans flipping to sequential scans or nested loops
+        over large tables, compared to the baseline: warn or fail
+    :param update: whether to write captured plans into the baseline file instead
+    :param large_table_rows: estimated number of rows that makes a table large
+    :param path: baseline file
+    """
+    connection = next(fixture)
+    recorder = PlanRecorder()
+    previous_cursor_factory = connection.cursor_factory
+    connection.cursor_factory = recorder.cursor_class(previous_cursor_factory)
+    yield connection
+    message = None
+    try:
+        connection.cursor_factory = previous_cursor_factory
+        if update and recorder.shapes:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(recorder.shapes, indent=2, sort_keys=True) + "\n")
+        elif (
+            recorder.shapes
+            and not connection.closed
+            and connection.info.transaction_status != TransactionStatus.INERROR
+        ):
+            baseline: Dict[str, Shape] = json.loads(path.read_text()) if path.exists() else {}
+            changed = [
+                statement
+                for statement, shape in sorted(recorder.shapes.items())
+                if baseline.get(statement, shape) != shape
+            ]
+            if changed:
+                warnings.warn(
+                    PlanWarning(
+                        f"Query plans differ from {path}, "
+                        "update it with --postgresql-plans-update:\n"
+                        + "\n".join(f"  {statement}" for statement in changed)
+                    )
+                )
+            with connection.transaction(), previous_cursor_factory(connection) as cur:
+                large = large_tables(cur, recorder.shapes, large_table_rows)
+            message = check(recorder.shapes, baseline, large)
+    finally:
+        # clean the database up, even when checking the plans failed
+        next(fixture, None)
+    if message is None:
+        return
+    if mode == "fail":
+        pytest.fail(message, pytrace=False)
+    warnings.warn(PlanWarning(message))
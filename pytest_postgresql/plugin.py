@@ -16,11 +16,26 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with pytest-postgresql.  If not, see <http://www.gnu.org/licenses/>.
 """Plugin module of pytest-postgresql."""
+import os
+from pathlib import Path
 from tempfile import gettempdir
+from typing import Dict
 
+from _pytest.config import Config
 from _pytest.config.argparsing import Parser
+from _pytest.terminal import TerminalReporter
 
-from pytest_postgresql import factories
+from pytest_postgresql import factories, query_stats, stats
+from pytest_postgresql.executor import TRANSPORTS
+from pytest_postgresql.factories.client import RESET_MODES
+from pytest_postgresql.janitor import CREATE_STRATEGIES
+from pytest_postgresql.plans import PLAN_MODES
+from pytest_postgresql.profiles import PROFILES
+
+# Number of the most expensive tests, listed in the terminal summary.
+SLOWEST_TESTS = 10
+# Number of normalized queries listed with query statistics.
+TOP_QUERIES = 10
 
 _help_executable = "Path to PostgreSQL executable"
 _help_host = "Host at which PostgreSQL will accept connections"
@@ -39,6 +54,79 @@ _help_drop_test_database = (
     "when database was not cleared due to errors in previous test runs. "
     "Use cautiously and not on CI."
 )
+_help_cache_dir = (
+    "Directory to cache initialised PostgreSQL data directories in, between test sessions"
+)
+_help_cache_max_size = "Maximum size of the cache directory in megabytes"
+_help_template_cache = (
+    "Store the template database in the cache directory after loading it, "
+    "and restore it instead of loading, as long as loaded files and callables did not change"
+)
+_help_reset = (
+    "How client fixture resets database after each test. "
+    "drop - recreates database from template for each test, "
+    "transaction - creates database once and rolls back each test's transaction, "
+    "truncate - creates database once and restores tables changed by each test"
+)
+_help_profile = (
+    "Server settings' profile. "
+    "default - postgresql defaults, "
+    "ephemeral - durability turned off for speed (fsync, full page writes, minimal wal)"
+)
+_help_datadir_root = (
+    "Directory to place PostgreSQL data directory in, instead of pytest's temporary directory, "
+    "i.e. memory backed /dev/shm"
+)
+_help_datadir_min_free = (
+    "Megabytes that have to be free in the datadir root, "
+    "data directory is placed in pytest's temporary directory otherwise"
+)
+_help_transport = (
+    "How clients connect to the server. "
+    "auto - through unix socket when host is local, over TCP otherwise, "
+    "tcp - always over TCP, "
+    "unixsocket - through unix socket only, server does not listen on TCP"
+)
+_help_xdist_shared = (
+    "Share one PostgreSQL server between all xdist workers, "
+    "started by the first worker and stopped by the last one"
+)
+_help_max_repeats = (
+    "Fail tests using query counter fixture, that execute any normalized statement "
+    "more than given number of times, 0 turns the check off"
+)
+_help_plans = (
+    "Capture plans of client fixture's queries and compare them with baselines next to tests. "
+    "warn or fail on plans flipping to sequential scans or nested loops over large tables"
+)
+_help_plans_update = "Write captured query plans into the baseline files, instead of comparing"
+_help_plans_large_table_rows = (
+    "Estimated number of rows, from which sequential scans and nested loops over a table "
+    "are reported"
+)
+_help_timings = (
+    "Report time spent in each phase of setting up and tearing down databases, "
+    "and the tests with the most expensive database setup, in the terminal summary"
+)
+_help_timings_json = "Write phase timings to the json file, suffixed with worker id under xdist"
+_help_query_stats = (
+    "Load pg_stat_statements, attribute queries run by the client fixture to the tests, "
+    "and report the most expensive queries in the terminal summary"
+)
+_help_pool_size = (
+    "Number of databases client fixture creates from template ahead of time, in the background"
+)
+_help_reuse_clean = (
+    "Hand test database over to the next test, instead of recreating it, "
+    "when the test did not change anything in it"
+)
+_help_create_strategy = (
+    "Strategy of cloning test databases from the template on PostgreSQL 15 and newer. "
+    "auto - file_copy for large templates, wal_log for small ones"
+)
+_help_async_drop = (
+    "Drop test databases in the background, after giving them unique names for each test"
+)
 
 
 def pytest_addoption(parser: Parser) -> None:
@@ -70,6 +158,34 @@ def pytest_addoption(parser: Parser) -> None:
 
     parser.addini(name="postgresql_load", type="pathlist", help=_help_load)
     parser.addini(name="postgresql_postgres_options", help=_help_postgres_options, default="")
+    parser.addini(name="postgresql_cache_dir", help=_help_cache_dir, default="")
+    parser.addini(name="postgresql_cache_max_size", help=_help_cache_max_size, default=1024)
+    parser.addini(
+        name="postgresql_template_cache", type="bool", help=_help_template_cache, default=False
+    )
+    parser.addini(name="postgresql_reset", help=_help_reset, default="drop")
+    parser.addini(name="postgresql_pool_size", help=_help_pool_size, default=0)
+    parser.addini(name="postgresql_reuse_clean", type="bool", help=_help_reuse_clean, default=False)
+    parser.addini(name="postgresql_create_strategy", help=_help_create_strategy, default="auto")
+    parser.addini(name="postgresql_async_drop", type="bool", help=_help_async_drop, default=False)
+    parser.addini(name="postgresql_profile", help=_help_profile, default="default")
+    parser.addini(name="postgresql_datadir_root", help=_help_datadir_root, default="")
+    parser.addini(name="postgresql_datadir_min_free", help=_help_datadir_min_free, default=256)
+    parser.addini(name="postgresql_transport", help=_help_transport, default="auto")
+    parser.addini(
+        name="postgresql_xdist_shared", type="bool", help=_help_xdist_shared, default=False
+    )
+    parser.addini(name="postgresql_query_stats", type="bool", help=_help_query_stats, default=False)
+    parser.addini(name="postgresql_max_repeats", help=_help_max_repeats, default=0)
+    parser.addini(name="postgresql_plans", help=_help_plans, default="off")
+    parser.addini(
+        name="postgresql_plans_update", type="bool", help=_help_plans_update, default=False
+    )
+    parser.addini(
+        name="postgresql_plans_large_table_rows", help=_help_plans_large_table_rows, default=1000
+    )
+    parser.addini(name="postgresql_timings", type="bool", help=_help_timings, default=False)
+    parser.addini(name="postgresql_timings_json", help=_help_timings_json, default="")
 
     parser.addoption(
         "--postgresql-exec",
@@ -139,7 +255,260 @@ def pytest_addoption(parser: Parser) -> None:
         help=_help_drop_test_database,
     )
 
+    parser.addoption(
+        "--postgresql-cache-dir",
+        action="store",
+        metavar="path",
+        dest="postgresql_cache_dir",
+        help=_help_cache_dir,
+    )
+
+    parser.addoption(
+        "--postgresql-cache-max-size",
+        action="store",
+        dest="postgresql_cache_max_size",
+        help=_help_cache_max_size,
+    )
+
+    parser.addoption(
+        "--postgresql-template-cache",
+        action="store_true",
+        dest="postgresql_template_cache",
+        help=_help_template_cache,
+    )
+
+    parser.addoption(
+        "--postgresql-reset",
+        action="store",
+        choices=RESET_MODES,
+        dest="postgresql_reset",
+        help=_help_reset,
+    )
+
+    parser.addoption(
+        "--postgresql-pool-size",
+        action="store",
+        dest="postgresql_pool_size",
+        help=_help_pool_size,
+    )
+
+    parser.addoption(
+        "--postgresql-reuse-clean",
+        action="store_true",
+        dest="postgresql_reuse_clean",
+        help=_help_reuse_clean,
+    )
+
+    parser.addoption(
+        "--postgresql-create-strategy",
+        action="store",
+        choices=CREATE_STRATEGIES,
+        dest="postgresql_create_strategy",
+        help=_help_create_strategy,
+    )
+
+    parser.addoption(
+        "--postgresql-async-drop",
+        action="store_true",
+        dest="postgresql_async_drop",
+        help=_help_async_drop,
+    )
+
+    parser.addoption(
+        "--postgresql-profile",
+        action="store",
+        choices=list(PROFILES),
+        dest="postgresql_profile",
+        help=_help_profile,
+    )
+
+    parser.addoption(
+        "--postgresql-datadir-root",
+        action="store",
+        metavar="path",
+        dest="postgresql_datadir_root",
+        help=_help_datadir_root,
+    )
+
+    parser.addoption(
+        "--postgresql-datadir-min-free",
+        action="store",
+        dest="postgresql_datadir_min_free",
+        help=_help_datadir_min_free,
+    )
+
+    parser.addoption(
+        "--postgresql-transport",
+        action="store",
+        choices=TRANSPORTS,
+        dest="postgresql_transport",
+        help=_help_transport,
+    )
+
+    parser.addoption(
+        "--postgresql-xdist-shared",
+        action="store_true",
+        dest="postgresql_xdist_shared",
+        help=_help_xdist_shared,
+    )
+
+    parser.addoption(
+        "--postgresql-query-stats",
+        action="store_true",
+        dest="postgresql_query_stats",
+        help=_help_query_stats,
+    )
+
+    parser.addoption(
+        "--postgresql-max-repeats",
+        action="store",
+        type=int,
+        dest="postgresql_max_repeats",
+        help=_help_max_repeats,
+    )
+
+    parser.addoption(
+        "--postgresql-plans",
+        action="store",
+        choices=PLAN_MODES,
+        dest="postgresql_plans",
+        help=_help_plans,
+    )
+
+    parser.addoption(
+        "--postgresql-plans-update",
+        action="store_true",
+        dest="postgresql_plans_update",
+        help=_help_plans_update,
+    )
+
+    parser.addoption(
+        "--postgresql-plans-large-table-rows",
+        action="store",
+        type=int,
+        dest="postgresql_plans_large_table_rows",
+        help=_help_plans_large_table_rows,
+    )
+
+    parser.addoption(
+        "--postgresql-timings",
+        action="store_true",
+        dest="postgresql_timings",
+        help=_help_timings,
+    )
+
+    parser.addoption(
+        "--postgresql-timings-json",
+        action="store",
+        metavar="path",
+        dest="postgresql_timings_json",
+        help=_help_timings_json,
+    )
+
+
+def pytest_configure(config: Config) -> None:
+    """Register pytest-postgresql's markers."""
+    config.addinivalue_line(
+        "markers",
+        "postgresql_fresh_database: run test on a database created from template, "
+        "regardless of the client fixture's reset mode",
+    )
+
+
+def pytest_unconfigure(config: Config) -> None:
+    """Export phase timings, once the session's fixtures are torn down."""
+    path = config.getoption("postgresql_timings_json") or config.getini("postgresql_timings_json")
+    if not path or not stats.timings():
+        return
+    timings_path = Path(path)
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker:
+        timings_path = timings_path.with_name(f"{timings_path.stem}.{worker}{timings_path.suffix}")
+    stats.export(timings_path)
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter) -> None:
+    """Report statistics gathered by pytest-postgresql, in verbose mode, and timings if enabled."""
+    config = terminalreporter.config
+    if config.getoption("postgresql_timings") or config.getini("postgresql_timings"):
+        _write_timings(terminalreporter)
+    _write_query_stats(terminalreporter)
+    counters = stats.counters()
+    _write_reuse(terminalreporter, counters)
+    if not counters or config.getoption("verbose") < 1:
+        return
+    terminalreporter.write_sep("=", "postgresql")
+    for name, value in sorted(counters.items()):
+        terminalreporter.write_line(f"{name}: {value:g}")
+    if counters.get("sql load time [s]"):
+        throughput = counters["sql loaded [MB]"] / counters["sql load time [s]"]
+        terminalreporter.write_line(f"sql load throughput [MB/s]: {throughput:.1f}")
+
+
+def _write_reuse(terminalreporter: TerminalReporter, counters: Dict[str, float]) -> None:
+    """Write how many tests got a database left clean by the previous test."""
+    reused = counters.get("clean databases reused", 0)
+    tests = reused + counters.get("clean databases missed", 0)
+    if tests:
+        terminalreporter.write_line(
+            f"postgresql: {reused:g} of {tests:g} tests reused clean database "
+            f"({reused / tests:.0%})"
+        )
+
+
+def _write_timings(terminalreporter: TerminalReporter) -> None:
+    """Write phase timings' totals and percentiles, and the slowest tests."""
+    summary = stats.summary()
+    if not summary:
+        return
+    terminalreporter.write_sep("=", "postgresql timings")
+    terminalreporter.write_line(
+        f"{'phase':<20}{'count':>8}{'total [s]':>12}"
+        f"{'p50 [ms]':>10}{'p95 [ms]':>10}{'max [ms]':>10}"
+    )
+    for phase, timing in summary.items():
+        terminalreporter.write_line(
+            f"{phase:<20}{timing['count']:>8}{timing['total']:>12.2f}"
+            f"{timing['p50'] * 1000:>10.1f}{timing['p95'] * 1000:>10.1f}"
+            f"{timing['max'] * 1000:>10.1f}"
+        )
+    slowest = stats.slowest_tests(SLOWEST_TESTS)
+    if not slowest:
+        return
+    terminalreporter.write_line("")
+    terminalreporter.write_line(f"slowest {len(slowest)} tests by database setup and teardown:")
+    for cost in slowest:
+        terminalreporter.write_line(
+            f"{cost['total'] * 1000:>10.1f} ms  {cost['test']} "
+            f"(setup {cost.get('test setup', 0) * 1000:.1f} ms, "
+            f"teardown {cost.get('test teardown', 0) * 1000:.1f} ms)"
+        )
+
+
+def _write_query_stats(terminalreporter: TerminalReporter) -> None:
+    """Write the most expensive queries, and the tests running the most expensive queries."""
+    top_queries = query_stats.top_queries(TOP_QUERIES)
+    if not top_queries:
+        return
+    terminalreporter.write_sep("=", "postgresql queries")
+    terminalreporter.write_line(
+        f"{'total [ms]':>12}{'calls':>8}{'mean [ms]':>11}{'rows':>10}{'hit blocks':>12}  query"
+    )
+    for query, stat in top_queries:
+        terminalreporter.write_line(
+            f"{stat.total_time:>12.1f}{stat.calls:>8}{stat.total_time / stat.calls:>11.2f}"
+            f"{stat.rows:>10}{stat.shared_blks_hit:>12}  {' '.join(query.split())[:200]}"
+        )
+    terminalreporter.write_line("")
+    terminalreporter.write_line("tests by time spent in queries:")
+    for test, stat in query_stats.top_tests(SLOWEST_TESTS):
+        terminalreporter.write_line(
+            f"{stat.total_time:>12.1f} ms  {test} ({stat.calls} calls, {stat.rows} rows, "
+            f"{stat.shared_blks_hit} hit blocks)"
+        )
+
 
 postgresql_proc = factories.postgresql_proc()
 postgresql_noproc = factories.postgresql_noproc()
 postgresql = factories.postgresql("postgresql_proc")
+postgresql_queries = factories.query_counter("postgresql")
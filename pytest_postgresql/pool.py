@@ -0,0 +1,147 @@
+"""Pool of databases created from template ahead of time."""
+
+import time
+import uuid
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import List, Optional, Union
+
+import psycopg
+
+from pytest_postgresql import stats
+from pytest_postgresql.drop_queue import DropQueue
+from pytest_postgresql.janitor import DatabaseJanitor, Version
+
+
+def unique_dbname(dbname: str) -> str:
+    """Return unique database name, starting with dbname."""
+    return f"{dbname}_{uuid.uuid4().hex[:8]}"
+
+
+class DatabasePool:
+    """Databases created from template by a background thread, ready to be taken by tests.
+
+    Background thread keeps up to size databases ready, so tests
+    only wait for the database to be created when the pool runs dry.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int,
+        user: str,
+        host: str,
+        port: Union[str, int],
+        version: Union[str, float, Version],  # type: ignore[valid-type]
+        dbname: str,
+        template_dbname: str,
+        password: Optional[str] = None,
+        isolation_level: "Optional[psycopg.IsolationLevel]" = None,
+        drop_queue: Optional[DropQueue] = None,
+        create_strategy: str = "auto",
+    ) -> None:
+        """Initialize database pool.
+
+        :param size: number of databases to keep ready
+        :param user: postgresql username
+        :param host: postgresql host
+        :param port: postgresql port
+        :param version: postgresql version number
+        :param dbname: prefix of created databases' names
+        :param template_dbname: template database name
+        :param password: optional postgresql password
+        :param isolation_level: optional postgresql isolation level
+            defaults to server's default
+        :param drop_queue: optional queue to drop released databases in the background
+        :param create_strategy: strategy of cloning the template database
+        """
+        self.size = size
+        self.user = user
+        self.host = host
+        self.port = port
+        self.version = version
+        self.dbname = dbname
+        self.template_dbname = template_dbname
+        self.password = password
+        self.isolation_level = isolation_level
+        self.drop_queue = drop_queue
+        self.create_strategy = create_strategy
+        self._ready: "Queue[DatabaseJanitor]" = Queue(maxsize=size)
+        self._stop = Event()
+        self._error: Optional[Exception] = None
+        self._thread: Optional[Thread] = None
+
+    def janitor(self, dbname: str) -> DatabaseJanitor:
+        """Return janitor for one of pool's databases."""
+        return DatabaseJanitor(
+            user=self.user,
+            host=self.host,
+            port=self.port,
+            dbname=dbname,
+            template_dbname=self.template_dbname,
+            version=self.version,
+            password=self.password,
+            isolation_level=self.isolation_level,
+            create_strategy=self.create_strategy,
+        )
+
+    def start(self) -> None:
+        """Start filling the pool in the background."""
+        self._thread = Thread(target=self._fill, name=f"pytest-postgresql-pool-{self.dbname}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _fill(self) -> None:
+        """Create databases, until stopped."""
+        try:
+            while not self._stop.is_set():
+                janitor = self.janitor(unique_dbname(self.dbname))
+                janitor.init()
+                while True:
+                    try:
+                        self._ready.put(janitor, timeout=0.1)
+                        break
+                    except Full:
+                        if self._stop.is_set():
+                            janitor.drop()
+                            return
+        except Exception as exc:
+            self._error = exc
+
+    def acquire(self) -> DatabaseJanitor:
+        """Take janitor of a ready database, waiting for one if the pool is empty."""
+        stats.incr("pool databases taken")
+        try:
+            return self._ready.get_nowait()
+        except Empty:
+            pass
+        stats.incr("pool waits")
+        start = time.monotonic()
+        try:
+            while True:
+                if self._error is not None:
+                    raise RuntimeError("Creating pool database failed.") from self._error
+                try:
+                    return self._ready.get(timeout=0.1)
+                except Empty:
+                    continue
+        finally:
+            stats.incr("pool wait time [s]", time.monotonic() - start)
+
+    def release(self, janitor: DatabaseJanitor) -> None:
+        """Drop database taken from the pool."""
+        if self.drop_queue is not None:
+            self.drop_queue.put(janitor)
+        else:
+            janitor.drop()
+
+    def close(self) -> None:
+        """Stop filling the pool, and drop databases that were not taken."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        leftovers: List[DatabaseJanitor] = []
+        while not self._ready.empty():
+            leftovers.append(self._ready.get_nowait())
+        for janitor in leftovers:
+            janitor.drop()
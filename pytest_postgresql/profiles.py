@@ -0,0 +1,56 @@
+"""Named sets of server settings, passed to postgres on start."""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from packaging.version import parse
+
+
+class Setting(NamedTuple):
+    """Server setting, available since min_version."""
+
+    name: str
+    value: str
+    min_version: Optional[str] = None
+
+
+PROFILES: Dict[str, List[Setting]] = {
+    "default": [],
+    # Trades durability for speed. Data does not survive a server crash,
+    # which does not matter for a cluster thrown away after the test session.
+    "ephemeral": [
+        Setting("fsync", "off"),
+        Setting("synchronous_commit", "off"),
+        Setting("full_page_writes", "off"),
+        Setting("wal_level", "minimal"),
+        Setting("max_wal_senders", "0"),
+        Setting("archive_mode", "off"),
+        Setting("checkpoint_timeout", "1d"),
+        Setting("max_wal_size", "4GB"),
+        Setting("jit", "off", "11"),
+        Setting("wal_init_zero", "off", "12"),
+        Setting("wal_recycle", "off", "12"),
+    ],
+}
+
+
+def profile_settings(profile: str, version: Any) -> List[Setting]:
+    """Return profile's settings supported by given server version."""
+    try:
+        settings = PROFILES[profile]
+    except KeyError as ex:
+        raise ValueError(
+            f"Unknown postgresql profile {profile!r}, choose one of: {', '.join(PROFILES)}"
+        ) from ex
+    version = parse(str(version))
+    return [
+        setting
+        for setting in settings
+        if setting.min_version is None or version >= parse(setting.min_version)
+    ]
+
+
+def profile_options(profile: str, version: Any) -> str:
+    """Return profile's settings as postgres command line options."""
+    return " ".join(
+        f"-c {setting.name}={setting.value}" for setting in profile_settings(profile, version)
+    )
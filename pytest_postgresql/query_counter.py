@@ -0,0 +1,132 @@
+"""Counting statements executed on client fixture's connection, to catch N+1 queries."""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from psycopg import Connection, Cursor, sql
+from psycopg.abc import AdaptContext
+
+# Literals and parameters replaced when normalizing statements.
+_NORMALIZE_RE = re.compile(
+    r"""
+    '(?:[^']|'')*'               # string literal
+    | \$\d+ | %\(\w+\)s | %s     # parameter placeholder
+    | \b\d+(?:\.\d+)?\b          # number
+    """,
+    re.VERBOSE,
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+# Statements that only control the transaction are not counted.
+_TRANSACTION_CONTROL_RE = re.compile(
+    r"\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|START\s+TRANSACTION)\b", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize(statement: str) -> str:
+    """Return statement's text with literals and parameters replaced with placeholders.
+
+    Lists of values (i.e. in IN clauses) collapse into one placeholder,
+    so statements differing only in the number of values normalize the same.
+    """
+    normalized = _NORMALIZE_RE.sub("?", statement)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+class QueryCounter:
+    """Statements executed on a connection, with assertion helpers.
+
+    Statements are recorded as executed, and normalized only
+    when repeated statements are looked for, to keep the overhead low.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty counter."""
+        self.statements: List[str] = []
+
+    def record(self, statement: str) -> None:
+        """Record statement executed on the connection."""
+        if not _TRANSACTION_CONTROL_RE.match(statement):
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        """Return number of statements executed."""
+        return len(self.statements)
+
+    def reset(self) -> None:
+        """Forget statements executed so far, i.e. after test's own data setup."""
+        self.statements.clear()
+
+    def repeated(self, min_count: int = 2) -> Dict[str, int]:
+        """Return normalized statements executed at least min_count times."""
+        counts = Counter(normalize(statement) for statement in self.statements)
+        return {statement: count for statement, count in counts.most_common() if count >= min_count}
+
+    def assert_max_queries(self, max_queries: int) -> None:
+        """Assert that no more than max_queries statements were executed."""
+        assert (
+            self.count <= max_queries
+        ), f"{self.count} queries executed, expected at most {max_queries}:\n" + "\n".join(
+            f"  {statement}" for statement in self.statements
+        )
+
+    def repeated_message(self, max_repeats: int) -> Optional[str]:
+        """Describe normalized statements executed more than max_repeats times, if any."""
+        repeated = self.repeated(max_repeats + 1)
+        if not repeated:
+            return None
+        return f"Statements executed more than {max_repeats} times, possible N+1 queries:\n" + (
+            "\n".join(f"  {count}x {statement}" for statement, count in repeated.items())
+        )
+
+    def assert_no_repeated(self, max_repeats: int = 1) -> None:
+        """Assert that no normalized statement was executed more than max_repeats times.
+
+        Statements run in a loop, once for each row fetched before, are typical of N+1 queries.
+        """
+        message = self.repeated_message(max_repeats)
+        assert message is None, message
+
+    def cursor_class(self, base: Type[Cursor]) -> Type[Cursor]:
+        """Return cursor class recording statements executed with it into this counter."""
+        counter = self
+
+        class CountingCursor(base):  # type: ignore[valid-type,misc]
+            """Cursor recording executed statements."""
+
+            def execute(self, query: Any, *args: Any, **kwargs: Any) -> Any:
+                """Record and execute the statement."""
+                counter.record(statement_text(query, self))
+                return super().execute(query, *args, **kwargs)
+
+            def executemany(self, query: Any, *args: Any, **kwargs: Any) -> Any:
+                """Record the statement, executed in a batch, and execute it."""
+                counter.record(statement_text(query, self))
+                return super().executemany(query, *args, **kwargs)
+
+        return CountingCursor
+
+    def attach(self, connection: Connection) -> Type[Cursor]:
+        """Start counting statements executed on the connection.
+
+        :returns: connection's previous cursor factory, to restore afterwards
+        """
+        previous: Type[Cursor] = connection.cursor_factory
+        connection.cursor_factory = self.cursor_class(previous)
+        return previous
+
+
+def statement_text(query: Any, context: AdaptContext) -> str:
+    """Return text of the query passed to execute."""
+    if isinstance(query, str):
+        return query
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+    if isinstance(query, sql.Composable):
+        return query.as_string(context)
+    return str(query)
@@ -0,0 +1,143 @@
+"""Per-test query statistics, gathered from pg_stat_statements."""
+
+import re
+from threading import Lock
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+from psycopg import Connection, Cursor
+
+from pytest_postgresql.capabilities import Capabilities
+from pytest_postgresql.janitor import DatabaseJanitor
+
+# Utility statements are not tracked, so savepoints set up by the
+# transaction reset mode don't crowd out the tests' own queries.
+SERVER_OPTIONS = "-c pg_stat_statements.track_utility=off"
+# Libraries preloaded with postgres options.
+_PRELOAD_RE = re.compile(r"(?:-c\s*|--)shared[_-]preload[_-]libraries=('[^']*'|\"[^\"]*\"|\S*)\s*")
+
+
+def server_options(postgres_options: str) -> str:
+    """Return postgres options loading pg_stat_statements, along with the given ones.
+
+    Libraries preloaded by the given options are merged into one setting with
+    pg_stat_statements, as the last setting would replace the ones before it.
+    """
+    libraries = ["pg_stat_statements"]
+    for value in _PRELOAD_RE.findall(postgres_options):
+        for library in map(str.strip, value.strip("'\"").split(",")):
+            if library and library not in libraries:
+                libraries.append(library)
+    options = f"-c shared_preload_libraries={','.join(libraries)} {SERVER_OPTIONS}"
+    others = _PRELOAD_RE.sub("", postgres_options).strip()
+    return f"{options} {others}" if others else options
+
+
+class QueryStat(NamedTuple):
+    """Statistics of a normalized query, or of all queries run by a test."""
+
+    calls: int = 0
+    total_time: float = 0.0
+    rows: int = 0
+    shared_blks_hit: int = 0
+
+    def __add__(self, other: Tuple) -> "QueryStat":
+        """Sum statistics."""
+        return QueryStat(*(mine + theirs for mine, theirs in zip(self, other)))
+
+    def __sub__(self, other: Tuple) -> "QueryStat":
+        """Subtract statistics."""
+        return QueryStat(*(mine - theirs for mine, theirs in zip(self, other)))
+
+
+Snapshot = Dict[str, QueryStat]
+
+_lock = Lock()
+_queries: Dict[str, QueryStat] = {}
+_tests: Dict[str, QueryStat] = {}
+
+
+def create_extension(janitor: DatabaseJanitor) -> None:
+    """Create pg_stat_statements extension in the template and maintenance databases.
+
+    Statistics are read through the maintenance connection to the postgres database,
+    so reading them doesn't add queries to the test database's statistics.
+    """
+    assert janitor.template_dbname
+    for dbname in ("postgres", janitor.template_dbname):
+        with janitor.cursor(dbname) as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+
+
+def snapshot(cur: Cursor, dbname: str, capabilities: Capabilities) -> Snapshot:
+    """Read current statistics of queries run in the database."""
+    time_column = "total_exec_time" if capabilities.stat_statements_exec_time else "total_time"
+    cur.execute(
+        f"SELECT query, sum(calls), sum({time_column}), sum(rows), sum(shared_blks_hit) "
+        "FROM pg_stat_statements "
+        "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = %s) "
+        "GROUP BY query",
+        (dbname,),
+    )
+    return {
+        query: QueryStat(int(calls), float(total_time), int(rows), int(shared_blks_hit))
+        for query, calls, total_time, rows, shared_blks_hit in cur.fetchall()
+    }
+
+
+def record(test: str, before: Snapshot, after: Snapshot) -> QueryStat:
+    """Attribute queries run between the snapshots to the test.
+
+    :returns: statistics of all queries run by the test
+    """
+    test_stat = QueryStat()
+    with _lock:
+        for query, stat in after.items():
+            delta = stat - before.get(query, QueryStat())
+            if delta.calls <= 0:
+                continue
+            _queries[query] = _queries.get(query, QueryStat()) + delta
+            test_stat += delta
+        _tests[test] = _tests.get(test, QueryStat()) + test_stat
+    return test_stat
+
+
+def tracked_fixture(
+    fixture: Iterator[Connection], janitor: DatabaseJanitor, test: str
+) -> Iterator[Connection]:
+    """Wrap client fixture, attributing queries run in its database to the test."""
+    connection = next(fixture)
+    dbname = connection.info.dbname
+    try:
+        with janitor.cursor() as cur:
+            before = snapshot(cur, dbname, janitor.capabilities)
+    except BaseException:
+        next(fixture, None)
+        raise
+    yield connection
+    try:
+        with janitor.cursor() as cur:
+            after = snapshot(cur, dbname, janitor.capabilities)
+        record(test, before, after)
+    finally:
+        next(fixture, None)
+
+
+def top_queries(count: int) -> List[Tuple[str, QueryStat]]:
+    """Return normalized queries that took the most time in the session."""
+    with _lock:
+        queries = list(_queries.items())
+    return sorted(queries, key=lambda item: item[1].total_time, reverse=True)[:count]
+
+
+def top_tests(count: int) -> List[Tuple[str, QueryStat]]:
+    """Return tests, whose queries took the most time."""
+    with _lock:
+        tests = list(_tests.items())
+    return sorted(tests, key=lambda item: item[1].total_time, reverse=True)[:count]
+
+
+def clear() -> None:
+    """Remove all gathered query statistics."""
+    with _lock:
+        _queries.clear()
+        _tests.clear()
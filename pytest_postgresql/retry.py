@@ -1,9 +1,12 @@
 """Small retry callable in case of specific error occurred."""
 
+import asyncio
 import datetime
 import sys
 from time import sleep
-from typing import Callable, Type, TypeVar
+from typing import Awaitable, Callable, Type, TypeVar
+
+from pytest_postgresql import stats
 
 T = TypeVar("T")
 
@@ -12,6 +15,8 @@ def retry(
     func: Callable[[], T],
     timeout: int = 60,
     possible_exception: Type[Exception] = Exception,
+    initial_delay: float = 0.01,
+    max_delay: float = 1,
 ) -> T:
     """Attempt to retry the function for timeout time.
 
@@ -21,9 +26,13 @@ def retry(
 
     ... ::
         FATAL:  the database system is starting up
+
+    Delay between attempts starts at initial_delay
+    and doubles after each failed attempt, up to max_delay.
     """
     time: datetime.datetime = get_current_datetime()
     timeout_diff: datetime.timedelta = datetime.timedelta(seconds=timeout)
+    delay = initial_delay
     i = 0
     while True:
         i += 1
@@ -33,7 +42,37 @@ def retry(
         except possible_exception as e:
             if time + timeout_diff < get_current_datetime():
                 raise TimeoutError(f"Failed after {i} attempts") from e
-            sleep(1)
+            sleep(delay)
+            stats.record("retry wait", delay)
+            delay = min(delay * 2, max_delay)
+
+
+async def retry_async(
+    func: Callable[[], Awaitable[T]],
+    timeout: int = 60,
+    possible_exception: Type[Exception] = Exception,
+    initial_delay: float = 0.01,
+    max_delay: float = 1,
+) -> T:
+    """Attempt to retry the coroutine function for timeout time.
+
+    Asynchronous counterpart of :func:`retry`.
+    """
+    time: datetime.datetime = get_current_datetime()
+    timeout_diff: datetime.timedelta = datetime.timedelta(seconds=timeout)
+    delay = initial_delay
+    i = 0
+    while True:
+        i += 1
+        try:
+            res = await func()
+            return res
+        except possible_exception as e:
+            if time + timeout_diff < get_current_datetime():
+                raise TimeoutError(f"Failed after {i} attempts") from e
+            await asyncio.sleep(delay)
+            stats.record("retry wait", delay)
+            delay = min(delay * 2, max_delay)
 
 
 def get_current_datetime() -> datetime.datetime:
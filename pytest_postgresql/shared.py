@@ -0,0 +1,96 @@
+"""Server shared by all xdist workers of a test session."""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pytest_postgresql.datadir import pid_alive
+
+State = Dict[str, Any]
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold exclusive lock on the file, blocking until other processes release it."""
+    with path.open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SharedServer:
+    """Server started by the first worker attaching to it, and stopped by the last one leaving.
+
+    Server's connection details and pids of workers using it
+    are kept in a state file, guarded by a file lock.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize shared server.
+
+        :param path: directory shared by the workers, to keep the lock and state files in
+        """
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock_path = path / "lock"
+        self._state_path = path / "state.json"
+
+    def _read(self) -> Optional[State]:
+        """Read the state file."""
+        try:
+            state: State = json.loads(self._state_path.read_text())
+        except FileNotFoundError:
+            return None
+        return state
+
+    def _write(self, state: State) -> None:
+        """Write the state file."""
+        self._state_path.write_text(json.dumps(state))
+
+    @staticmethod
+    def _workers(state: Optional[State]) -> List[int]:
+        """Return pids of workers using the server, that are still alive."""
+        if state is None:
+            return []
+        return [pid for pid in state["workers"] if pid_alive(pid)]
+
+    def attach(self, start: Callable[[], State], stop: Callable[[State], None]) -> State:
+        """Attach current process to the server, starting it if nobody uses it.
+
+        :param start: starts the server and returns its connection details
+        :param stop: stops the server, left behind by workers that are gone
+        :returns: server's connection details
+        """
+        with file_lock(self._lock_path):
+            state = self._read()
+            workers = self._workers(state)
+            if not workers:
+                if state is not None:
+                    stop(state)
+                state = start()
+            assert state is not None
+            state["workers"] = workers + [os.getpid()]
+            self._write(state)
+            return state
+
+    def detach(self, stop: Callable[[State], None]) -> None:
+        """Detach current process from the server, stopping it if it was the last one to use it.
+
+        :param stop: stops the server
+        """
+        with file_lock(self._lock_path):
+            state = self._read()
+            if state is None:
+                return
+            workers = [pid for pid in self._workers(state) if pid != os.getpid()]
+            if workers:
+                state["workers"] = workers
+                self._write(state)
+                return
+            stop(state)
+            self._state_path.unlink()
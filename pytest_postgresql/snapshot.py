@@ -0,0 +1,130 @@
+"""Snapshots of populated template databases, reused between test sessions."""
+
+import hashlib
+import inspect
+import os
+import subprocess
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from pytest_postgresql.cache import DirectoryCache, cache_key
+from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.loader import LoadStep, build_loader, pg_restore
+
+
+def _digest_path(path: Path) -> str:
+    """Return digest of file contents, or of all files' contents for directories."""
+    digest = hashlib.sha256()
+    paths = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for file_path in paths:
+        digest.update(file_path.relative_to(path).as_posix().encode("utf-8"))
+        with file_path.open("rb") as _fd:
+            for chunk in iter(partial(_fd.read, 1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source(func: Callable) -> str:
+    """Return source code of a loader callable, or its name if source is not available."""
+    if isinstance(func, partial):
+        return f"{_source(func.func)}{func.args!r}{sorted(func.keywords.items())!r}"
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+def _step_fingerprint(step: LoadStep, load_version: Optional[str]) -> str:
+    """Fingerprint single load step, or a group of them."""
+    if isinstance(step, (list, tuple)):
+        branches = ",".join(_step_fingerprint(branch, load_version) for branch in step)
+        return f"{type(step).__name__}:[{branches}]"
+    if isinstance(step, Path):
+        return f"path:{_digest_path(step)}"
+    if load_version is not None:
+        return f"version:{load_version}"
+    return f"source:{_source(build_loader(step))}"
+
+
+def load_fingerprint(
+    load: Iterable[LoadStep],
+    version: Any,
+    load_version: Optional[str] = None,
+) -> str:
+    """Fingerprint everything the template database's contents depend on.
+
+    :param load: list of loaders populating the template database
+    :param version: postgresql server version
+    :param load_version: explicit version of the loaders, used instead
+        of the loader callables' source code. Useful when callables
+        load data from sources not visible in their code (i.e. migrations).
+    """
+    parts = [str(version)]
+    for step in load:
+        parts.append(_step_fingerprint(step, load_version))
+    return cache_key("template", *parts)
+
+
+class TemplateSnapshots:
+    """Custom format dumps of populated template databases, stored in a directory cache."""
+
+    FILENAME = "template.dump"
+
+    def __init__(self, cache: DirectoryCache, bindir: str) -> None:
+        """Initialize template snapshots.
+
+        :param cache: cache to store template database dumps in
+        :param bindir: directory with pg_dump and pg_restore executables
+        """
+        self.cache = cache
+        self.bindir = bindir
+
+    def restore(self, key: str, janitor: DatabaseJanitor) -> bool:
+        """Restore snapshot into janitor's template database.
+
+        :returns: whether the snapshot was found in cache.
+        """
+        entry = self.cache.lookup(key)
+        if entry is None:
+            return False
+        assert janitor.template_dbname
+        pg_restore(
+            entry / self.FILENAME,
+            executable=os.path.join(self.bindir, "pg_restore"),
+            jobs=os.cpu_count(),
+            host=janitor.host,
+            port=janitor.port,
+            user=janitor.user,
+            dbname=janitor.template_dbname,
+            password=janitor.password,
+        )
+        return True
+
+    def store(self, key: str, janitor: DatabaseJanitor) -> None:
+        """Dump janitor's template database into the cache."""
+        assert janitor.template_dbname
+        env = dict(os.environ)
+        if janitor.password:
+            env["PGPASSWORD"] = janitor.password
+        with self.cache.writing(key) as entry:
+            entry.mkdir()
+            subprocess.check_output(
+                [
+                    os.path.join(self.bindir, "pg_dump"),
+                    "--host",
+                    str(janitor.host),
+                    "--port",
+                    str(janitor.port),
+                    "--username",
+                    janitor.user,
+                    "--dbname",
+                    janitor.template_dbname,
+                    "--no-password",
+                    "--format=custom",
+                    "--file",
+                    str(entry / self.FILENAME),
+                ],
+                env=env,
+                stderr=subprocess.STDOUT,
+            )
@@ -0,0 +1,178 @@
+"""Reading sql files statement by statement, without loading them into memory as a whole."""
+
+import gzip
+import io
+import lzma
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+SQL_SUFFIXES = (".sql", ".sql.gz", ".sql.xz", ".sql.zst")
+
+_SPECIAL_RE = re.compile(r"""['";$]|--|/\*""")
+_DOLLAR_TAG_RE = re.compile(r"\$(?:[A-Za-z_\u0080-\uffff][A-Za-z_0-9\u0080-\uffff]*)?\$")
+_IDENTIFIER_CHAR_RE = re.compile(r"[A-Za-z_0-9$\u0080-\uffff]")
+_COMMENT_RE = re.compile(r"/\*|\*/")
+_ESCAPE_STRING_RE = re.compile(r"\\.|'", re.DOTALL)
+_COPY_FROM_STDIN_RE = re.compile(r"COPY\b[^;]*\bFROM\s+STDIN\b", re.IGNORECASE)
+
+Statement = Tuple[str, Optional[Iterator[str]]]
+
+
+def is_sql_file(path: str) -> bool:
+    """Check whether the path points to a, possibly compressed, sql file."""
+    return path.endswith(SQL_SUFFIXES)
+
+
+def open_sql(path: Path) -> TextIO:
+    """Open sql file for reading text, decompressing it based on its suffix.
+
+    Position of the file's binary buffer counts decompressed bytes read.
+    """
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".xz":
+        return lzma.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as ex:
+            raise ImportError(
+                "Loading zstandard compressed sql files requires zstandard to be installed."
+            ) from ex
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True),
+            encoding="utf-8",
+        )
+    return path.open("r", encoding="utf-8")
+
+
+def _is_copy_from_stdin(statement: str) -> bool:
+    """Check whether the statement is COPY FROM STDIN, followed by data lines."""
+    code = "\n".join(line for line in statement.splitlines() if not line.lstrip().startswith("--"))
+    return _COPY_FROM_STDIN_RE.match(code.lstrip()) is not None
+
+
+def _copy_data(lines: Iterator[str], chunk_size: int) -> Iterator[str]:
+    r"""Yield COPY data in chunks of about chunk_size characters, up to the \. line."""
+    chunk: List[str] = []
+    size = 0
+    for line in lines:
+        if line.rstrip("\r\n") == "\\.":
+            break
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def split_sql(lines: Iterable[str], copy_chunk_size: int = 1024 * 1024) -> Iterator[Statement]:
+    """Split sql script into statements, reading it line by line.
+
+    Semicolons inside quoted strings and identifiers, dollar quoted strings
+    and comments do not end statements.
+
+    :param lines: lines of the sql script
+    :param copy_chunk_size: size of the COPY data chunks, in characters
+    :returns: iterator of statements, along with the iterator of COPY data chunks
+        for COPY FROM STDIN statements. COPY data has to be consumed
+        before moving on to the next statement.
+    """
+    line_iter = iter(lines)
+    buffer: List[str] = []
+    has_code = False
+    # None outside of quotes and comments, otherwise the sequence closing them
+    closing: Optional[str] = None
+    comment_depth = 0
+    for line in line_iter:
+        position = 0
+        start = 0
+        length = len(line)
+        while position < length:
+            if closing is None:
+                match = _SPECIAL_RE.search(line, position)
+                if match is None:
+                    has_code = has_code or bool(line[position:].strip())
+                    break
+                has_code = has_code or bool(line[position : match.start()].strip())
+                token = match.group()
+                position = match.end()
+                if token == "--":
+                    break
+                if token == "/*":
+                    closing, comment_depth = "*/", 1
+                    continue
+                has_code = True
+                if token == ";":
+                    buffer.append(line[start:position])
+                    statement = "".join(buffer).strip()
+                    buffer = []
+                    start = position
+                    has_code = False
+                    if not _is_copy_from_stdin(statement):
+                        yield statement, None
+                        continue
+                    # data starts on the next line
+                    copy_data = _copy_data(line_iter, copy_chunk_size)
+                    yield statement, copy_data
+                    for _ in copy_data:
+                        pass
+                    start = position = length
+                elif token == "$":
+                    previous = line[match.start() - 1] if match.start() else ""
+                    tag = _DOLLAR_TAG_RE.match(line, match.start())
+                    if tag is not None and not _IDENTIFIER_CHAR_RE.match(previous):
+                        closing = tag.group()
+                        position = tag.end()
+                elif token == "'":
+                    previous = line[match.start() - 1] if match.start() > 0 else ""
+                    before = line[match.start() - 2] if match.start() > 1 else ""
+                    if previous in ("E", "e") and not _IDENTIFIER_CHAR_RE.match(before):
+                        closing = "\\'"
+                    else:
+                        closing = "'"
+                else:
+                    closing = '"'
+            elif closing == "*/":
+                match = _COMMENT_RE.search(line, position)
+                if match is None:
+                    break
+                position = match.end()
+                comment_depth += 1 if match.group() == "/*" else -1
+                if not comment_depth:
+                    closing = None
+            elif closing == "\\'":
+                # escape string constant, where backslash escapes the quote
+                match = _ESCAPE_STRING_RE.search(line, position)
+                if match is None:
+                    break
+                position = match.end()
+                if match.group() == "'" and not line.startswith("'", position):
+                    closing = None
+                elif match.group() == "'":
+                    position += 1
+            elif closing in ("'", '"'):
+                end = line.find(closing, position)
+                if end == -1:
+                    break
+                position = end + 1
+                if line.startswith(closing, position):
+                    # doubled quote is an escaped quote
+                    position += 1
+                else:
+                    closing = None
+            else:
+                end = line.find(closing, position)
+                if end == -1:
+                    break
+                position = end + len(closing)
+                closing = None
+        if start < length:
+            buffer.append(line[start:])
+    statement = "".join(buffer).strip()
+    if has_code and statement:
+        yield statement, None
@@ -0,0 +1,130 @@
+"""Statistics gathered during the test session, reported in the terminal summary."""
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_lock = Lock()
+_counters: Dict[str, float] = {}
+_timings: Dict[str, List[float]] = {}
+_test_timings: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Increase counter by value."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def counters() -> Dict[str, float]:
+    """Return copy of all gathered counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def record(phase: str, seconds: float, test: Optional[str] = None) -> None:
+    """Record time spent in a phase.
+
+    :param phase: name of the phase
+    :param seconds: time spent
+    :param test: node id of the test the time is attributed to
+    """
+    with _lock:
+        _timings.setdefault(phase, []).append(seconds)
+        if test is not None:
+            test_phases = _test_timings.setdefault(test, {})
+            test_phases[phase] = test_phases.get(phase, 0) + seconds
+
+
+@contextmanager
+def timer(phase: str, test: Optional[str] = None) -> Iterator[None]:
+    """Record time spent in the with block as a phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start, test)
+
+
+def timed_fixture(fixture: Iterator[T], test: str) -> Iterator[T]:
+    """Wrap generator fixture, recording its setup and teardown time for the test."""
+    with timer("test setup", test):
+        value = next(fixture)
+    yield value
+    with timer("test teardown", test):
+        next(fixture, None)
+
+
+async def timed_async_fixture(fixture: AsyncIterator[T], test: str) -> AsyncIterator[T]:
+    """Wrap asynchronous generator fixture, recording its setup and teardown time for the test."""
+    with timer("test setup", test):
+        value = await fixture.__anext__()
+    yield value
+    with timer("test teardown", test):
+        async for _ in fixture:
+            pass
+
+
+def timings() -> Dict[str, List[float]]:
+    """Return copy of all recorded phase timings."""
+    with _lock:
+        return {phase: list(samples) for phase, samples in _timings.items()}
+
+
+def test_timings() -> Dict[str, Dict[str, float]]:
+    """Return copy of phase timings attributed to the tests."""
+    with _lock:
+        return {test: dict(phases) for test, phases in _test_timings.items()}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the percentile of samples, using the nearest-rank method."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Summarize recorded timings of each phase."""
+    return {
+        phase: {
+            "count": len(samples),
+            "total": sum(samples),
+            "p50": percentile(samples, 0.5),
+            "p95": percentile(samples, 0.95),
+            "max": max(samples),
+        }
+        for phase, samples in sorted(timings().items())
+    }
+
+
+def slowest_tests(count: int) -> List[Dict[str, Any]]:
+    """Return tests with the highest database setup and teardown cost."""
+    costs = [
+        {"test": test, "total": sum(phases.values()), **phases}
+        for test, phases in test_timings().items()
+    ]
+    return sorted(costs, key=lambda cost: cost["total"], reverse=True)[:count]
+
+
+def export(path: Path) -> None:
+    """Write counters, phase timings and tests' timings to the json file."""
+    data = {
+        "counters": counters(),
+        "phases": summary(),
+        "tests": test_timings(),
+    }
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def clear() -> None:
+    """Remove all gathered counters and timings."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+        _test_timings.clear()
@@ -0,0 +1,125 @@
+"""Tracking changes made to a database by the tests, to tell which tables they changed."""
+
+from typing import Callable, Dict, List, Tuple
+
+from psycopg import Cursor
+
+from pytest_postgresql.janitor import DatabaseJanitor
+
+# Schema keeping the log of tables changed by the test, along with other bookkeeping.
+SCHEMA = "pytest_postgresql"
+# Logged instead of a table, when the schema was changed.
+SCHEMA_CHANGED = 0
+
+_SETUP = f"""
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.changed (relid oid PRIMARY KEY);
+CREATE FUNCTION {SCHEMA}.log_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO {SCHEMA}.changed VALUES (TG_ARGV[0]::oid) ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END
+$$;
+CREATE FUNCTION {SCHEMA}.log_ddl() RETURNS event_trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO {SCHEMA}.changed VALUES ({SCHEMA_CHANGED}) ON CONFLICT DO NOTHING;
+END
+$$;
+CREATE TABLE {SCHEMA}.sequences AS
+    SELECT format('%I.%I', schemaname, sequencename)::regclass AS seq,
+        COALESCE(last_value, start_value) AS value, last_value IS NOT NULL AS is_called
+    FROM pg_sequences;
+"""
+_EVENT_TRIGGER = (
+    "CREATE EVENT TRIGGER pytest_postgresql_ddl ON ddl_command_end "
+    f"EXECUTE PROCEDURE {SCHEMA}.log_ddl()"
+)
+_TABLES = f"""
+SELECT c.oid, format('%I.%I', n.nspname, c.relname), c.relkind = 'p', c.relispartition
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p')
+    AND n.nspname NOT IN ('information_schema', '{SCHEMA}') AND n.nspname NOT LIKE 'pg\\_%'
+"""
+# Sequences advanced without changing any table, i.e. with nextval() alone.
+_SEQUENCES_CHANGED = f"""
+SELECT FROM {SCHEMA}.sequences s
+JOIN pg_sequences p ON format('%I.%I', p.schemaname, p.sequencename)::regclass = s.seq
+WHERE (COALESCE(p.last_value, p.start_value), p.last_value IS NOT NULL)
+    IS DISTINCT FROM (s.value, s.is_called)
+"""
+
+# oid, qualified name, whether it's partitioned, whether it's a partition
+Relation = Tuple[int, str, bool, bool]
+
+
+def relations(cur: Cursor) -> Tuple[List[Relation], Callable[[int], int]]:
+    """Return tables of the database, and function mapping partitions to their partitioned table.
+
+    Changes to partitions are logged, and restored, as changes of the partitioned table.
+    """
+    cur.execute(_TABLES)
+    tables: List[Relation] = cur.fetchall()
+    cur.execute("SELECT inhrelid, inhparent FROM pg_inherits")
+    parents: Dict[int, int] = dict(cur.fetchall())
+    partitions = {oid for oid, _, _, is_partition in tables if is_partition}
+
+    def root(oid: int) -> int:
+        while oid in partitions:
+            oid = parents[oid]
+        return oid
+
+    return tables, root
+
+
+def install(cur: Cursor) -> bool:
+    """Set up triggers logging tables changed, and schema changes, in the database.
+
+    Statement level triggers log changed tables, and an event trigger logs schema changes.
+    Values of sequences are recorded, to compare them with.
+
+    :returns: whether tracking got installed, False if the database already had it
+    """
+    cur.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", (SCHEMA,))
+    if cur.fetchone() is not None:
+        return False
+    cur.execute(_SETUP)
+    tables, root = relations(cur)
+    for oid, name, _, _ in tables:
+        cur.execute(
+            f"CREATE TRIGGER pytest_postgresql_changed "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {name} "
+            f"FOR EACH STATEMENT EXECUTE PROCEDURE {SCHEMA}.log_change('{root(oid)}')"
+        )
+    cur.execute(_EVENT_TRIGGER)
+    return True
+
+
+def install_template(janitor: DatabaseJanitor) -> None:
+    """Set up tracking in the template database, for the test databases created out of it.
+
+    Done by the process fixture once the template is loaded, before any test database
+    is created, so that it doesn't race with other xdist workers sharing the server.
+    """
+    assert janitor.template_dbname
+    with janitor.cursor(janitor.template_dbname) as cur:
+        with cur.connection.transaction():
+            install(cur)
+
+
+def changes(cur: Cursor) -> Tuple[List[int], bool]:
+    """Return tables logged as changed, and whether any sequence was advanced."""
+    cur.execute(f"SELECT array(SELECT relid FROM {SCHEMA}.changed), EXISTS ({_SEQUENCES_CHANGED})")
+    row = cur.fetchone()
+    assert row is not None
+    changed, sequences_changed = row
+    return changed, sequences_changed
+
+
+def is_clean(cur: Cursor) -> bool:
+    """Check whether nothing was changed in the database, since tracking was installed.
+
+    Sequences advanced by rolled back transactions count as changes,
+    as the following tests would get different values out of them.
+    """
+    changed, sequences_changed = changes(cur)
+    return not changed and not sequences_changed
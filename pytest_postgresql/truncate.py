@@ -0,0 +1,139 @@
+"""Truncate reset mode: restoring tables changed by a test from their seed copies."""
+
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+import psycopg
+from psycopg import Connection
+
+from pytest_postgresql import stats, tracking
+from pytest_postgresql.capabilities import Capabilities
+from pytest_postgresql.tracking import SCHEMA, SCHEMA_CHANGED
+
+
+class Table(NamedTuple):
+    """Table restored from its seed copy."""
+
+    name: str
+    partitioned: bool
+    columns: str
+    rows: int
+
+
+class TruncateReset:
+    """Database shared by the tests, with tables changed by each test restored afterwards.
+
+    Statement level triggers log tables changed by the test. After the test, these tables
+    and tables referencing them are truncated, and their rows copied back from seed copies,
+    taken when the database was created, in one batch.
+    Partitions are restored along with their partitioned table.
+    """
+
+    def __init__(self, connection: Connection, capabilities: Capabilities) -> None:
+        """Initialize truncate reset of the connection's database.
+
+        :param connection: connection to the shared database, in autocommit mode
+        :param capabilities: capabilities of the server
+        """
+        self.connection = connection
+        self.capabilities = capabilities
+        # oid of a table: table
+        self.tables: Dict[int, Table] = {}
+        # oid of a table: oids of tables referencing it with foreign keys
+        self.referencing: Dict[int, Set[int]] = {}
+
+    def setup(self) -> None:
+        """Take seed copies of the tables, and set up triggers logging their changes."""
+        with self.connection.transaction(), self.connection.cursor() as cur:
+            tracking.install(cur)
+            relations, root = tracking.relations(cur)
+            generated = " AND attgenerated = ''" if self.capabilities.generated_columns else ""
+            cur.execute(
+                "SELECT attrelid, string_agg(quote_ident(attname), ', ' ORDER BY attnum) "
+                "FROM pg_attribute WHERE attrelid = ANY(%s) AND attnum > 0 AND NOT attisdropped"
+                f"{generated} GROUP BY attrelid",
+                ([oid for oid, _, _, _ in relations],),
+            )
+            columns: Dict[int, str] = dict(cur.fetchall())
+            for oid, name, partitioned, is_partition in relations:
+                if is_partition:
+                    continue
+                only = "" if partitioned else "ONLY "
+                cur.execute(
+                    f"CREATE TABLE {SCHEMA}.seed_{oid} AS "
+                    f"SELECT {columns.get(oid, '')} FROM {only}{name}"
+                )
+                self.tables[oid] = Table(name, partitioned, columns.get(oid, ""), cur.rowcount)
+            cur.execute("SELECT conrelid, confrelid FROM pg_constraint WHERE contype = 'f'")
+            for referencing, referenced in cur.fetchall():
+                self.referencing.setdefault(root(referenced), set()).add(root(referencing))
+            # forget seed copies created, logged as schema changes
+            cur.execute(f"DELETE FROM {SCHEMA}.changed")
+
+    def closure(self, changed: Iterable[int]) -> List[int]:
+        """Return changed tables, along with tables referencing them, directly or not.
+
+        Tables referencing a truncated table have to be truncated in the same statement.
+        """
+        tables: Set[int] = set()
+        pending = [oid for oid in changed if oid in self.tables]
+        while pending:
+            oid = pending.pop()
+            if oid in tables:
+                continue
+            tables.add(oid)
+            pending.extend(self.referencing.get(oid, ()))
+        return sorted(tables)
+
+    def restore_script(self, tables: List[int]) -> str:
+        """Return statements restoring the tables and all sequences, run as one transaction.
+
+        Replica role turns off triggers, so neither foreign keys are checked,
+        nor changes are logged while restoring.
+        """
+        statements = ["BEGIN", "SET LOCAL session_replication_role = replica"]
+        if tables:
+            names = ", ".join(
+                ("" if self.tables[oid].partitioned else "ONLY ") + self.tables[oid].name
+                for oid in tables
+            )
+            statements.append(f"TRUNCATE {names} RESTART IDENTITY")
+        for oid in tables:
+            table = self.tables[oid]
+            if table.rows:
+                statements.append(
+                    f"INSERT INTO {table.name} ({table.columns}) OVERRIDING SYSTEM VALUE "
+                    f"SELECT {table.columns} FROM {SCHEMA}.seed_{oid}"
+                )
+        statements.append(f"SELECT setval(seq, value, is_called) FROM {SCHEMA}.sequences")
+        statements.append(f"DELETE FROM {SCHEMA}.changed")
+        statements.append("COMMIT")
+        return ";\n".join(statements)
+
+    def reset(self) -> bool:
+        """Restore tables and sequences changed by the test, if any.
+
+        :returns: False when the test changed the schema, which can't be restored,
+            so the database has to be created again
+        """
+        with stats.timer("database reset"), self.connection.cursor() as cur:
+            changed, sequences_changed = tracking.changes(cur)
+            if SCHEMA_CHANGED in changed:
+                stats.incr("truncate resets with schema changed")
+                return False
+            if not changed and not sequences_changed:
+                stats.incr("truncate resets skipped")
+                return True
+            tables = self.closure(changed)
+            try:
+                cur.execute(self.restore_script(tables))
+            except psycopg.Error:
+                # leave the failed transaction block, started by the script
+                self.connection.rollback()
+                raise
+        stats.incr("truncate resets")
+        stats.incr("tables truncated", len(tables))
+        return True
+
+    def close(self) -> None:
+        """Close the connection to the shared database."""
+        self.connection.close()
@@ -0,0 +1,11 @@
+"""Tests scanning a large table, for the plan checks."""
+
+from psycopg import Connection
+
+
+def test_seq_scan(postgresql: Connection) -> None:
+    """Look up rows by a column without index."""
+    postgresql.execute("CREATE TABLE items (id int PRIMARY KEY, value int)")
+    postgresql.execute("INSERT INTO items SELECT i, i FROM generate_series(1, 2000) i")
+    postgresql.execute("ANALYZE items")
+    postgresql.execute("SELECT id FROM items WHERE value = %s", (1,))
@@ -0,0 +1,16 @@
+"""Tests repeating statements, for the max repeats check."""
+
+from psycopg import Connection
+
+from pytest_postgresql.query_counter import QueryCounter
+
+
+def test_n_plus_one(postgresql: Connection, postgresql_queries: QueryCounter) -> None:
+    """Fetch rows one by one."""
+    for number in range(3):
+        postgresql.execute("SELECT %s", (number,))
+
+
+def test_single_query(postgresql: Connection, postgresql_queries: QueryCounter) -> None:
+    """Fetch rows at once."""
+    postgresql.execute("SELECT * FROM generate_series(1, 3)")
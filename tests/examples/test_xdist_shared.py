@@ -0,0 +1,19 @@
+"""Tests run by xdist workers sharing one server."""
+
+import os
+from pathlib import Path
+
+import pytest
+from psycopg import Connection
+
+from pytest_postgresql.executor import PostgreSQLExecutor
+
+
+@pytest.mark.parametrize("number", range(8))
+def test_shared_server(
+    postgresql_proc: PostgreSQLExecutor, postgresql: Connection, number: int
+) -> None:
+    """Record the server used by each worker, and check that databases are worker's own."""
+    worker = os.environ["PYTEST_XDIST_WORKER"]
+    assert postgresql.info.dbname == f"tests{worker}"
+    Path(f"server-{worker}").write_text(f"{postgresql_proc.port} {postgresql_proc.datadir}")
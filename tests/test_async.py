@@ -0,0 +1,46 @@
+"""Asynchronous fixtures tests."""
+
+import pytest
+from psycopg import AsyncConnection
+
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.factories import postgresql_async, postgresql_proc
+from pytest_postgresql.janitor import AsyncDatabaseJanitor
+from tests.loader import load_database
+
+pytest.importorskip("pytest_asyncio")
+
+postgresql_proc_async = postgresql_proc(dbname="stories_async_client", load=[load_database])
+postgresql_async_client = postgresql_async("postgresql_proc_async")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("_", range(2))
+async def test_async_client(postgresql_async_client: AsyncConnection, _: int) -> None:
+    """Check that asynchronous client gets database created from template."""
+    async with postgresql_async_client.cursor() as cur:
+        await cur.execute("SELECT * FROM stories")
+        assert len(await cur.fetchall()) == 4
+        await cur.execute("TRUNCATE stories")
+    await postgresql_async_client.commit()
+
+
+@pytest.mark.asyncio
+async def test_async_janitor(postgresql_proc_async: PostgreSQLExecutor) -> None:
+    """Check that asynchronous janitor creates, loads and drops the database."""
+    janitor = AsyncDatabaseJanitor(
+        user=postgresql_proc_async.user,
+        host=postgresql_proc_async.host,
+        port=postgresql_proc_async.port,
+        dbname="async_janitor",
+        version=postgresql_proc_async.version,
+        password=postgresql_proc_async.password,
+    )
+    async with janitor:
+        await janitor.load(load_database)
+        async with janitor.cursor("async_janitor") as cur:
+            await cur.execute("SELECT * FROM stories")
+            assert len(await cur.fetchall()) == 4
+    async with janitor.cursor() as cur:
+        await cur.execute("SELECT datname FROM pg_database WHERE datname = 'async_janitor'")
+        assert await cur.fetchall() == []
@@ -0,0 +1,56 @@
+"""Tests for the directory cache."""
+
+import os
+from pathlib import Path
+
+from pytest_postgresql.cache import DirectoryCache, cache_key
+
+
+def _make_dir(path: Path, size: int) -> Path:
+    """Create directory with one file of a given size."""
+    path.mkdir(parents=True)
+    (path / "file").write_bytes(b"x" * size)
+    return path
+
+
+def test_cache_key() -> None:
+    """Check that cache key depends on all parts and their boundaries."""
+    assert cache_key("a", "b") == cache_key("a", "b")
+    assert cache_key("a", "b") != cache_key("a", "c")
+    assert cache_key("ab", "") != cache_key("a", "b")
+
+
+def test_cache_miss(tmp_path: Path) -> None:
+    """Check that target is left untouched when there's no cached entry."""
+    cache = DirectoryCache(tmp_path / "cache", max_size=1)
+    assert not cache.get("missing", tmp_path / "target")
+    assert not (tmp_path / "target").exists()
+
+
+def test_cache_put_get(tmp_path: Path) -> None:
+    """Check that stored directory gets copied to target with its contents."""
+    source = _make_dir(tmp_path / "source", 10)
+    source.chmod(0o700)
+    cache = DirectoryCache(tmp_path / "cache", max_size=1)
+    cache.put("key", source)
+    target = tmp_path / "target"
+    assert cache.get("key", target)
+    assert (target / "file").read_bytes() == b"x" * 10
+    assert target.stat().st_mode & 0o777 == 0o700
+    # leftovers of writing an entry are gone
+    assert [entry.name for entry in (tmp_path / "cache").iterdir()] == ["key"]
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    """Check that least recently used entries are evicted above the size cap."""
+    megabyte = 1024 * 1024
+    cache = DirectoryCache(tmp_path / "cache", max_size=2)
+    cache.put("old", _make_dir(tmp_path / "old", megabyte))
+    cache.put("used", _make_dir(tmp_path / "used", megabyte))
+    os.utime(cache.entry("old"), (0, 0))
+    os.utime(cache.entry("used"), (0, 0))
+    assert cache.get("used", tmp_path / "target")
+    cache.put("new", _make_dir(tmp_path / "new", megabyte))
+    assert not cache.entry("old").exists()
+    assert cache.entry("used").exists()
+    assert cache.entry("new").exists()
@@ -0,0 +1,52 @@
+"""Data directories in memory backed filesystems tests."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pytest_postgresql.datadir import PREFIX, make_datadir, remove_stale
+
+
+def test_make_datadir(tmp_path: Path) -> None:
+    """Check that data directory's name holds pid of the current process and the port."""
+    datadir = make_datadir(tmp_path, 5432, min_free=0)
+    assert datadir is not None
+    assert datadir.parent == tmp_path
+    assert datadir.name.startswith(f"{PREFIX}{os.getpid()}-5432-")
+    assert datadir.is_dir()
+    other = make_datadir(tmp_path, 5432, min_free=0)
+    assert other is not None
+    assert other != datadir
+
+
+def test_make_datadir_not_enough_space(tmp_path: Path) -> None:
+    """Check that data directory is not created without enough free space."""
+    with pytest.warns(UserWarning, match="Using disk"):
+        assert make_datadir(tmp_path, 5432, min_free=1024**4) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_make_datadir_missing_root(tmp_path: Path) -> None:
+    """Check that missing root directory falls back to disk."""
+    with pytest.warns(UserWarning, match="Using disk"):
+        assert make_datadir(tmp_path / "missing", 5432, min_free=0) is None
+
+
+def test_remove_stale(tmp_path: Path) -> None:
+    """Check that only directories of finished processes are removed."""
+    finished = subprocess.Popen([sys.executable, "-c", ""])
+    finished.wait()
+    stale = tmp_path / f"{PREFIX}{finished.pid}-5432"
+    stale.mkdir()
+    current = make_datadir(tmp_path, 5433, min_free=0)
+    other = tmp_path / "other"
+    other.mkdir()
+
+    remove_stale(tmp_path, "pg_ctl")
+
+    assert not stale.exists()
+    assert current is not None and current.exists()
+    assert other.exists()
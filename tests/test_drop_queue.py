@@ -0,0 +1,48 @@
+"""Background database dropping tests."""
+
+import pytest
+from psycopg import Connection
+
+from pytest_postgresql.drop_queue import DropQueue
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.factories import postgresql, postgresql_proc
+from pytest_postgresql.janitor import DatabaseJanitor
+from tests.loader import load_database
+
+postgresql_proc_async_drop = postgresql_proc(dbname="stories_async", load=[load_database])
+postgresql_async_drop = postgresql("postgresql_proc_async_drop", async_drop=True)
+
+
+@pytest.mark.parametrize("_", range(3))
+def test_async_drop(postgresql_async_drop: Connection, _: int) -> None:
+    """Check that each test gets its own database created from template."""
+    assert postgresql_async_drop.info.dbname.startswith("stories_async_")
+    with postgresql_async_drop.cursor() as cur:
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 4
+        cur.execute("TRUNCATE stories")
+    postgresql_async_drop.commit()
+
+
+def test_drop_queue_close(postgresql_proc_async_drop: PostgreSQLExecutor) -> None:
+    """Check that closing the queue waits for all databases to be dropped."""
+    janitors = [
+        DatabaseJanitor(
+            user=postgresql_proc_async_drop.user,
+            host=postgresql_proc_async_drop.host,
+            port=postgresql_proc_async_drop.port,
+            dbname=f"queued_{i}",
+            version=postgresql_proc_async_drop.version,
+            password=postgresql_proc_async_drop.password,
+        )
+        for i in range(3)
+    ]
+    queue = DropQueue()
+    queue.start()
+    for janitor in janitors:
+        janitor.init()
+        queue.put(janitor)
+    queue.close()
+    with janitors[0].cursor() as cur:
+        cur.execute("SELECT datname FROM pg_database WHERE datname LIKE 'queued_%'")
+        assert cur.fetchall() == []
@@ -1,6 +1,9 @@
 """Test various executor behaviours."""
 
-from typing import Any
+import os
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Any, cast
 
 import psycopg
 import pytest
@@ -10,7 +13,10 @@ from psycopg import Connection
 from pytest import FixtureRequest
 
 import pytest_postgresql.factories.process as process
-from pytest_postgresql.config import get_config
+from pytest_postgresql import stats
+from pytest_postgresql.cache import DirectoryCache
+from pytest_postgresql.config import PostgresqlConfigDict, get_config
+from pytest_postgresql.datadir import PREFIX
 from pytest_postgresql.exceptions import PostgreSQLUnsupported
 from pytest_postgresql.executor import PostgreSQLExecutor
 from pytest_postgresql.factories import postgresql, postgresql_proc
@@ -164,6 +170,98 @@ def test_postgres_options(postgres_max_conns: Connection) -> None:
     assert cur.fetchone() == ("42",)
 
 
+postgresql_ephemeral_proc = postgresql_proc(
+    profile="ephemeral", postgres_options="-c synchronous_commit=on"
+)
+postgres_ephemeral = postgresql("postgresql_ephemeral_proc")
+
+
+def test_ephemeral_profile(postgres_ephemeral: Connection) -> None:
+    """Check that profile's settings are applied, and postgres_options override them."""
+    cur = postgres_ephemeral.cursor()
+    cur.execute("SHOW fsync")
+    assert cur.fetchone() == ("off",)
+    cur.execute("SHOW wal_level")
+    assert cur.fetchone() == ("minimal",)
+    cur.execute("SHOW synchronous_commit")
+    assert cur.fetchone() == ("on",)
+
+
+postgresql_ram_proc = postgresql_proc(datadir_root=gettempdir(), datadir_min_free=0)
+
+
+def test_datadir_root(postgresql_ram_proc: PostgreSQLExecutor) -> None:
+    """Check that data directory is placed in the datadir root."""
+    assert postgresql_ram_proc.running()
+    datadir = Path(postgresql_ram_proc.datadir)
+    assert datadir.parent == Path(gettempdir())
+    assert datadir.name.startswith(f"{PREFIX}{os.getpid()}-{postgresql_ram_proc.port}-")
+
+
+@pytest.mark.parametrize(
+    "transport, host, connection_host",
+    (
+        ("auto", "127.0.0.1", "/sockets"),
+        ("auto", "db.example.com", "db.example.com"),
+        ("tcp", "127.0.0.1", "127.0.0.1"),
+        ("unixsocket", "127.0.0.1", "/sockets"),
+    ),
+)
+def test_connection_host(transport: str, host: str, connection_host: str) -> None:
+    """Check that clients connect through unix socket when possible."""
+    executor = PostgreSQLExecutor(
+        executable="pg_ctl",
+        host=host,
+        port=5432,
+        datadir="/tmp/data",
+        unixsocketdir="/sockets",
+        logfile="/tmp/postgresql.log",
+        startparams="-w",
+        dbname="random_name",
+        transport=transport,
+    )
+    assert executor.connection_host == connection_host
+    assert ("listen_addresses=''" in executor.command) is (transport == "unixsocket")
+
+
+@pytest.mark.parametrize(
+    "port, config_port, expected",
+    (
+        (8000, None, 8000),
+        ("8001", None, 8001),
+        (-1, "8002", 8002),
+        (-1, "5000-6000", 5432),
+        (None, None, 5432),
+        ((2000, 3000), None, 5432),
+    ),
+)
+def test_socket_port(port: Any, config_port: Any, expected: int) -> None:
+    """Check that socket only server takes the configured port, without looking for a free one."""
+    assert process._socket_port(port, cast(PostgresqlConfigDict, {"port": config_port})) == expected
+
+
+def test_client_connects_through_unixsocket(
+    postgresql_proc: PostgreSQLExecutor, postgresql: Connection
+) -> None:
+    """Check that client fixture connects to the local server through unix socket."""
+    assert postgresql.info.host == postgresql_proc.unixsocketdir
+
+
+postgresql_unixsocket_proc = postgresql_proc(transport="unixsocket")
+postgres_unixsocket = postgresql("postgresql_unixsocket_proc")
+
+
+def test_unixsocket_transport(
+    postgresql_unixsocket_proc: PostgreSQLExecutor, postgres_unixsocket: Connection
+) -> None:
+    """Check that server does not listen on TCP, and has a socket directory of its own."""
+    cur = postgres_unixsocket.cursor()
+    cur.execute("SHOW listen_addresses")
+    assert cur.fetchone() == ("",)
+    assert postgresql_unixsocket_proc.unixsocketdir != gettempdir()
+    assert postgres_unixsocket.info.host == postgresql_unixsocket_proc.unixsocketdir
+
+
 postgres_isolation_level = postgresql(
     "postgresql_proc", isolation_level=psycopg.IsolationLevel.SERIALIZABLE
 )
@@ -174,3 +272,68 @@ def test_custom_isolation_level(postgres_isolation_level: Connection) -> None:
     cur = postgres_isolation_level.cursor()
     cur.execute("SELECT 1")
     assert cur.fetchone() == (1,)
+
+
+def test_executor_initdb_cache(
+    request: FixtureRequest,
+    tmp_path_factory: pytest.TempPathFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Check that the data directory gets reused from cache instead of running initdb."""
+    config = get_config(request)
+    pg_exe = process._pg_exe(None, config)
+    cache = DirectoryCache(tmp_path_factory.mktemp("initdb-cache"), max_size=1024)
+
+    def make_executor() -> PostgreSQLExecutor:
+        port = process._pg_port(-1, config, [])
+        tmpdir = tmp_path_factory.mktemp(f"pytest-postgresql-{request.node.name}")
+        datadir, logfile_path = process._prepare_dir(tmpdir, port)
+        return PostgreSQLExecutor(
+            executable=pg_exe,
+            host=config["host"],
+            port=port,
+            datadir=str(datadir),
+            unixsocketdir=config["unixsocketdir"],
+            logfile=str(logfile_path),
+            startparams=config["startparams"],
+            password="somepassword",
+            dbname="somedatabase",
+            initdb_cache=cache,
+        )
+
+    assert_executor_start_stop(make_executor())
+
+    def no_initdb(self: PostgreSQLExecutor) -> None:
+        raise AssertionError("initdb should not run with a filled cache.")
+
+    monkeypatch.setattr(PostgreSQLExecutor, "_initdb", no_initdb)
+    assert_executor_start_stop(make_executor())
+    assert "initdb cache restore" in stats.timings()
+
+
+def test_postmaster_ready(request: FixtureRequest, tmp_path: Path) -> None:
+    """Check that the server is ready only when postmaster.pid says so, for a live process."""
+    config = get_config(request)
+    executor = PostgreSQLExecutor(
+        executable=config["exec"],
+        host=config["host"],
+        port=5432,
+        datadir=str(tmp_path),
+        unixsocketdir=config["unixsocketdir"],
+        logfile=str(tmp_path / "postgresql.log"),
+        startparams=config["startparams"],
+        dbname="random_name",
+    )
+    pid_file = tmp_path / "postmaster.pid"
+    assert not executor.postmaster_ready()
+
+    def write_pid_file(pid: int, status: str) -> None:
+        lines = [str(pid), str(tmp_path), "1700000000", "5432", "/tmp", "*", "0 0", status]
+        pid_file.write_text("\n".join(lines) + "\n")
+
+    write_pid_file(os.getpid(), "starting")
+    assert not executor.postmaster_ready()
+    write_pid_file(os.getpid(), "ready   ")
+    assert executor.postmaster_ready()
+    executor.wait_for_postgres()
+    assert executor.startup_time is not None
@@ -1,13 +1,22 @@
 """Database Janitor tests."""
 
 import sys
-from typing import Any
+from contextlib import ExitStack
+from threading import Barrier
+from typing import Any, List, Optional
 from unittest.mock import MagicMock, patch
 
 import pytest
 from packaging.version import parse
+from psycopg.pq import TransactionStatus
 
-from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql import stats
+from pytest_postgresql.janitor import (
+    MAINTENANCE_IDLE_MAX,
+    DatabaseJanitor,
+    close_maintenance_connections,
+)
+from pytest_postgresql.loader import LoadStep
 
 VERSION = parse("10")
 
@@ -50,6 +59,52 @@ def test_cursor_connects_with_password(connect_mock: MagicMock) -> None:
         )
 
 
+@patch("pytest_postgresql.janitor._is_alive")
+@patch("pytest_postgresql.janitor.psycopg.connect")
+def test_cursor_reuses_maintenance_connection(
+    connect_mock: MagicMock, alive_mock: MagicMock
+) -> None:
+    """Test that janitors of the same server share the connection while it's alive."""
+    stats.clear()
+    alive_mock.return_value = True
+    connect_mock.return_value.info.transaction_status = TransactionStatus.IDLE
+    for dbname in ("first", "second"):
+        janitor = DatabaseJanitor(user="user", host="reuse", port="1234", dbname=dbname, version=10)
+        with janitor.cursor():
+            pass
+    connect_mock.assert_called_once()
+    assert stats.counters()["maintenance connections reused"] == 1
+
+    alive_mock.return_value = False
+    with janitor.cursor():
+        pass
+    assert connect_mock.call_count == 2
+    # closed when taken, and when given back, instead of being kept
+    assert connect_mock.return_value.close.call_count == 2
+    stats.clear()
+
+
+@patch("pytest_postgresql.janitor._is_alive", return_value=True)
+@patch("pytest_postgresql.janitor.psycopg.connect")
+def test_cursor_keeps_few_maintenance_connections(
+    connect_mock: MagicMock, alive_mock: MagicMock
+) -> None:
+    """Test that cursors used at once get connections of their own, and only few are kept."""
+    connections = [MagicMock() for _ in range(MAINTENANCE_IDLE_MAX + 1)]
+    for connection in connections:
+        connection.info.transaction_status = TransactionStatus.IDLE
+    connect_mock.side_effect = connections
+    janitor = DatabaseJanitor(user="user", host="few", port="1234", dbname="db", version=10)
+    with ExitStack() as stack:
+        for _ in connections:
+            stack.enter_context(janitor.cursor())
+    assert connect_mock.call_count == len(connections)
+    assert sum(connection.close.call_count for connection in connections) == 1
+
+    close_maintenance_connections("few", 1234)
+    assert all(connection.close.call_count == 1 for connection in connections)
+
+
 @pytest.mark.skipif(
     sys.version_info < (3, 8), reason="Unittest call_args.kwargs was introduced since python 3.8"
 )
@@ -73,3 +128,109 @@ def test_janitor_populate(connect_mock: MagicMock, load_database: str) -> None:
     janitor.load(load_database)
     assert connect_mock.called
     assert connect_mock.call_args.kwargs == call_kwargs
+
+
+def test_janitor_load_groups() -> None:
+    """Check that group's branches are loaded concurrently, and steps within branch in order."""
+    barrier = Barrier(2, timeout=5)
+    loaded: List[str] = []
+
+    def schema(**kwargs: Any) -> None:
+        loaded.append("schema")
+
+    def users(**kwargs: Any) -> None:
+        barrier.wait()
+        loaded.append("users")
+
+    def users_seed(**kwargs: Any) -> None:
+        loaded.append("users_seed")
+
+    def orders(**kwargs: Any) -> None:
+        barrier.wait()
+        loaded.append("orders")
+
+    janitor = DatabaseJanitor(user="user", host="host", port="1234", dbname="db", version=16)
+    steps: List[LoadStep] = [schema, ([users, users_seed], orders)]
+    for step in steps:
+        janitor.load(step)
+    assert loaded[0] == "schema"
+    assert sorted(loaded[1:]) == ["orders", "users", "users_seed"]
+    assert loaded.index("users") < loaded.index("users_seed")
+    timings = stats.timings()
+    assert "load test_janitor_load_groups.<locals>.users_seed" in timings
+    assert "load test_janitor_load_groups.<locals>.orders" in timings
+    stats.clear()
+
+
+def test_janitor_load_sequence() -> None:
+    """Check that list's steps are loaded in order, and tuples within it concurrently."""
+    barrier = Barrier(2, timeout=5)
+    loaded: List[str] = []
+
+    def schema(**kwargs: Any) -> None:
+        loaded.append("schema")
+
+    def users(**kwargs: Any) -> None:
+        barrier.wait()
+        loaded.append("users")
+
+    def orders(**kwargs: Any) -> None:
+        barrier.wait()
+        loaded.append("orders")
+
+    def views(**kwargs: Any) -> None:
+        loaded.append("views")
+
+    janitor = DatabaseJanitor(user="user", host="host", port="1234", dbname="db", version=16)
+    janitor.load([schema, (users, orders), views])
+    assert loaded[0] == "schema"
+    assert sorted(loaded[1:3]) == ["orders", "users"]
+    assert loaded[3] == "views"
+    stats.clear()
+
+
+@pytest.mark.parametrize(
+    "version, create_strategy, template_size, clause",
+    (
+        (16, "auto", 512 * 1024 * 1024, ' TEMPLATE "tmpl" STRATEGY = FILE_COPY;'),
+        (16, "auto", 8 * 1024 * 1024, ' TEMPLATE "tmpl" STRATEGY = WAL_LOG;'),
+        (16, "wal_log", None, ' TEMPLATE "tmpl" STRATEGY = WAL_LOG;'),
+        (14, "auto", None, ' TEMPLATE "tmpl";'),
+    ),
+)
+@patch("pytest_postgresql.janitor._is_alive")
+@patch("pytest_postgresql.janitor.psycopg.connect")
+def test_janitor_create_strategy(
+    connect_mock: MagicMock,
+    alive_mock: MagicMock,
+    version: int,
+    create_strategy: str,
+    template_size: Optional[int],
+    clause: str,
+) -> None:
+    """Check that strategy is chosen by template's size once, unless given or unsupported."""
+    alive_mock.return_value = True
+    cur = connect_mock.return_value.cursor.return_value
+    cur.fetchone.return_value = (template_size,)
+    for dbname in ("first", "second"):
+        janitor = DatabaseJanitor(
+            user="user",
+            host="strategy",
+            port="1234",
+            dbname=dbname,
+            template_dbname="tmpl",
+            version=version,
+            create_strategy=create_strategy,
+        )
+        janitor.init()
+    queries = [call.args[0] for call in cur.execute.call_args_list]
+    size_queries = [query for query in queries if "pg_database_size" in query]
+    assert len(size_queries) == (1 if template_size else 0)
+    assert queries[-1] == f'CREATE DATABASE "second"{clause}'
+    assert sum(value for name, value in stats.counters().items() if "created with" in name) == 2
+
+    DatabaseJanitor(
+        user="user", host="strategy", port="1234", template_dbname="tmpl", version=version
+    ).drop()
+    close_maintenance_connections("strategy", 1234)
+    stats.clear()
@@ -1,8 +1,19 @@
 """Tests for the `build_loader` function."""
 
+import gzip
+import os
+import subprocess
+from functools import partial
 from pathlib import Path
 
-from pytest_postgresql.loader import build_loader, sql
+import psycopg
+import pytest
+
+from pytest_postgresql.config import detect_paths
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.loader import build_loader, copy_files, pg_restore, sql
+from tests.conftest import TEST_SQL_DIR
 from tests.loader import load_database
 
 
@@ -18,3 +29,183 @@ def test_loader_sql() -> None:
     loader_func = build_loader(sql_path)
     assert loader_func.args == (sql_path,)  # type: ignore
     assert loader_func.func == sql  # type: ignore
+
+
+@pytest.mark.parametrize("name", ("schema.dump", "schema.backup"))
+def test_loader_dump(name: str) -> None:
+    """Test returning partial running pg_restore for the custom format dump."""
+    dump_path = Path(name)
+    loader_func = build_loader(dump_path, bindir="/usr/lib/postgresql/16/bin")
+    assert loader_func.func == pg_restore  # type: ignore
+    assert loader_func.args == (dump_path,)  # type: ignore
+    assert loader_func.keywords["executable"] == "/usr/lib/postgresql/16/bin/pg_restore"  # type: ignore
+
+
+def test_loader_dump_directory(tmp_path: Path) -> None:
+    """Test recognizing directory format dump by its table of contents file."""
+    (tmp_path / "toc.dat").touch()
+    loader_func = build_loader(tmp_path)
+    assert loader_func.func == pg_restore  # type: ignore
+    assert loader_func.keywords["executable"] == "pg_restore"  # type: ignore
+    assert detect_paths([str(tmp_path), "schema.dump", "tests.loader:load_database"]) == [
+        tmp_path,
+        Path("schema.dump"),
+        "tests.loader:load_database",
+    ]
+
+
+def test_loader_data_directory(tmp_path: Path) -> None:
+    """Test recognizing directory with table data files."""
+    (tmp_path / "users.csv").write_text("id,name\n")
+    loader_func = build_loader(tmp_path)
+    assert loader_func.func == copy_files  # type: ignore
+    assert loader_func.args == (tmp_path,)  # type: ignore
+    assert detect_paths([str(tmp_path)]) == [tmp_path]
+
+
+def test_pg_restore_loader(postgresql_proc: PostgreSQLExecutor, tmp_path: Path) -> None:
+    """Check that custom format dump gets restored with pg_restore."""
+    bindir = os.path.dirname(postgresql_proc.executable)
+    dump_path = tmp_path / "test.dump"
+
+    def janitor(dbname: str) -> DatabaseJanitor:
+        return DatabaseJanitor(
+            user=postgresql_proc.user,
+            host=postgresql_proc.host,
+            port=postgresql_proc.port,
+            dbname=dbname,
+            version=postgresql_proc.version,
+            password=postgresql_proc.password,
+            bindir=bindir,
+        )
+
+    with janitor("pg_restore_source") as source_janitor:
+        source_janitor.load(Path(TEST_SQL_DIR, "test.sql"))
+        subprocess.check_output(
+            [
+                os.path.join(bindir, "pg_dump"),
+                f"--host={postgresql_proc.host}",
+                f"--port={postgresql_proc.port}",
+                f"--username={postgresql_proc.user}",
+                "--format=custom",
+                f"--file={dump_path}",
+                "pg_restore_source",
+            ]
+        )
+    with janitor("pg_restore_target") as target_janitor:
+        target_janitor.load(dump_path)
+        with target_janitor.cursor("pg_restore_target") as cur:
+            cur.execute("SELECT num, data FROM test_load")
+            assert cur.fetchall() == [(2, "c")]
+
+
+def test_sql_loader_dump(postgresql_proc: PostgreSQLExecutor, tmp_path: Path) -> None:
+    """Check that compressed plain dump, with COPY data, gets loaded."""
+    dump_path = tmp_path / "dump.sql.gz"
+    dump_path.write_bytes(gzip.compress(Path(TEST_SQL_DIR, "dump.sql").read_bytes()))
+    with DatabaseJanitor(
+        user=postgresql_proc.user,
+        host=postgresql_proc.host,
+        port=postgresql_proc.port,
+        dbname="sql_loader_dump",
+        version=postgresql_proc.version,
+        password=postgresql_proc.password,
+    ) as janitor:
+        janitor.load(dump_path)
+        with janitor.cursor("sql_loader_dump") as cur:
+            cur.execute("SELECT id, note FROM dump_load ORDER BY id")
+            assert cur.fetchall() == [(1, "semicolon; inside"), (2, None), (3, "quote ' inside")]
+            cur.execute("SELECT greet('you')")
+            assert cur.fetchone() == ("Hello; you",)
+
+
+def test_copy_files_loader(postgresql_proc: PostgreSQLExecutor, tmp_path: Path) -> None:
+    """Check that csv, tsv and ndjson files get copied into their tables."""
+    (tmp_path / "public.authors.csv").write_text('id,name\n1,"Doe, John"\n2,Jane\n')
+    (tmp_path / "books.tsv").write_text("id\ttitle\n1\tFirst\n")
+    (tmp_path / "reviews.ndjson").write_text(
+        '{"id": 1, "score": 4.5, "meta": {"source": "web"}}\n'
+        "\n"
+        '{"id": 2, "score": null, "meta": [1]}\n'
+    )
+    (tmp_path / "notes.ndjson").write_text('{"id": 1, "created": "2024-01-02"}\n')
+    (tmp_path / "README").write_text("not a data file")
+    with DatabaseJanitor(
+        user=postgresql_proc.user,
+        host=postgresql_proc.host,
+        port=postgresql_proc.port,
+        dbname="copy_files_loader",
+        version=postgresql_proc.version,
+        password=postgresql_proc.password,
+    ) as janitor:
+        with janitor.cursor("copy_files_loader") as cur:
+            cur.execute(
+                "CREATE TABLE authors (id int PRIMARY KEY, name text);"
+                "CREATE INDEX authors_name ON authors (name);"
+                "CREATE TABLE books (id int, title varchar(20));"
+                "CREATE TABLE reviews (id bigint, score float8, meta jsonb);"
+                "CREATE TABLE notes (id int, created date);"
+            )
+        janitor.load(partial(copy_files, tmp_path, drop_indexes=True))
+        with janitor.cursor("copy_files_loader") as cur:
+            cur.execute("SELECT id, name FROM authors ORDER BY id")
+            assert cur.fetchall() == [(1, "Doe, John"), (2, "Jane")]
+            cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'authors' ORDER BY 1")
+            assert cur.fetchall() == [("authors_name",), ("authors_pkey",)]
+            cur.execute("SELECT id, title FROM books")
+            assert cur.fetchall() == [(1, "First")]
+            cur.execute("SELECT id, score, meta FROM reviews ORDER BY id")
+            assert cur.fetchall() == [(1, 4.5, {"source": "web"}), (2, None, [1])]
+            cur.execute("SELECT created::text FROM notes")
+            assert cur.fetchall() == [("2024-01-02",)]
+
+
+def test_copy_files_ndjson_values(postgresql_proc: PostgreSQLExecutor, tmp_path: Path) -> None:
+    """Check that ndjson values not matching their column's type get parsed by the server."""
+    (tmp_path / "flags.ndjson").write_text('{"id": 1, "flag": "false"}\n{"id": 2, "flag": true}\n')
+    (tmp_path / "notes.ndjson").write_text(
+        '{"id": 1, "note": {"a": 1}}\n{"id": 2, "note": true}\n{"id": 3, "note": 1.5}\n'
+    )
+    (tmp_path / "scores.ndjson").write_text('{"id": 1, "score": 1.5}\n')
+    with DatabaseJanitor(
+        user=postgresql_proc.user,
+        host=postgresql_proc.host,
+        port=postgresql_proc.port,
+        dbname="copy_files_ndjson_values",
+        version=postgresql_proc.version,
+        password=postgresql_proc.password,
+    ) as janitor:
+        with janitor.cursor("copy_files_ndjson_values") as cur:
+            cur.execute(
+                "CREATE TABLE flags (id int, flag bool);"
+                "CREATE TABLE notes (id int, note text);"
+                "CREATE TABLE scores (id int, score int);"
+            )
+        with pytest.raises(psycopg.errors.InvalidTextRepresentation, match="1.5"):
+            janitor.load(partial(copy_files, tmp_path))
+        (tmp_path / "scores.ndjson").unlink()
+        janitor.load(partial(copy_files, tmp_path))
+        with janitor.cursor("copy_files_ndjson_values") as cur:
+            cur.execute("SELECT id, flag FROM flags ORDER BY id")
+            assert cur.fetchall() == [(1, False), (2, True)]
+            cur.execute("SELECT id, note FROM notes ORDER BY id")
+            assert cur.fetchall() == [(1, '{"a": 1}'), (2, "true"), (3, "1.5")]
+
+
+def test_copy_files_ndjson_unknown_column(
+    postgresql_proc: PostgreSQLExecutor, tmp_path: Path
+) -> None:
+    """Check that ndjson keys not naming table's columns get reported."""
+    (tmp_path / "flags.ndjson").write_text('{"id": 1, "missing": 2}\n')
+    with DatabaseJanitor(
+        user=postgresql_proc.user,
+        host=postgresql_proc.host,
+        port=postgresql_proc.port,
+        dbname="copy_files_ndjson_unknown_column",
+        version=postgresql_proc.version,
+        password=postgresql_proc.password,
+    ) as janitor:
+        with janitor.cursor("copy_files_ndjson_unknown_column") as cur:
+            cur.execute("CREATE TABLE flags (id int)")
+        with pytest.raises(ValueError, match="flags.ndjson: column 'missing' not found"):
+            janitor.load(partial(copy_files, tmp_path))
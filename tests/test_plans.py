@@ -0,0 +1,166 @@
+"""Query plan capture tests."""
+
+import warnings
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+from psycopg import Connection, OperationalError
+from psycopg.errors import FeatureNotSupported
+
+from pytest_postgresql.plans import (
+    PlanRecorder,
+    PlanWarning,
+    baseline_path,
+    check,
+    plan_shape,
+    risky_nodes,
+    tracked_fixture,
+)
+
+PLAN = {
+    "Node Type": "Nested Loop",
+    "Join Type": "Left",
+    "Total Cost": 42.5,
+    "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "orders", "Plan Rows": 2000},
+        {
+            "Node Type": "Index Scan",
+            "Index Name": "users_pkey",
+            "Relation Name": "users",
+            "Plan Rows": 1,
+        },
+    ],
+}
+SHAPE = [
+    "Nested Loop (Left)",
+    "  Seq Scan on orders",
+    "  Index Scan using users_pkey on users",
+]
+
+
+def test_plan_shape() -> None:
+    """Check that plans are reduced to node types, indexes and relations."""
+    assert plan_shape(PLAN) == SHAPE
+
+
+def test_risky_nodes() -> None:
+    """Check that sequential scans and nested loops are reported only over large tables."""
+    assert risky_nodes(SHAPE, set()) == set()
+    assert risky_nodes(SHAPE, {"users"}) == {"Nested Loop over users"}
+    assert risky_nodes(SHAPE, {"orders"}) == {"Nested Loop over orders", "Seq Scan over orders"}
+
+
+def test_check() -> None:
+    """Check that only plans flipping to risky nodes, compared to the baseline, are reported."""
+    statement = "SELECT * FROM orders LEFT JOIN users ON users.id = orders.user_id"
+    indexed = ["Index Scan using orders_pkey on orders"]
+    assert check({statement: SHAPE}, {statement: SHAPE}, {"orders"}) is None
+    assert check({statement: indexed}, {statement: SHAPE}, {"orders"}) is None
+    message = check({statement: SHAPE}, {statement: indexed}, {"orders"})
+    assert message is not None
+    assert "Nested Loop over orders, Seq Scan over orders" in message
+
+
+def test_baseline_path() -> None:
+    """Check that baselines are kept next to the test module, with safe file names."""
+    assert baseline_path(Path("tests/test_orders.py"), "test_list[1-a/b]") == Path(
+        "tests/plans/test_orders/test_list_1-a_b_.json"
+    )
+
+
+def test_plan_recorder(postgresql: Connection) -> None:
+    """Check that plans of executed statements are captured once, by normalized statement."""
+    recorder = PlanRecorder()
+    postgresql.cursor_factory = recorder.cursor_class(postgresql.cursor_factory)
+    postgresql.execute("CREATE TABLE items (id int PRIMARY KEY, value int)")
+    for item_id in (1, 2):
+        postgresql.execute("SELECT value FROM items WHERE id = %s", (item_id,))
+    assert list(recorder.shapes) == ["SELECT value FROM items WHERE id = ?"]
+
+
+def test_plan_recorder_skips_scripts() -> None:
+    """Check that scripts are not explained, as that would execute their statements again."""
+    recorder = PlanRecorder()
+    connection = MagicMock()
+    recorder.explain(MagicMock(), connection, "INSERT INTO a VALUES (1); INSERT INTO b VALUES (2)")
+    connection.transaction.assert_not_called()
+    assert recorder.shapes == {}
+
+
+def test_plan_recorder_params(postgresql: Connection) -> None:
+    """Check that statements with params passed by keyword get explained."""
+    recorder = PlanRecorder()
+    postgresql.cursor_factory = recorder.cursor_class(postgresql.cursor_factory)
+    postgresql.execute("CREATE TABLE items (id int PRIMARY KEY, value int)")
+    with postgresql.cursor() as cur:
+        cur.execute("SELECT value FROM items WHERE id = %s", params=(1,))
+    assert list(recorder.shapes) == ["SELECT value FROM items WHERE id = ?"]
+
+
+class FakeCursor:
+    """Cursor returning a plan of a single node."""
+
+    def __init__(self, connection: MagicMock) -> None:
+        """Initialize cursor."""
+        self.connection = connection
+
+    def __enter__(self) -> "FakeCursor":
+        """Enter cursor's context."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Exit cursor's context."""
+
+    def execute(self, query: Any, params: Any = None, **kwargs: Any) -> "FakeCursor":
+        """Pretend executing the query."""
+        return self
+
+    def fetchone(self) -> Tuple[Any, ...]:
+        """Return plan of a single node."""
+        return ([{"Plan": {"Node Type": "Result"}}],)
+
+
+class FailingCursor(FakeCursor):
+    """Cursor failing to explain statements."""
+
+    def execute(self, query: Any, params: Any = None, **kwargs: Any) -> "FakeCursor":
+        """Fail explaining the query."""
+        raise FeatureNotSupported("cannot explain")
+
+
+def test_plan_recorder_explain_fails() -> None:
+    """Check that failing EXPLAIN only warns, once for each statement's shape."""
+    recorder = PlanRecorder()
+    connection = MagicMock()
+    cursor_class: Any = FailingCursor
+    with pytest.warns(PlanWarning, match="Could not explain SELECT value FROM items WHERE id = ?"):
+        recorder.explain(cursor_class, connection, "SELECT value FROM items WHERE id = 1")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        recorder.explain(cursor_class, connection, "SELECT value FROM items WHERE id = 2")
+    assert not recorder.shapes
+    assert recorder.failed == {"SELECT value FROM items WHERE id = ?"}
+
+
+@pytest.mark.parametrize("closed", (True, False))
+def test_tracked_fixture_cleans_up(tmp_path: Path, closed: bool) -> None:
+    """Check that the database gets cleaned up, when the connection got closed, or checks fail."""
+    cleaned: List[bool] = []
+    connection = MagicMock(closed=closed, cursor_factory=FakeCursor)
+
+    def fixture() -> Iterator[MagicMock]:
+        yield connection
+        cleaned.append(True)
+
+    tracked = tracked_fixture(fixture(), "fail", False, 1000, tmp_path / "plan.json")
+    assert next(tracked) is connection
+    connection.cursor_factory(connection).execute("SELECT 1")
+    connection.transaction.side_effect = OperationalError("the connection is closed")
+    if closed:
+        assert next(tracked, None) is None
+    else:
+        with pytest.raises(OperationalError):
+            next(tracked, None)
+    assert cleaned == [True]
@@ -0,0 +1,53 @@
+"""Database pool tests."""
+
+import pytest
+from psycopg import Connection
+
+from pytest_postgresql import stats
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.factories import postgresql, postgresql_proc
+from pytest_postgresql.pool import DatabasePool, unique_dbname
+from tests.loader import load_database
+
+postgresql_proc_pool = postgresql_proc(dbname="stories_pool", load=[load_database])
+postgresql_pool = postgresql("postgresql_proc_pool", pool_size=2)
+
+
+def test_unique_dbname() -> None:
+    """Check that unique database names start with given name."""
+    assert unique_dbname("tests").startswith("tests_")
+    assert unique_dbname("tests") != unique_dbname("tests")
+
+
+@pytest.mark.parametrize("_", range(5))
+def test_pool_database(postgresql_pool: Connection, _: int) -> None:
+    """Check that databases taken from the pool are created from template."""
+    assert postgresql_pool.info.dbname.startswith("stories_pool_")
+    with postgresql_pool.cursor() as cur:
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 4
+        cur.execute("TRUNCATE stories")
+    postgresql_pool.commit()
+
+
+def test_pool_close(postgresql_proc_pool: PostgreSQLExecutor) -> None:
+    """Check that closing the pool drops databases that were not taken."""
+    pool = DatabasePool(
+        size=2,
+        user=postgresql_proc_pool.user,
+        host=postgresql_proc_pool.host,
+        port=postgresql_proc_pool.port,
+        version=postgresql_proc_pool.version,
+        dbname="closed_pool",
+        template_dbname=postgresql_proc_pool.template_dbname,
+        password=postgresql_proc_pool.password,
+    )
+    waits = stats.counters().get("pool waits", 0)
+    pool.start()
+    taken = pool.acquire()
+    pool.release(taken)
+    pool.close()
+    assert stats.counters()["pool waits"] == waits + 1
+    with taken.cursor() as cur:
+        cur.execute("SELECT datname FROM pg_database WHERE datname LIKE 'closed_pool_%'")
+        assert cur.fetchall() == []
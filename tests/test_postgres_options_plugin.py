@@ -1,5 +1,6 @@
 """Test behavior of postgres_options passed in different ways."""
 
+import json
 from pathlib import Path
 
 import pytest
@@ -48,6 +49,76 @@ def test_postgres_loader_in_cli(pointed_pytester: Pytester) -> None:
     ret.assert_outcomes(passed=1)
 
 
+def test_timings(pointed_pytester: Pytester) -> None:
+    """Check that phase timings get reported, and exported to json."""
+    pointed_pytester.copy_example("test_load.py")
+    test_sql_path = pointed_pytester.copy_example("test.sql")
+    ret = pointed_pytester.runpytest(
+        f"--postgresql-load={test_sql_path}",
+        "--postgresql-timings",
+        "--postgresql-timings-json=timings.json",
+        "test_load.py",
+    )
+    ret.assert_outcomes(passed=1)
+    ret.stdout.fnmatch_lines(["*postgresql timings*", "initdb *", "slowest 1 tests*"])
+    timings = json.loads((pointed_pytester.path / "timings.json").read_text())
+    assert {"initdb", "server start", "load test.sql", "test setup", "test teardown"} <= set(
+        timings["phases"]
+    )
+
+
+def test_query_stats(pointed_pytester: Pytester) -> None:
+    """Check that queries run by the tests get reported."""
+    pointed_pytester.copy_example("test_load.py")
+    test_sql_path = pointed_pytester.copy_example("test.sql")
+    ret = pointed_pytester.runpytest(
+        f"--postgresql-load={test_sql_path}", "--postgresql-query-stats", "test_load.py"
+    )
+    ret.assert_outcomes(passed=1)
+    ret.stdout.fnmatch_lines(
+        [
+            "*postgresql queries*",
+            "* 1 * SELECT * FROM test",
+            "tests by time spent in queries:",
+            "*test_load.py::test_postgres_load_one_file (1 calls, 1 rows*",
+        ]
+    )
+
+
+def test_max_repeats(pointed_pytester: Pytester) -> None:
+    """Check that tests repeating statements too many times fail."""
+    pointed_pytester.copy_example("test_query_counter.py")
+    ret = pointed_pytester.runpytest("--postgresql-max-repeats=2", "test_query_counter.py")
+    ret.assert_outcomes(passed=2, errors=1)
+    ret.stdout.fnmatch_lines(["*3x SELECT ?*"])
+
+
+def test_plans(pointed_pytester: Pytester) -> None:
+    """Check that plans flipping to sequential scans over large tables fail, unless in baseline."""
+    pointed_pytester.copy_example("test_plans.py")
+    ret = pointed_pytester.runpytest("--postgresql-plans=fail", "test_plans.py")
+    ret.assert_outcomes(passed=1, errors=1)
+    ret.stdout.fnmatch_lines(["*Seq Scan over items*"])
+
+    ret = pointed_pytester.runpytest("--postgresql-plans-update", "test_plans.py")
+    ret.assert_outcomes(passed=1)
+    baseline = pointed_pytester.path / "plans" / "test_plans" / "test_seq_scan.json"
+    assert "Seq Scan on items" in baseline.read_text()
+
+    ret = pointed_pytester.runpytest("--postgresql-plans=fail", "test_plans.py")
+    ret.assert_outcomes(passed=1)
+
+
+def test_xdist_shared(pointed_pytester: Pytester) -> None:
+    """Check that xdist workers use one server, with databases of their own."""
+    pytest.importorskip("xdist")
+    pointed_pytester.copy_example("test_xdist_shared.py")
+    ret = pointed_pytester.runpytest("-n", "2", "--postgresql-xdist-shared", "test_xdist_shared.py")
+    ret.assert_outcomes(passed=8)
+    servers = {path.read_text() for path in pointed_pytester.path.glob("server-*")}
+    assert len(servers) == 1
+
+
 postgresql_proc_to_override = postgresql_proc()
 
 
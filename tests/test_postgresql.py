@@ -67,7 +67,10 @@ def test_postgres_terminate_connection(postgresql2: Connection, _: int) -> None:
     with postgresql2.cursor() as cur:
 
         def check_if_one_connection() -> None:
-            cur.execute("SELECT * FROM pg_stat_activity " "WHERE backend_type = 'client backend';")
+            cur.execute(
+                "SELECT * FROM pg_stat_activity "
+                "WHERE backend_type = 'client backend' AND datname = current_database();"
+            )
             existing_connections = cur.fetchall()
             assert (
                 len(existing_connections) == 1
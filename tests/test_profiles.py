@@ -0,0 +1,29 @@
+"""Server settings' profiles tests."""
+
+import pytest
+
+from pytest_postgresql.profiles import profile_options, profile_settings
+
+
+def test_default_profile() -> None:
+    """Check that the default profile does not change any settings."""
+    assert profile_options("default", "16") == ""
+
+
+@pytest.mark.parametrize("version, has_wal_recycle", (("10", False), ("12", True), ("17", True)))
+def test_ephemeral_profile_versions(version: str, has_wal_recycle: bool) -> None:
+    """Check that settings unknown to the server version are left out."""
+    names = [setting.name for setting in profile_settings("ephemeral", version)]
+    assert "fsync" in names
+    assert ("wal_recycle" in names) is has_wal_recycle
+
+
+def test_ephemeral_profile_options() -> None:
+    """Check that settings are rendered as postgres command line options."""
+    assert "-c fsync=off -c synchronous_commit=off" in profile_options("ephemeral", "16")
+
+
+def test_unknown_profile() -> None:
+    """Check that the unknown profile is reported."""
+    with pytest.raises(ValueError, match="Unknown postgresql profile 'fastest'"):
+        profile_settings("fastest", "16")
@@ -0,0 +1,59 @@
+"""Query counter tests."""
+
+import pytest
+from psycopg import Connection, sql
+
+from pytest_postgresql.query_counter import QueryCounter, normalize
+
+
+@pytest.mark.parametrize(
+    "statement, normalized",
+    (
+        ("SELECT * FROM users WHERE id = 1", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE id = %s", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE id = $1", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE name = %(name)s", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT * FROM users\n  WHERE name = 'O''Neil'", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT * FROM table_1 WHERE id IN (1, 2, 3)", "SELECT * FROM table_1 WHERE id IN (?)"),
+    ),
+)
+def test_normalize(statement: str, normalized: str) -> None:
+    """Check that literals and parameters get replaced with placeholders."""
+    assert normalize(statement) == normalized
+
+
+def test_counter_assertions() -> None:
+    """Check counting, and asserting on the number of statements and their repeats."""
+    counter = QueryCounter()
+    counter.record("SAVEPOINT pytest_postgresql")
+    counter.record("SELECT * FROM orders")
+    for user_id in range(3):
+        counter.record(f"SELECT * FROM users WHERE id = {user_id}")
+    counter.record("RELEASE SAVEPOINT pytest_postgresql")
+    assert counter.count == 4
+    counter.assert_max_queries(4)
+    with pytest.raises(AssertionError, match="5 queries executed, expected at most 4"):
+        counter.record("SELECT 1")
+        counter.assert_max_queries(4)
+    assert counter.repeated() == {"SELECT * FROM users WHERE id = ?": 3}
+    counter.assert_no_repeated(3)
+    with pytest.raises(AssertionError, match="3x SELECT \\* FROM users WHERE id = \\?"):
+        counter.assert_no_repeated(2)
+    counter.reset()
+    assert counter.count == 0
+    assert counter.repeated_message(1) is None
+
+
+def test_postgresql_queries(postgresql: Connection, postgresql_queries: QueryCounter) -> None:
+    """Check that statements executed on client fixture's connection get counted."""
+    postgresql.execute("CREATE TABLE users (id int)")
+    with postgresql.cursor() as cur:
+        cur.executemany("INSERT INTO users VALUES (%s)", [(1,), (2,)])
+        for user_id in (1, 2):
+            cur.execute(
+                sql.SQL("SELECT id FROM {} WHERE id = %s").format(sql.Identifier("users")),
+                (user_id,),
+            )
+    postgresql.commit()
+    assert postgresql_queries.count == 4
+    assert postgresql_queries.repeated() == {'SELECT id FROM "users" WHERE id = ?': 2}
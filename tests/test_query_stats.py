@@ -0,0 +1,89 @@
+"""Query statistics tests."""
+
+from typing import Iterator, List
+from unittest.mock import MagicMock
+
+import pytest
+from psycopg import OperationalError
+
+from pytest_postgresql import query_stats
+from pytest_postgresql.query_stats import QueryStat
+
+
+@pytest.fixture(autouse=True)
+def clear_query_stats() -> Iterator[None]:
+    """Start and finish each test with no query statistics gathered."""
+    query_stats.clear()
+    yield
+    query_stats.clear()
+
+
+def test_record_deltas() -> None:
+    """Check that only queries run between snapshots are attributed to the test."""
+    before = {
+        "SELECT $1": QueryStat(calls=2, total_time=1.0, rows=2, shared_blks_hit=0),
+        "SELECT * FROM users": QueryStat(calls=1, total_time=5.0, rows=10, shared_blks_hit=4),
+    }
+    after = {
+        "SELECT $1": QueryStat(calls=2, total_time=1.0, rows=2, shared_blks_hit=0),
+        "SELECT * FROM users": QueryStat(calls=3, total_time=15.0, rows=30, shared_blks_hit=12),
+        "INSERT INTO users VALUES ($1)": QueryStat(calls=1, total_time=2.0, rows=1),
+    }
+    test_stat = query_stats.record("test_a.py::test_a", before, after)
+    assert test_stat == QueryStat(calls=3, total_time=12.0, rows=21, shared_blks_hit=8)
+    assert [query for query, _ in query_stats.top_queries(10)] == [
+        "SELECT * FROM users",
+        "INSERT INTO users VALUES ($1)",
+    ]
+
+
+def test_top_tests() -> None:
+    """Check that statistics add up per query and per test, across tests."""
+    query_stats.record("test_a.py::test_a", {}, {"SELECT $1": QueryStat(1, 1.0, 1, 0)})
+    query_stats.record("test_b.py::test_b", {}, {"SELECT $1": QueryStat(2, 8.0, 2, 0)})
+    query_stats.record("test_a.py::test_a", {}, {"SELECT $1": QueryStat(1, 1.0, 1, 0)})
+    assert query_stats.top_queries(1) == [("SELECT $1", QueryStat(4, 10.0, 4, 0))]
+    assert query_stats.top_tests(10) == [
+        ("test_b.py::test_b", QueryStat(2, 8.0, 2, 0)),
+        ("test_a.py::test_a", QueryStat(2, 2.0, 2, 0)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "postgres_options, expected",
+    (
+        ("", "-c shared_preload_libraries=pg_stat_statements"),
+        (
+            "-c shared_preload_libraries=auto_explain -c work_mem=8MB",
+            "-c shared_preload_libraries=pg_stat_statements,auto_explain",
+        ),
+        (
+            "--shared-preload-libraries='auto_explain, pg_stat_statements'",
+            "-c shared_preload_libraries=pg_stat_statements,auto_explain",
+        ),
+    ),
+)
+def test_server_options(postgres_options: str, expected: str) -> None:
+    """Check that libraries preloaded by postgres options get merged with pg_stat_statements."""
+    options = query_stats.server_options(postgres_options)
+    assert options.startswith(f"{expected} {query_stats.SERVER_OPTIONS}")
+    assert options.count("shared_preload_libraries") == 1
+    assert ("work_mem=8MB" in options) == ("work_mem" in postgres_options)
+
+
+def test_tracked_fixture_cleans_up() -> None:
+    """Check that the database gets cleaned up, when reading statistics after the test fails."""
+    cleaned: List[bool] = []
+    connection = MagicMock()
+
+    def fixture() -> Iterator[MagicMock]:
+        yield connection
+        cleaned.append(True)
+
+    janitor = MagicMock()
+    tracked = query_stats.tracked_fixture(fixture(), janitor, "test")
+    assert next(tracked) is connection
+    janitor.cursor.side_effect = OperationalError("server closed the connection")
+    with pytest.raises(OperationalError):
+        next(tracked, None)
+    assert cleaned == [True]
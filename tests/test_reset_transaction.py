@@ -0,0 +1,54 @@
+"""Transaction reset mode tests."""
+
+import pytest
+from psycopg import Connection
+from psycopg.errors import UndefinedTable
+
+from pytest_postgresql.factories import postgresql, postgresql_proc
+from tests.loader import load_database
+
+postgresql_proc_transaction = postgresql_proc(dbname="stories_transaction", load=[load_database])
+postgresql_transaction = postgresql("postgresql_proc_transaction", reset="transaction")
+
+
+@pytest.mark.parametrize("_", range(3))
+def test_transaction_reset(postgresql_transaction: Connection, _: int) -> None:
+    """Check that committed changes are rolled back after each test."""
+    with postgresql_transaction.cursor() as cur:
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 4
+        cur.execute("INSERT INTO stories (name) VALUES ('Dune')")
+        postgresql_transaction.commit()
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 5
+
+
+def test_transaction_rollback(postgresql_transaction: Connection) -> None:
+    """Check that rollback within the test only reverts changes since last commit."""
+    with postgresql_transaction.cursor() as cur:
+        cur.execute("INSERT INTO stories (name) VALUES ('Dune')")
+        postgresql_transaction.commit()
+        cur.execute("INSERT INTO stories (name) VALUES ('Hyperion')")
+        postgresql_transaction.rollback()
+        cur.execute("SELECT name FROM stories WHERE name IN ('Dune', 'Hyperion')")
+        assert cur.fetchall() == [("Dune",)]
+
+
+def test_transaction_failed_commit(postgresql_transaction: Connection) -> None:
+    """Check that committing a failed transaction rolls it back, like a regular commit would."""
+    with postgresql_transaction.cursor() as cur:
+        with pytest.raises(UndefinedTable):
+            cur.execute("SELECT * FROM no_such_table")
+        postgresql_transaction.commit()
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 4
+
+
+@pytest.mark.postgresql_fresh_database
+def test_transaction_fresh_database(postgresql_transaction: Connection) -> None:
+    """Check that marked test gets its own database created from template."""
+    with postgresql_transaction.cursor() as cur:
+        cur.execute("INSERT INTO stories (name) VALUES ('Dune')")
+        postgresql_transaction.commit()
+        cur.execute("SELECT * FROM stories")
+        assert len(cur.fetchall()) == 5
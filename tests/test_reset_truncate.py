@@ -0,0 +1,109 @@
+"""Truncate reset mode tests."""
+
+from typing import Any
+from unittest.mock import MagicMock
+
+import psycopg
+import pytest
+from psycopg import Connection
+
+from pytest_postgresql.capabilities import Capabilities
+from pytest_postgresql.factories import postgresql, postgresql_proc
+from pytest_postgresql.tracking import SCHEMA_CHANGED
+from pytest_postgresql.truncate import Table, TruncateReset
+
+
+def load_library(**kwargs: Any) -> None:
+    """Create tables referencing each other, with identity and generated columns."""
+    with psycopg.connect(**kwargs) as db_connection:
+        db_connection.execute(
+            "CREATE TABLE authors (id serial PRIMARY KEY, name text NOT NULL);"
+            "CREATE TABLE books ("
+            "id int GENERATED ALWAYS AS IDENTITY PRIMARY KEY, "
+            "author_id int NOT NULL REFERENCES authors, "
+            "title text NOT NULL, "
+            "slug text GENERATED ALWAYS AS (lower(title)) STORED);"
+            "CREATE TABLE reviews (id serial PRIMARY KEY, book_id int REFERENCES books);"
+            "INSERT INTO authors (name) VALUES ('Tolkien'), ('Herbert');"
+            "INSERT INTO books (author_id, title) VALUES (1, 'Silmarillion'), (2, 'Dune');"
+        )
+
+
+postgresql_proc_truncate = postgresql_proc(dbname="library_truncate", load=[load_library])
+postgresql_truncate = postgresql("postgresql_proc_truncate", reset="truncate")
+
+
+@pytest.mark.parametrize("_", range(3))
+def test_truncate_reset(postgresql_truncate: Connection, _: int) -> None:
+    """Check that committed changes are reverted after each test, with sequences."""
+    with postgresql_truncate.cursor() as cur:
+        cur.execute("SELECT title, slug FROM books ORDER BY id")
+        assert cur.fetchall() == [("Silmarillion", "silmarillion"), ("Dune", "dune")]
+        cur.execute("INSERT INTO authors (name) VALUES ('Simmons') RETURNING id")
+        assert cur.fetchone() == (3,)
+        cur.execute("INSERT INTO books (author_id, title) VALUES (3, 'Hyperion') RETURNING id")
+        assert cur.fetchone() == (3,)
+        cur.execute("DELETE FROM books WHERE title = 'Dune'")
+        postgresql_truncate.commit()
+
+
+@pytest.mark.parametrize("_", range(2))
+def test_truncate_reset_referencing(postgresql_truncate: Connection, _: int) -> None:
+    """Check that tables referencing changed tables are restored too."""
+    with postgresql_truncate.cursor() as cur:
+        cur.execute("SELECT count(*) FROM reviews")
+        assert cur.fetchone() == (0,)
+        cur.execute("INSERT INTO reviews (book_id) VALUES (1)")
+        cur.execute("UPDATE authors SET name = 'J.R.R. Tolkien' WHERE id = 1")
+        postgresql_truncate.commit()
+
+
+def test_truncate_reset_schema_change(postgresql_truncate: Connection) -> None:
+    """Change the schema, which can't be restored, so the database gets created again."""
+    postgresql_truncate.execute("CREATE TABLE extra (id int)")
+    postgresql_truncate.execute("ALTER TABLE authors ADD COLUMN born int")
+    postgresql_truncate.commit()
+
+
+def test_truncate_reset_after_schema_change(postgresql_truncate: Connection) -> None:
+    """Check that schema changed by the previous test does not leak."""
+    with postgresql_truncate.cursor() as cur:
+        cur.execute("SELECT to_regclass('extra')")
+        assert cur.fetchone() == (None,)
+        cur.execute(
+            "SELECT count(*) FROM information_schema.columns "
+            "WHERE table_name = 'authors' AND column_name = 'born'"
+        )
+        assert cur.fetchone() == (0,)
+
+
+def test_truncate_reset_reports_schema_change() -> None:
+    """Check that schema change is reported, instead of restoring the tables."""
+    connection = MagicMock()
+    cur = connection.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = ([SCHEMA_CHANGED, 1], False)
+    truncate_reset = TruncateReset(connection, Capabilities("16"))
+    truncate_reset.tables = {1: Table('"public"."authors"', False, "id, name", 2)}
+    assert truncate_reset.reset() is False
+    assert cur.execute.call_count == 1
+
+
+def test_truncate_closure_and_script() -> None:
+    """Check that referencing tables are truncated along, and only tables with rows restored."""
+    truncate_reset = TruncateReset(MagicMock(), Capabilities("16"))
+    truncate_reset.tables = {
+        1: Table('"public"."authors"', False, "id, name", 2),
+        2: Table('"public"."books"', False, "id, author_id, title", 2),
+        3: Table('"public"."reviews"', True, "id, book_id", 0),
+    }
+    truncate_reset.referencing = {1: {2}, 2: {3}}
+    assert truncate_reset.closure([2, 100]) == [2, 3]
+    assert truncate_reset.closure([1]) == [1, 2, 3]
+    script = truncate_reset.restore_script([2, 3])
+    assert 'TRUNCATE ONLY "public"."books", "public"."reviews" RESTART IDENTITY' in script
+    assert (
+        'INSERT INTO "public"."books" (id, author_id, title) OVERRIDING SYSTEM VALUE '
+        "SELECT id, author_id, title FROM pytest_postgresql.seed_2"
+    ) in script
+    assert "seed_3" not in script
+    assert script.startswith("BEGIN;") and script.endswith("COMMIT")
@@ -0,0 +1,50 @@
+"""Retry helpers tests."""
+
+import asyncio
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pytest_postgresql.retry import retry, retry_async
+
+
+def test_retry_returns_result() -> None:
+    """Check that the result of the successful call is returned."""
+    assert retry(lambda: 1) == 1
+
+
+@patch("pytest_postgresql.retry.sleep")
+def test_retry_backoff(sleep_mock: MagicMock) -> None:
+    """Check that the delay between attempts doubles, up to the max_delay."""
+    attempts: List[int] = []
+
+    def fail_five_times() -> int:
+        attempts.append(1)
+        if len(attempts) <= 5:
+            raise ValueError("failed")
+        return len(attempts)
+
+    assert retry(fail_five_times, possible_exception=ValueError, max_delay=0.1) == 6
+    delays = [call.args[0] for call in sleep_mock.call_args_list]
+    assert delays == [0.01, 0.02, 0.04, 0.08, 0.1]
+
+
+def test_retry_async_returns_result() -> None:
+    """Check that the result of the successful coroutine is returned."""
+
+    async def succeed() -> int:
+        return 1
+
+    assert asyncio.run(retry_async(succeed)) == 1
+
+
+def test_retry_async_timeout() -> None:
+    """Check that the TimeoutError is raised after timeout, with the last error as a cause."""
+
+    async def fail() -> int:
+        raise ValueError("failed")
+
+    with pytest.raises(TimeoutError) as excinfo:
+        asyncio.run(retry_async(fail, timeout=0, possible_exception=ValueError))
+    assert isinstance(excinfo.value.__cause__, ValueError)
@@ -0,0 +1,69 @@
+"""Reusing clean databases tests."""
+
+from typing import Dict
+
+import pytest
+from psycopg import Connection
+
+from pytest_postgresql.factories import postgresql, postgresql_proc
+from tests.loader import load_database
+
+postgresql_proc_reuse = postgresql_proc(
+    dbname="stories_reuse", load=[load_database], reuse_clean=True
+)
+postgresql_reuse = postgresql("postgresql_proc_reuse", reuse_clean=True)
+
+# test name: oid of the database it got
+database_oids: Dict[str, int] = {}
+
+
+def database_oid(connection: Connection, test: str) -> int:
+    """Record oid of the connection's database, which changes when it's recreated."""
+    with connection.cursor() as cur:
+        cur.execute("SELECT oid FROM pg_database WHERE datname = current_database()")
+        row = cur.fetchone()
+    assert row is not None
+    oid: int = row[0]
+    database_oids[test] = oid
+    return oid
+
+
+pytestmark = pytest.mark.xdist_group(name="reuse_clean")
+
+
+def test_reuse_read(postgresql_reuse: Connection) -> None:
+    """Read, and leave uncommitted changes, which get rolled back.
+
+    Inserting would advance the sequence, which isn't rolled back, so rows are only updated.
+    """
+    database_oid(postgresql_reuse, "read")
+    postgresql_reuse.execute("UPDATE stories SET name = upper(name)")
+
+
+def test_reuse_after_read(postgresql_reuse: Connection) -> None:
+    """Check that database left clean is handed over, and commit a change."""
+    assert database_oid(postgresql_reuse, "after read") == database_oids["read"]
+    postgresql_reuse.execute("INSERT INTO stories (name) VALUES ('Dune')")
+    postgresql_reuse.commit()
+
+
+def test_reuse_after_write(postgresql_reuse: Connection) -> None:
+    """Check that changed database is recreated, and advance a sequence."""
+    assert database_oid(postgresql_reuse, "after write") != database_oids["after read"]
+    with postgresql_reuse.cursor() as cur:
+        cur.execute("SELECT count(*) FROM stories")
+        assert cur.fetchone() == (4,)
+        cur.execute("SELECT nextval('stories_id_seq')")
+    postgresql_reuse.commit()
+
+
+def test_reuse_after_nextval(postgresql_reuse: Connection) -> None:
+    """Check that database with advanced sequence is recreated, and change the schema."""
+    assert database_oid(postgresql_reuse, "after nextval") != database_oids["after write"]
+    postgresql_reuse.execute("CREATE INDEX stories_name ON stories (name)")
+    postgresql_reuse.commit()
+
+
+def test_reuse_after_ddl(postgresql_reuse: Connection) -> None:
+    """Check that database with changed schema is recreated."""
+    assert database_oid(postgresql_reuse, "after ddl") != database_oids["after nextval"]
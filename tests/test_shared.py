@@ -0,0 +1,51 @@
+"""Server shared between xdist workers tests."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+from pytest_postgresql.shared import SharedServer, State
+
+
+def finished_pid() -> int:
+    """Return pid of a process that is not running anymore."""
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def test_shared_server_attach_detach(tmp_path: Path) -> None:
+    """Check that server is started by the first worker, and stopped by the last."""
+    started: List[State] = []
+    stopped: List[State] = []
+
+    def start() -> State:
+        started.append({"port": 5432})
+        return started[-1]
+
+    shared = SharedServer(tmp_path / "shared")
+    assert shared.attach(start, stopped.append)["workers"] == [os.getpid()]
+    # another worker, still running, is using the server
+    shared._write({"port": 5432, "workers": [os.getpid(), os.getppid()]})
+    shared.detach(stopped.append)
+    assert not stopped
+    assert shared.attach(start, stopped.append)["workers"] == [os.getppid(), os.getpid()]
+    assert len(started) == 1
+
+    # other worker is gone, current one is the last one
+    shared._write({"port": 5432, "workers": [os.getpid(), finished_pid()]})
+    shared.detach(stopped.append)
+    assert len(stopped) == 1
+    assert shared._read() is None
+
+
+def test_shared_server_left_behind(tmp_path: Path) -> None:
+    """Check that server left behind by workers that are gone gets stopped and started again."""
+    stopped: List[State] = []
+    shared = SharedServer(tmp_path)
+    shared._write({"port": 5432, "workers": [finished_pid()]})
+    state = shared.attach(lambda: {"port": 5433}, stopped.append)
+    assert stopped[0]["port"] == 5432
+    assert state == {"port": 5433, "workers": [os.getpid()]}
@@ -0,0 +1,88 @@
+"""Template database snapshot tests."""
+
+import os
+from pathlib import Path
+from typing import Any
+
+from packaging.version import parse
+
+from pytest_postgresql.cache import DirectoryCache
+from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql.janitor import DatabaseJanitor
+from pytest_postgresql.snapshot import TemplateSnapshots, load_fingerprint
+from tests.conftest import TEST_SQL_FILE
+from tests.loader import load_database
+
+VERSION = parse("16")
+
+
+def other_load_database(**kwargs: Any) -> None:
+    """Loader different from load_database."""
+
+
+def test_fingerprint_sql_contents(tmp_path: Path) -> None:
+    """Check that fingerprint changes along with sql file contents."""
+    sql_file = tmp_path / "schema.sql"
+    sql_file.write_text("CREATE TABLE test (id integer);")
+    fingerprint = load_fingerprint([sql_file], VERSION)
+    assert fingerprint == load_fingerprint([sql_file], VERSION)
+    sql_file.write_text("CREATE TABLE test (id bigint);")
+    assert fingerprint != load_fingerprint([sql_file], VERSION)
+
+
+def test_fingerprint_callables() -> None:
+    """Check that fingerprint depends on loaders' source and their order."""
+    fingerprint = load_fingerprint([load_database], VERSION)
+    assert fingerprint == load_fingerprint(["tests.loader:load_database"], VERSION)
+    assert fingerprint != load_fingerprint([other_load_database], VERSION)
+    assert load_fingerprint([TEST_SQL_FILE, load_database], VERSION) != load_fingerprint(
+        [load_database, TEST_SQL_FILE], VERSION
+    )
+
+
+def test_fingerprint_groups() -> None:
+    """Check that fingerprint tells load groups apart from sequential loaders."""
+    fingerprint = load_fingerprint([(load_database, other_load_database)], VERSION)
+    assert fingerprint == load_fingerprint([(load_database, other_load_database)], VERSION)
+    assert fingerprint != load_fingerprint([load_database, other_load_database], VERSION)
+    assert fingerprint != load_fingerprint([(other_load_database, load_database)], VERSION)
+
+
+def test_fingerprint_versions() -> None:
+    """Check that fingerprint depends on server version and explicit load version."""
+    fingerprint = load_fingerprint([load_database], VERSION)
+    assert fingerprint != load_fingerprint([load_database], parse("17"))
+    assert fingerprint != load_fingerprint([load_database], VERSION, "1")
+    assert load_fingerprint([load_database], VERSION, "1") == load_fingerprint(
+        [other_load_database], VERSION, "1"
+    )
+
+
+def test_snapshot_store_restore(postgresql_proc: PostgreSQLExecutor, tmp_path: Path) -> None:
+    """Check that template database gets restored from a stored snapshot."""
+    snapshots = TemplateSnapshots(
+        DirectoryCache(tmp_path, max_size=100),
+        bindir=os.path.dirname(postgresql_proc.executable),
+    )
+    key = load_fingerprint([load_database], postgresql_proc.version)
+
+    def janitor(template_dbname: str) -> DatabaseJanitor:
+        return DatabaseJanitor(
+            user=postgresql_proc.user,
+            host=postgresql_proc.host,
+            port=postgresql_proc.port,
+            template_dbname=template_dbname,
+            version=postgresql_proc.version,
+            password=postgresql_proc.password,
+        )
+
+    with janitor("snapshot_source_tmpl") as source_janitor:
+        assert not snapshots.restore(key, source_janitor)
+        source_janitor.load(load_database)
+        snapshots.store(key, source_janitor)
+
+    with janitor("snapshot_restored_tmpl") as restored_janitor:
+        assert snapshots.restore(key, restored_janitor)
+        with restored_janitor.cursor("snapshot_restored_tmpl") as cur:
+            cur.execute("SELECT * FROM stories")
+            assert len(cur.fetchall()) == 4
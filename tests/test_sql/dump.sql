@@ -0,0 +1,29 @@
+--
+-- Plain pg_dump style output, with COPY blocks.
+--
+
+SET statement_timeout = 0;
+SET client_encoding = 'UTF8';
+
+CREATE FUNCTION public.greet(name text) RETURNS text
+    LANGUAGE sql
+    AS $_$SELECT 'Hello; ' || $1;$_$;
+
+CREATE TABLE public.dump_load (
+    id integer NOT NULL,
+    note text
+);
+
+--
+-- Data for Name: dump_load; Type: TABLE DATA; Schema: public; Owner: -
+--
+
+COPY public.dump_load (id, note) FROM stdin;
+1	semicolon; inside
+2	\N
+3	quote ' inside
+\.
+
+
+ALTER TABLE ONLY public.dump_load
+    ADD CONSTRAINT dump_load_pkey PRIMARY KEY (id);
@@ -0,0 +1,79 @@
+"""Sql files splitting and decompression tests."""
+
+import gzip
+import lzma
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from pytest_postgresql.sqlfile import is_sql_file, open_sql, split_sql
+from tests.conftest import TEST_SQL_DIR
+
+
+def statements(script: str) -> List[str]:
+    """Return statements of the sql script."""
+    return [statement for statement, _ in split_sql(script.splitlines(keepends=True))]
+
+
+@pytest.mark.parametrize(
+    "script, expected",
+    (
+        ("SELECT 1; SELECT 2;", ["SELECT 1;", "SELECT 2;"]),
+        ("SELECT 'a;b', \"c;d\" FROM t;", ["SELECT 'a;b', \"c;d\" FROM t;"]),
+        ("SELECT 'it''s;';", ["SELECT 'it''s;';"]),
+        ("SELECT E'\\';';", ["SELECT E'\\';';"]),
+        (
+            "SELECT $$a;\nb$$; SELECT $tag$ $$; $tag$;",
+            ["SELECT $$a;\nb$$;", "SELECT $tag$ $$; $tag$;"],
+        ),
+        ("SELECT $1 FROM a$b;", ["SELECT $1 FROM a$b;"]),
+        ("-- comment;\nSELECT 1; -- trailing;", ["-- comment;\nSELECT 1;"]),
+        ("/* a; /* b; */ c; */ SELECT 1;", ["/* a; /* b; */ c; */ SELECT 1;"]),
+        ("SELECT 1", ["SELECT 1"]),
+        ("-- only comment\n", []),
+    ),
+)
+def test_split_sql(script: str, expected: List[str]) -> None:
+    """Check that statements are split on semicolons outside of quotes and comments."""
+    assert statements(script) == expected
+
+
+def test_split_sql_copy() -> None:
+    """Check that COPY FROM STDIN data is passed along with the statement, in chunks."""
+    script = "COPY t (a) FROM stdin;\n1;\n2\n3\n\\.\nSELECT 1;\n"
+    result: List[Tuple[str, Optional[List[str]]]] = [
+        (statement, None if data is None else list(data))
+        for statement, data in split_sql(script.splitlines(keepends=True), copy_chunk_size=4)
+    ]
+    assert result == [("COPY t (a) FROM stdin;", ["1;\n2\n", "3\n"]), ("SELECT 1;", None)]
+
+
+def test_split_sql_copy_not_consumed() -> None:
+    """Check that COPY data not consumed by the caller is skipped."""
+    script = "COPY t (a) FROM stdin;\n1\n\\.\nSELECT 1;\n"
+    assert statements(script) == ["COPY t (a) FROM stdin;", "SELECT 1;"]
+
+
+@pytest.mark.parametrize(
+    "suffix, compress", ((".sql.gz", gzip.compress), (".sql.xz", lzma.compress))
+)
+def test_open_sql_compressed(tmp_path: Path, suffix: str, compress: Any) -> None:
+    """Check that compressed files are decompressed while reading."""
+    content = Path(TEST_SQL_DIR, "dump.sql").read_bytes()
+    path = tmp_path / f"dump{suffix}"
+    path.write_bytes(compress(content))
+    assert is_sql_file(str(path))
+    with open_sql(path) as sql_file:
+        assert sql_file.read() == content.decode("utf-8")
+        assert sql_file.buffer.tell() == len(content)
+
+
+def test_open_sql_zstandard(tmp_path: Path) -> None:
+    """Check that zstandard compressed files are decompressed while reading."""
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "dump.sql.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(b"SELECT 1;\n"))
+    with open_sql(path) as sql_file:
+        assert sql_file.read() == "SELECT 1;\n"
+        assert sql_file.buffer.tell() == len(b"SELECT 1;\n")
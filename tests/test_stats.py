@@ -0,0 +1,73 @@
+"""Statistics and phase timings tests."""
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from pytest_postgresql import stats
+
+
+@pytest.fixture(autouse=True)
+def clear_stats() -> Iterator[None]:
+    """Start and finish each test with no statistics gathered."""
+    stats.clear()
+    yield
+    stats.clear()
+
+
+def test_percentile() -> None:
+    """Check nearest-rank percentiles."""
+    samples = [float(sample) for sample in range(1, 101)]
+    assert stats.percentile(samples, 0.5) == 50
+    assert stats.percentile(samples, 0.95) == 95
+    assert stats.percentile([3.0], 0.95) == 3
+
+
+def test_timer_summary() -> None:
+    """Check that timer records phases, summarized with totals and percentiles."""
+    for seconds in (0.1, 0.2, 0.3):
+        stats.record("database create", seconds)
+    with stats.timer("database drop"):
+        pass
+    summary = stats.summary()
+    assert list(summary) == ["database create", "database drop"]
+    assert summary["database create"]["count"] == 3
+    assert summary["database create"]["total"] == pytest.approx(0.6)
+    assert summary["database create"]["p50"] == 0.2
+    assert summary["database create"]["max"] == 0.3
+    assert summary["database drop"]["count"] == 1
+
+
+def test_timed_fixture_slowest_tests() -> None:
+    """Check that fixture's setup and teardown get attributed to the tests."""
+
+    def fixture(value: str) -> Iterator[str]:
+        stats.record("database create", 0.5)
+        yield value
+        stats.record("database drop", 0.1)
+
+    timed = stats.timed_fixture(fixture("connection"), "test_a.py::test_a")
+    assert next(timed) == "connection"
+    assert list(timed) == []
+    stats.record("test setup", 2.0, "test_b.py::test_b")
+
+    slowest = stats.slowest_tests(1)
+    assert [cost["test"] for cost in slowest] == ["test_b.py::test_b"]
+    test_a = stats.test_timings()["test_a.py::test_a"]
+    assert set(test_a) == {"test setup", "test teardown"}
+    assert len(stats.slowest_tests(10)) == 2
+
+
+def test_export(tmp_path: Path) -> None:
+    """Check that timings get exported to json."""
+    stats.incr("pool waits")
+    stats.record("initdb", 1.5)
+    stats.record("test setup", 0.5, "test_a.py::test_a")
+    export_path = tmp_path / "timings.json"
+    stats.export(export_path)
+    data = json.loads(export_path.read_text())
+    assert data["counters"] == {"pool waits": 1}
+    assert data["phases"]["initdb"]["total"] == 1.5
+    assert data["tests"] == {"test_a.py::test_a": {"test setup": 0.5}}
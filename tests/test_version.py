@@ -1,8 +1,16 @@
 """Auxiliary tests."""
 
+import os
+from pathlib import Path
+
 import pytest
+from packaging.version import parse
 
-from pytest_postgresql.executor import PostgreSQLExecutor
+from pytest_postgresql import executor
+from pytest_postgresql.cache import DirectoryCache
+from pytest_postgresql.capabilities import Capabilities
+from pytest_postgresql.exceptions import ExecutableMissingException
+from pytest_postgresql.executor import PostgreSQLExecutor, detect_version
 
 
 @pytest.mark.parametrize(
@@ -21,3 +29,75 @@ def test_versions(ctl_input: str, version: str) -> None:
     match = PostgreSQLExecutor.VERSION_RE.search(ctl_input)
     assert match is not None
     assert match.groupdict()["version"] == version
+
+
+def fake_pg_ctl(path: Path, version: str) -> Path:
+    """Create pg_ctl replacement printing version, and counting its calls."""
+    executable = path / "pg_ctl"
+    executable.write_text(
+        f"#!/bin/sh\necho called >> {path / 'calls'}\necho 'pg_ctl (PostgreSQL) {version}'\n"
+    )
+    executable.chmod(0o755)
+    return executable
+
+
+def test_detect_version_memoized(tmp_path: Path) -> None:
+    """Check that the version is detected once per executable, until it changes."""
+    executable = fake_pg_ctl(tmp_path, "16.2")
+    assert detect_version(str(executable)) == parse("16.2")
+    assert detect_version(str(executable)) == parse("16.2")
+    assert len((tmp_path / "calls").read_text().splitlines()) == 1
+
+    executable = fake_pg_ctl(tmp_path, "17.0")
+    os.utime(executable, (0, 0))
+    assert detect_version(str(executable)) == parse("17.0")
+
+
+def test_detect_version_persisted(tmp_path: Path) -> None:
+    """Check that the detected version is reused from the cache by the next session."""
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    executable = fake_pg_ctl(bindir, "15.4")
+    cache = DirectoryCache(tmp_path / "cache", max_size=1)
+    assert detect_version(str(executable), cache) == parse("15.4")
+    # forget what was detected in this session
+    executor._versions.clear()
+    assert detect_version(str(executable), cache) == parse("15.4")
+    assert len((bindir / "calls").read_text().splitlines()) == 1
+
+
+def test_detect_version_missing_executable(tmp_path: Path) -> None:
+    """Check that missing executable is reported."""
+    with pytest.raises(ExecutableMissingException):
+        detect_version(str(tmp_path / "pg_ctl"))
+
+
+@pytest.mark.parametrize(
+    "version, drop_force, create_strategy, pg_stat_io",
+    (
+        ("12", False, False, False),
+        ("13.4", True, False, False),
+        ("15", True, True, False),
+        ("16.2", True, True, True),
+    ),
+)
+def test_capabilities(
+    version: str, drop_force: bool, create_strategy: bool, pg_stat_io: bool
+) -> None:
+    """Check that capabilities follow server version."""
+    capabilities = Capabilities(version)
+    assert capabilities.drop_force is drop_force
+    assert capabilities.create_strategy is create_strategy
+    assert capabilities.pg_stat_io is pg_stat_io
+
+
+@pytest.mark.parametrize("version, exec_time", (("12.8", False), ("13", True), ("17", True)))
+def test_capabilities_stat_statements(version: str, exec_time: bool) -> None:
+    """Check that pg_stat_statements' execution time column follows server version."""
+    assert Capabilities(version).stat_statements_exec_time is exec_time
+
+
+@pytest.mark.parametrize("version, generated", (("11.20", False), ("12", True), ("16.2", True)))
+def test_capabilities_generated_columns(version: str, generated: bool) -> None:
+    """Check that stored generated columns follow server version."""
+    assert Capabilities(version).generated_columns is generated